@@ -1,6 +1,10 @@
+import sys
 import pandas as pd
-from io import StringIO
-import requests
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'python'))
+from dataset_fetcher import fetch
 
 # URLs of the CSV files (using raw.githubusercontent.com for direct CSV access)
 urls = {
@@ -12,14 +16,16 @@ urls = {
 # Dictionary to store species from each file
 species_sets = {}
 
+# Download all files at once through the local mirror; repeat runs read the mirror
+contents = fetch(urls.values(), return_exceptions=True)
+
 for year, url in urls.items():
     try:
-        # Download the CSV file
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for bad status codes
+        if isinstance(contents[url], Exception):
+            raise contents[url]
         
         # Read the CSV into a DataFrame
-        df = pd.read_csv(StringIO(response.text))
+        df = pd.read_csv(BytesIO(contents[url]))
         
         # Get unique species from the SPECIES_NAME column
         species_sets[year] = set(df['SPECIES_NAME'].str.strip().str.upper().dropna().unique())
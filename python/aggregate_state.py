@@ -0,0 +1,295 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from pathlib import Path
+
+SNAPSHOT_VERSION = 2
+SURVEY_COLUMNS = ['RELEVE_ID', 'SPECIES_NAME', 'GRID_NO', 'DOMIN']
+JOURNAL_SUFFIX = '.releves'
+
+class AggregateSnapshot:
+    """
+    Running species statistics that can be updated relevé by relevé.
+
+    Keeps the per-species DOMIN sums, per-site species bitsets (bit i set
+    when species i has been recorded at the site) and totals. Each relevé's
+    rows go to an append-only journal next to the snapshot, so it can be
+    retracted when errata replace it; the snapshot itself only holds the
+    aggregates and each relevé's offset in the journal. An update appends
+    its own relevés and rewrites the aggregates, whose size depends on the
+    species and sites seen, not on how many rows have been added.
+    """
+
+    def __init__(self, journal_path=None):
+        self.journal_path = Path(journal_path) if journal_path else None
+        self.species = []
+        self.species_index = {}
+        self.species_scores = []
+        self.species_rows = []
+        self.site_bits = {}
+        self.releves = {}
+        self.total_domin_score = 0.0
+        self.row_count = 0
+
+    def _species_code(self, name):
+        code = self.species_index.get(name)
+        if code is None:
+            code = len(self.species)
+            self.species_index[name] = code
+            self.species.append(name)
+            self.species_scores.append(0.0)
+            self.species_rows.append(0)
+        return code
+
+    def add_releve(self, site_id, releve_id, species_names, domin_scores):
+        """Add the rows of one relevé, not yet in the snapshot, to every aggregate."""
+        key = f"{site_id}/{releve_id}"
+        if key in self.releves:
+            raise ValueError(f"Relevé {key} is already in the snapshot")
+        codes = [self._species_code(name) for name in species_names]
+        bits = self.site_bits.get(site_id, 0)
+        for code, domin_score in zip(codes, domin_scores):
+            self.species_scores[code] += domin_score
+            self.species_rows[code] += 1
+            self.total_domin_score += domin_score
+            bits |= 1 << code
+        self.site_bits[site_id] = bits
+        self.row_count += len(codes)
+        # Journalled on save; until then the rows stay in memory
+        self.releves[key] = {'site': site_id, 'offset': None, 'rows': (codes, list(domin_scores))}
+
+    def releve_rows(self, key):
+        """(species codes, DOMIN scores) of relevé `key`, read back from the journal."""
+        releve = self.releves[key]
+        if releve.get('rows') is not None:
+            return releve['rows']
+        with open(self.journal_path, 'rb') as f:
+            f.seek(releve['offset'])
+            entry = json.loads(f.readline())
+        return [self.species_index[name] for name in entry['species']], entry['scores']
+
+    def retract_releve(self, key):
+        """Remove every row of relevé `key` ('SITE_ID/RELEVE_ID') from the aggregates."""
+        if key not in self.releves:
+            raise KeyError(f"Relevé {key} is not in the snapshot")
+        codes, scores = self.releve_rows(key)
+        site_id = self.releves.pop(key)['site']
+        for code, domin_score in zip(codes, scores):
+            self.species_scores[code] -= domin_score
+            self.species_rows[code] -= 1
+            self.total_domin_score -= domin_score
+        self.row_count -= len(codes)
+
+        # The site keeps a species only if another of its relevés records it
+        remaining = [other for other, releve in self.releves.items() if releve['site'] == site_id]
+        if remaining:
+            bits = 0
+            for other in remaining:
+                for code in self.releve_rows(other)[0]:
+                    bits |= 1 << code
+            self.site_bits[site_id] = bits
+        else:
+            del self.site_bits[site_id]
+        return len(codes)
+
+    def releve_richness(self, key):
+        """Number of distinct species recorded in relevé `key`."""
+        return len(set(self.releve_rows(key)[0]))
+
+    def site_species(self, site_id):
+        """Names of the species recorded at a site, decoded from its bitset."""
+        bits = self.site_bits.get(site_id, 0)
+        names = []
+        while bits:
+            low = bits & -bits
+            names.append(self.species[low.bit_length() - 1])
+            bits ^= low
+        return names
+
+    def results(self):
+        """Return (species_scores, max_species, unique_species, species_per_site) like isgs-species-stats.py."""
+        scores = {name: self.species_scores[code] for code, name in enumerate(self.species)
+                  if self.species_rows[code] > 0}
+        if not scores:
+            raise ValueError("Snapshot holds no rows")
+        max_species = max(scores.items(), key=lambda x: x[1])
+        species_per_site = {site_id: set(self.site_species(site_id)) for site_id in self.site_bits}
+        return scores, max_species, set(scores), species_per_site
+
+    def write_journal(self):
+        """Append the relevés added since the last save to the journal, recording their offsets."""
+        pending = [(key, releve) for key, releve in self.releves.items() if releve['offset'] is None]
+        if not pending:
+            return
+        with open(self.journal_path, 'ab') as f:
+            for key, releve in pending:
+                codes, scores = releve['rows']
+                entry = {'key': key, 'site': releve['site'], 'species': [self.species[code] for code in codes],
+                         'scores': scores}
+                releve['offset'] = f.tell()
+                f.write(json.dumps(entry).encode('utf-8') + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+        for _, releve in pending:
+            releve['rows'] = None
+
+    def to_dict(self):
+        return {
+            'version': SNAPSHOT_VERSION,
+            'species': self.species,
+            'species_scores': self.species_scores,
+            'species_rows': self.species_rows,
+            'site_bits': {site: format(bits, 'x') for site, bits in self.site_bits.items()},
+            'releves': {key: [releve['site'], releve['offset']] for key, releve in self.releves.items()},
+            'total_domin_score': self.total_domin_score,
+            'row_count': self.row_count
+        }
+
+    @classmethod
+    def from_dict(cls, data, journal_path):
+        if data.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {data.get('version')}")
+        snapshot = cls(journal_path)
+        snapshot.species = data['species']
+        snapshot.species_index = {name: code for code, name in enumerate(snapshot.species)}
+        snapshot.species_scores = data['species_scores']
+        snapshot.species_rows = data['species_rows']
+        snapshot.site_bits = {site: int(bits, 16) for site, bits in data['site_bits'].items()}
+        snapshot.releves = {key: {'site': site, 'offset': offset, 'rows': None}
+                            for key, (site, offset) in data['releves'].items()}
+        snapshot.total_domin_score = data['total_domin_score']
+        snapshot.row_count = data['row_count']
+        return snapshot
+
+def journal_path(path):
+    """Path of the relevé journal kept next to a snapshot file."""
+    return Path(f"{path}{JOURNAL_SUFFIX}")
+
+def load_snapshot(path):
+    """Load a snapshot file, or return an empty snapshot if it does not exist yet."""
+    if not Path(path).exists():
+        return AggregateSnapshot(journal_path(path))
+    with open(path, 'r') as f:
+        return AggregateSnapshot.from_dict(json.load(f), journal_path(path))
+
+def save_snapshot(snapshot, path):
+    """
+    Append new relevés to the journal, then write the aggregates atomically.
+
+    Journal lines written by an update that is interrupted before the
+    aggregates are replaced are never referenced, so a snapshot is never
+    left half updated.
+    """
+    snapshot.journal_path = journal_path(path)
+    snapshot.write_journal()
+    tmp_path = Path(f"{path}.tmp")
+    tmp_path.write_text(json.dumps(snapshot.to_dict()), encoding='utf-8')
+    tmp_path.replace(path)
+
+def read_delta(file_path, default_site='68'):
+    """
+    Read the rows of an append file or RELEVE_SURVEY CSV.
+
+    Files without a SITE_ID column (the Site 68 surveys) are assigned
+    `default_site`; headerless survey files (RELEVE_SURVEY_2..5) are read
+    with the RELEVE_SURVEY_1 columns. Rows with an invalid DOMIN value are skipped.
+    """
+    rows = []
+    skipped = 0
+    with open(file_path, mode='r', newline='') as csvfile:
+        has_header = csvfile.readline().startswith(('RELEVE_ID', 'ID', 'SITE_ID'))
+        csvfile.seek(0)
+        reader = csv.DictReader(csvfile, fieldnames=None if has_header else SURVEY_COLUMNS, skipinitialspace=True)
+        if not all(field in reader.fieldnames for field in ['RELEVE_ID', 'SPECIES_NAME', 'DOMIN']):
+            raise ValueError("CSV file must contain RELEVE_ID, SPECIES_NAME, and DOMIN columns")
+        for row in reader:
+            try:
+                domin_score = float(row['DOMIN'])
+            except (TypeError, ValueError):
+                skipped += 1
+                continue
+            site_id = row.get('SITE_ID') or default_site
+            rows.append((site_id.strip(), row['RELEVE_ID'].strip(), row['SPECIES_NAME'].strip(), domin_score))
+    if skipped:
+        print(f"Warning: skipped {skipped} rows with invalid DOMIN values", file=sys.stderr)
+    return rows
+
+def apply_delta(snapshot, rows, replace=False):
+    """
+    Add `rows` to the snapshot, relevé by relevé.
+
+    With `replace`, relevés already in the snapshot are retracted first, so
+    an errata file supersedes them. Otherwise a relevé that is already in
+    the snapshot is an error, since adding it again would count it twice.
+    Returns the number of relevés replaced.
+    """
+    releves = {}
+    for site_id, releve_id, species_name, domin_score in rows:
+        names, scores = releves.setdefault((site_id, releve_id), ([], []))
+        names.append(species_name)
+        scores.append(domin_score)
+
+    present = [f"{site_id}/{releve_id}" for site_id, releve_id in releves
+               if f"{site_id}/{releve_id}" in snapshot.releves]
+    if present and not replace:
+        listed = ', '.join(present[:10]) + (', ...' if len(present) > 10 else '')
+        raise ValueError(f"{len(present)} relevés are already in the snapshot ({listed}); "
+                         "use 'replace' to supersede them")
+    for key in present:
+        snapshot.retract_releve(key)
+    for (site_id, releve_id), (names, scores) in releves.items():
+        snapshot.add_releve(site_id, releve_id, names, scores)
+    return len(present)
+
+def print_summary(snapshot, top=10):
+    """Print the headline statistics held by a snapshot."""
+    species_scores, (top_species, top_score), unique_species, species_per_site = snapshot.results()
+    print(f"Rows: {snapshot.row_count}, relevés: {len(snapshot.releves)}, sites: {len(species_per_site)}")
+    print(f"Total unique species across all sites: {len(unique_species)}")
+    print(f"Total DOMIN score: {snapshot.total_domin_score:.1f}")
+    print(f"Species with highest combined DOMIN score: {top_species} ({top_score:.1f})")
+    for rank, (species, score) in enumerate(sorted(species_scores.items(), key=lambda x: x[1], reverse=True)[:top], 1):
+        print(f"{rank:>4}. {species:<40} {score:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain incrementally updated species statistics')
+    parser.add_argument('snapshot', help='Snapshot JSON file (created if missing)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    append = subparsers.add_parser('append', help='Add the rows of a CSV file')
+    append.add_argument('input_file', help='Append file or RELEVE_SURVEY CSV')
+    append.add_argument('--site', default='68', help='SITE_ID for files without a SITE_ID column')
+
+    replace = subparsers.add_parser('replace', help='Replace the relevés found in a CSV file (errata)')
+    replace.add_argument('input_file', help='CSV holding the corrected relevés')
+    replace.add_argument('--site', default='68', help='SITE_ID for files without a SITE_ID column')
+
+    retract = subparsers.add_parser('retract', help='Remove relevés from the snapshot')
+    retract.add_argument('releves', nargs='+', help="Relevé keys as 'SITE_ID/RELEVE_ID'")
+
+    report = subparsers.add_parser('report', help='Print the current statistics')
+    report.add_argument('-n', '--top', type=int, default=10, help='Number of top species to list')
+
+    args = parser.parse_args()
+
+    try:
+        snapshot = load_snapshot(args.snapshot)
+        if args.command in ('append', 'replace'):
+            rows = read_delta(args.input_file, args.site)
+            retracted = apply_delta(snapshot, rows, replace=args.command == 'replace')
+            save_snapshot(snapshot, args.snapshot)
+            print(f"Added {len(rows)} rows" + (f", replaced {retracted} relevés" if retracted else ""))
+        elif args.command == 'retract':
+            for key in args.releves:
+                print(f"Retracted {snapshot.retract_releve(key)} rows of relevé {key}")
+            save_snapshot(snapshot, args.snapshot)
+        else:
+            print_summary(snapshot, args.top)
+    except (FileNotFoundError, KeyError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
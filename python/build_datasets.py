@@ -0,0 +1,234 @@
+import argparse
+import hashlib
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import pandas as pd
+from domin_scales import to_mid_range
+
+STATE_FILENAME = ".build-state.json"
+
+SCALES = {
+    'mid-range': to_mid_range
+}
+
+def file_hash(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def step_fingerprint(step):
+    """Hash of a step definition, so editing a step in the spec makes its output stale."""
+    return hashlib.sha256(json.dumps(step, sort_keys=True).encode('utf-8')).hexdigest()
+
+def read_table(path, columns):
+    """Read a survey CSV as strings, supplying `columns` when the file has no header row."""
+    with open(path, 'r', newline='') as f:
+        first_line = f.readline()
+    has_header = first_line.strip().split(',')[0] == columns[0]
+
+    return pd.read_csv(
+        path,
+        dtype=str,
+        keep_default_na=False,
+        header=0 if has_header else None,
+        names=None if has_header else columns
+    )
+
+def selection_mask(df, selection):
+    """
+    Boolean mask of rows matching a selection such as {"RELEVE_ID": [28, [39, 49]]}.
+
+    Each value is either a single number or an inclusive [low, high] range.
+    """
+    mask = pd.Series(False, index=df.index)
+    for column, values in selection.items():
+        numbers = pd.to_numeric(df[column], errors='coerce')
+        for value in values:
+            if isinstance(value, list):
+                mask |= numbers.between(value[0], value[1])
+            else:
+                mask |= numbers == value
+    return mask
+
+def apply_step(step, base_dir, columns, protect=False):
+    """
+    Compute a step's output from its inputs and write it. Runs in a worker process.
+
+    With `protect`, an existing output whose contents differ from the newly
+    computed ones is left alone; returns whether the output was written (or
+    already matched).
+    """
+    base_dir = Path(base_dir)
+    frames = [read_table(base_dir / name, columns) for name in step['inputs']]
+    op = step['op']
+
+    if op == 'concat':
+        df = pd.concat(frames, ignore_index=True)
+    elif op == 'overlay':
+        # Rows of the later inputs replace every base row sharing their key
+        key = step.get('key', ['RELEVE_ID'])
+        df = frames[0]
+        for overlay in frames[1:]:
+            replaced = df.set_index(key).index.isin(overlay.set_index(key).index)
+            df = pd.concat([df[~replaced], overlay], ignore_index=True)
+        df = df.sort_values(key, key=lambda col: pd.to_numeric(col, errors='coerce'), kind='stable')
+    elif op == 'scale':
+        convert = SCALES[step['scale']]
+        df = frames[0].copy()
+        df['DOMIN'] = df['DOMIN'].map(lambda value: str(float(convert(float(value)))))
+    elif op == 'filter':
+        df = frames[0]
+    else:
+        raise ValueError(f"Unknown step operation '{op}'")
+
+    if 'include' in step:
+        df = df[selection_mask(df, step['include'])]
+    if 'exclude' in step:
+        df = df[~selection_mask(df, step['exclude'])]
+
+    output_path = base_dir / step['output']
+    data = df.to_csv(index=False, lineterminator='\n').encode('utf-8')
+    if output_path.exists() and output_path.read_bytes() == data:
+        return True
+    if protect and output_path.exists():
+        return False
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_bytes(data)
+    return True
+
+def build_waves(steps):
+    """Group steps into waves; every step only depends on outputs of earlier waves."""
+    producers = {step['output']: step for step in steps}
+    if len(producers) != len(steps):
+        raise ValueError("Two steps write the same output")
+
+    remaining = {step['output']: {name for name in step['inputs'] if name in producers} for step in steps}
+    waves = []
+    while remaining:
+        ready = sorted(output for output, deps in remaining.items() if not deps)
+        if not ready:
+            raise ValueError(f"Dependency cycle between: {', '.join(sorted(remaining))}")
+        waves.append([producers[output] for output in ready])
+        for output in ready:
+            del remaining[output]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return waves
+
+def matches_record(step, base_dir, state):
+    """Whether a step's output is missing or still exactly as its recorded build wrote it."""
+    output_path = base_dir / step['output']
+    record = state.get(step['output'])
+    if not output_path.exists():
+        return True
+    return record is not None and record['output'] == file_hash(output_path)
+
+def is_stale(step, base_dir, state):
+    """Return the reason a step must be rebuilt, or None if its output is current."""
+    output_path = base_dir / step['output']
+    record = state.get(step['output'])
+
+    if record is None:
+        return "never built"
+    if not output_path.exists():
+        return "output missing"
+    if record['step'] != step_fingerprint(step):
+        return "step definition changed"
+    if record['output'] != file_hash(output_path):
+        return "output edited by hand"
+    for name in step['inputs']:
+        if record['inputs'].get(name) != file_hash(base_dir / name):
+            return f"{name} changed"
+    return None
+
+def build(spec_file, jobs=None, force=False, dry_run=False):
+    """Rebuild every stale derived dataset described by `spec_file`."""
+    spec_path = Path(spec_file)
+    base_dir = spec_path.parent
+    with open(spec_path, 'r') as f:
+        spec = json.load(f)
+
+    state_path = base_dir / STATE_FILENAME
+    state = {}
+    if state_path.exists() and not force:
+        with open(state_path, 'r') as f:
+            state = json.load(f)
+
+    rebuilt, refused, conflicts = [], [], []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for wave in build_waves(spec['steps']):
+            stale = []
+            for step in wave:
+                upstream = [name for name in step['inputs'] if name in rebuilt]
+                blocked = [name for name in step['inputs'] if name in refused]
+                if blocked:
+                    print(f"Skipping {step['output']} ({blocked[0]} was not rebuilt)")
+                    refused.append(step['output'])
+                    continue
+                if force:
+                    reason = "forced"
+                elif dry_run and upstream:
+                    reason = f"{upstream[0]} will be rebuilt"
+                else:
+                    reason = is_stale(step, base_dir, state)
+                if reason:
+                    print(f"Building {step['output']} ({reason})")
+                    stale.append(step)
+
+            if dry_run:
+                rebuilt.extend(step['output'] for step in stale)
+                continue
+
+            # Without --force, an output that no longer matches its recorded build (or
+            # that exists without one) is only replaced when the rebuild reproduces it
+            futures = [pool.submit(apply_step, step, str(base_dir), spec['columns'],
+                                   not force and not matches_record(step, base_dir, state))
+                       for step in stale]
+            for step, future in zip(stale, futures):
+                if not future.result():
+                    print(f"Not overwriting {step['output']}: it differs from its recorded build")
+                    refused.append(step['output'])
+                    conflicts.append(step['output'])
+                    continue
+                state[step['output']] = {
+                    'step': step_fingerprint(step),
+                    'inputs': {name: file_hash(base_dir / name) for name in step['inputs']},
+                    'output': file_hash(base_dir / step['output'])
+                }
+                rebuilt.append(step['output'])
+
+            # Save after every wave so an interrupted build keeps its progress
+            with open(state_path, 'w') as f:
+                json.dump(state, f, indent=2, sort_keys=True)
+
+    if conflicts:
+        skipped = len(refused) - len(conflicts)
+        raise ValueError(f"{', '.join(conflicts)} edited since the last build"
+                         f"{f' ({skipped} dependent outputs skipped)' if skipped else ''}; "
+                         "rerun with --force to overwrite")
+    if not rebuilt:
+        print("All derived datasets are up to date")
+    return rebuilt
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild derived survey datasets whose inputs have changed')
+    parser.add_argument('spec_file', help='Path to the build spec (e.g. ../datasets/site-68-2025/build.json)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('-f', '--force', action='store_true', help='Rebuild every output, overwriting any edited by hand')
+    parser.add_argument('-n', '--dry-run', action='store_true', help='Only report what is stale')
+
+    args = parser.parse_args()
+
+    try:
+        build(args.spec_file, args.jobs, args.force, args.dry_run)
+    except (FileNotFoundError, KeyError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
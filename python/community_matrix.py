@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+def load_survey(file_path):
+    """Read a long-format relevé CSV, with species names stripped of stray whitespace."""
+    df = pd.read_csv(file_path, skipinitialspace=True)
+    if not all(field in df.columns for field in ['RELEVE_ID', 'SPECIES_NAME', 'DOMIN']):
+        raise ValueError("CSV file must contain RELEVE_ID, SPECIES_NAME, and DOMIN columns")
+    df['SPECIES_NAME'] = df['SPECIES_NAME'].astype(str).str.strip()
+    return df
+
+def releve_labels(df):
+    """
+    Label each row with its relevé.
+
+    ISGS relevé numbers repeat across sites, so when a SITE_ID column is
+    present a relevé is identified by 'SITE_ID/RELEVE_ID'.
+    """
+    if 'SITE_ID' in df.columns:
+        return df['SITE_ID'].astype(str) + '/' + df['RELEVE_ID'].astype(str)
+    return df['RELEVE_ID']
+
+def label_releve_ids(df, labels):
+    """
+    RELEVE_ID of each of the given `releve_labels` labels, e.g. to classify
+    the rows of a community matrix by management type.
+    """
+    ids = pd.Series(df['RELEVE_ID'].to_numpy(), index=releve_labels(df).astype(str).to_numpy())
+    ids = ids[~ids.index.duplicated()]
+    return ids.reindex(pd.Index(labels).astype(str)).to_numpy()
+
+def community_matrix(df, species=None):
+    """
+    Build the relevé x species cover matrix of a survey.
+
+    Returns (matrix, releves, species) where `releves` and `species` label
+    the rows and columns. Pass `species` to lay several surveys out on the
+    same columns; species outside it are dropped. Repeated species within
+    a relevé keep their highest cover.
+    """
+    releve_codes, releves = pd.factorize(releve_labels(df), sort=True)
+    if species is None:
+        species_codes, species = pd.factorize(df['SPECIES_NAME'], sort=True)
+    else:
+        species = pd.Index(species)
+        species_codes = species.get_indexer(df['SPECIES_NAME'])
+
+    keep = species_codes >= 0
+    matrix = np.zeros((len(releves), len(species)))
+    np.maximum.at(matrix, (releve_codes[keep], species_codes[keep]), df['DOMIN'].to_numpy(dtype=float)[keep])
+    return matrix, np.asarray(releves), np.asarray(species)
+
+def incidence_bits(matrix):
+    """
+    Pack the presence/absence pattern of each relevé into 64-bit words.
+
+    Row i, bit j is set when species j occurs in relevé i.
+    """
+    packed = np.packbits(np.asarray(matrix) > 0, axis=1)
+    padding = (-packed.shape[1]) % 8
+    if padding:
+        packed = np.pad(packed, ((0, 0), (0, padding)))
+    return np.ascontiguousarray(packed).view(np.uint64)
@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import ssl
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+DEFAULT_MIRROR = Path(os.environ.get('DATASET_MIRROR', Path.home() / '.cache' / 'dataset-mirror'))
+DEFAULT_MAX_AGE = 24 * 3600  # seconds a mirrored file is used without asking the server
+INDEX_FILENAME = 'index.json'
+MAX_REDIRECTS = 5
+MAX_HEADER_BYTES = 65536
+
+class Mirror:
+    """
+    Local content-addressed copy of remote files.
+
+    File bodies live under objects/ named by their SHA-256, so identical
+    files are stored once; index.json maps each URL to its object, the
+    validators (ETag, Last-Modified) the server sent with it and when it
+    was last confirmed fresh.
+    """
+
+    def __init__(self, root=DEFAULT_MIRROR):
+        self.root = Path(root)
+        self.objects = self.root / 'objects'
+        index_path = self.root / INDEX_FILENAME
+        self.index = json.loads(index_path.read_text(encoding='utf-8')) if index_path.exists() else {}
+
+    def lookup(self, url):
+        """Index entry of a URL, or None when it is not mirrored (or its object has gone)."""
+        entry = self.index.get(url)
+        if entry and self.path(entry['sha256']).exists():
+            return entry
+        return None
+
+    def path(self, sha256):
+        return self.objects / sha256[:2] / sha256
+
+    def store(self, url, data, headers):
+        """Record a freshly downloaded body with the validators from its response headers."""
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.path(sha256)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = path.with_suffix('.tmp')
+            temporary.write_bytes(data)
+            os.replace(temporary, path)
+        self.index[url] = {
+            'sha256': sha256,
+            'size': len(data),
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'checked': time.time()
+        }
+        return self.index[url]
+
+    def save(self):
+        """Write the index atomically, so an interrupted run never leaves it half written."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        temporary = self.root / (INDEX_FILENAME + '.tmp')
+        temporary.write_text(json.dumps(self.index, indent=2), encoding='utf-8')
+        os.replace(temporary, self.root / INDEX_FILENAME)
+
+class ConnectionPool:
+    """Idle keep-alive connections per (scheme, host, port), reused across requests."""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.idle = {}
+        self.context = ssl.create_default_context()
+
+    async def acquire(self, key):
+        """An idle connection to `key`, or a new one; the flag says whether it was reused."""
+        while self.idle.get(key):
+            reader, writer = self.idle[key].pop()
+            if not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        scheme, host, port = key
+        connect = asyncio.open_connection(host, port, ssl=self.context if scheme == 'https' else None,
+                                          limit=MAX_HEADER_BYTES)
+        reader, writer = await asyncio.wait_for(connect, self.timeout)
+        return reader, writer, False
+
+    def release(self, key, reader, writer, keep_alive):
+        if keep_alive:
+            self.idle.setdefault(key, []).append((reader, writer))
+        else:
+            writer.close()
+
+    def close(self):
+        for connections in self.idle.values():
+            for _, writer in connections:
+                writer.close()
+        self.idle.clear()
+
+async def read_body(reader, headers, status):
+    """Response body, framed by chunked encoding, Content-Length or the end of the connection."""
+    if status in (204, 304) or 100 <= status < 200:
+        return b'', True
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            if size == 0:
+                # Skip any trailer fields up to the closing blank line
+                while await reader.readuntil(b'\r\n') != b'\r\n':
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        return b''.join(chunks), True
+    if 'content-length' in headers:
+        return await reader.readexactly(int(headers['content-length'])), True
+    return await reader.read(), False
+
+async def request(pool, url, headers):
+    """
+    GET `url` on a pooled connection; returns (status, headers, body).
+
+    A reused connection the server has meanwhile closed is retried once on
+    a fresh one.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https'):
+        raise ValueError(f"Unsupported URL scheme in {url}")
+    key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+    target = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+    lines = [f"GET {target} HTTP/1.1", f"Host: {parts.netloc}", "Accept-Encoding: gzip",
+             "User-Agent: dataset-fetcher"] + [f"{name}: {value}" for name, value in headers.items()]
+    message = ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+
+    for attempt in range(2):
+        reader, writer, reused = await pool.acquire(key)
+        try:
+            writer.write(message)
+            await writer.drain()
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), pool.timeout)
+            status_line, *header_lines = head.decode('latin-1').split('\r\n')
+            status = int(status_line.split(' ')[1])
+            response_headers = {}
+            for line in header_lines:
+                name, _, value = line.partition(':')
+                if name:
+                    response_headers[name.strip().lower()] = value.strip()
+            body, framed = await asyncio.wait_for(read_body(reader, response_headers, status), pool.timeout)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+            if reused and attempt == 0:
+                continue
+            raise
+        except BaseException:
+            writer.close()
+            raise
+        keep_alive = framed and response_headers.get('connection', '').lower() != 'close'
+        pool.release(key, reader, writer, keep_alive)
+        if response_headers.get('content-encoding', '').lower() == 'gzip':
+            body = gzip.decompress(body)
+        return status, response_headers, body
+
+async def fetch_one(pool, mirror, url, max_age, offline):
+    """
+    Bring one URL's mirror entry up to date; returns (entry, how).
+
+    `how` is 'cached' when the entry is younger than `max_age` (no network),
+    'not-modified' when the server confirmed it with a 304, 'downloaded'
+    when a new body was stored, and 'offline' when the server could not be
+    reached and the mirrored copy was used instead.
+    """
+    entry = mirror.lookup(url)
+    if entry and (offline or time.time() - entry['checked'] < max_age):
+        return entry, 'cached'
+    if offline:
+        raise FileNotFoundError(f"{url} is not in the mirror at {mirror.root}")
+
+    conditional = {}
+    if entry and entry.get('etag'):
+        conditional['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified'):
+        conditional['If-Modified-Since'] = entry['last_modified']
+
+    location = url
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            status, headers, body = await request(pool, location, conditional)
+            if status in (301, 302, 303, 307, 308) and 'location' in headers:
+                location = urljoin(location, headers['location'])
+                continue
+            break
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+        if entry:
+            return entry, 'offline'
+        raise ConnectionError(f"Could not fetch {url}: {e or type(e).__name__}") from e
+
+    if status == 304 and entry:
+        entry['checked'] = time.time()
+        return entry, 'not-modified'
+    if status == 200:
+        return mirror.store(url, body, headers), 'downloaded'
+    if status >= 500 and entry:
+        return entry, 'offline'
+    raise ValueError(f"{url} returned HTTP {status}")
+
+async def fetch_many(urls, mirror, max_age=DEFAULT_MAX_AGE, offline=False, concurrency=8, timeout=30.0):
+    """
+    Update the mirror entries of many URLs concurrently over reused connections.
+
+    Returns {url: (entry, how) or the exception raised for it}.
+    """
+    pool = ConnectionPool(timeout)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def bounded(url):
+        async with limit:
+            return await fetch_one(pool, mirror, url, max_age, offline)
+
+    try:
+        results = await asyncio.gather(*(bounded(url) for url in urls), return_exceptions=True)
+    finally:
+        pool.close()
+    return dict(zip(urls, results))
+
+def fetch(urls, mirror_dir=DEFAULT_MIRROR, max_age=DEFAULT_MAX_AGE, offline=False, concurrency=8,
+          timeout=30.0, return_exceptions=False):
+    """
+    Contents of each URL, as {url: bytes}, served through the local mirror.
+
+    Files checked within `max_age` seconds are read from the mirror without
+    touching the network; older ones are revalidated with If-None-Match /
+    If-Modified-Since, and the mirror is used as is when the server cannot
+    be reached. With `return_exceptions`, a URL that cannot be fetched maps
+    to its exception instead of raising.
+    """
+    urls = list(dict.fromkeys(urls))
+    mirror = Mirror(mirror_dir)
+    results = asyncio.run(fetch_many(urls, mirror, max_age, offline, concurrency, timeout))
+    if any(not isinstance(r, BaseException) and r[1] in ('downloaded', 'not-modified') for r in results.values()):
+        mirror.save()
+
+    contents = {}
+    for url, result in results.items():
+        if isinstance(result, BaseException):
+            if not return_exceptions:
+                raise result
+            contents[url] = result
+        else:
+            contents[url] = mirror.path(result[0]['sha256']).read_bytes()
+    return contents
+
+def fetch_text(url, encoding='utf-8', **options):
+    """Contents of one URL as text, served through the local mirror (see `fetch`)."""
+    return fetch([url], **options)[url].decode(encoding)
+
+def main():
+    parser = argparse.ArgumentParser(description='Fetch remote dataset files into a local content-addressed mirror')
+    parser.add_argument('urls', nargs='+', help='URLs to fetch')
+    parser.add_argument('-m', '--mirror', default=str(DEFAULT_MIRROR), help='Mirror directory')
+    parser.add_argument('--max-age', type=float, default=DEFAULT_MAX_AGE,
+                        help='Seconds a mirrored file is used before revalidating it (0 always revalidates)')
+    parser.add_argument('--offline', action='store_true', help='Only use the mirror')
+    parser.add_argument('-j', '--concurrency', type=int, default=8, help='Simultaneous requests')
+    parser.add_argument('-t', '--timeout', type=float, default=30.0, help='Network timeout in seconds')
+    parser.add_argument('-o', '--output-dir', help='Also copy each file here under its URL file name')
+
+    args = parser.parse_args()
+
+    try:
+        mirror = Mirror(args.mirror)
+        started = time.perf_counter()
+        results = asyncio.run(fetch_many(args.urls, mirror, args.max_age, args.offline, args.concurrency,
+                                         args.timeout))
+        mirror.save()
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    failed = 0
+    for url, result in results.items():
+        if isinstance(result, BaseException):
+            failed += 1
+            print(f"{'failed':<13} {url}: {result}", file=sys.stderr)
+            continue
+        entry, how = result
+        print(f"{how:<13} {entry['size']:>10} B  {entry['sha256'][:12]}  {url}")
+        if args.output_dir:
+            target = Path(args.output_dir) / (Path(urlsplit(url).path).name or entry['sha256'])
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(mirror.path(entry['sha256']).read_bytes())
+    print(f"\n{len(results) - failed} of {len(results)} files in {time.perf_counter() - started:.2f}s")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
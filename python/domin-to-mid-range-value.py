@@ -1,5 +1,6 @@
 import pandas as pd
 import argparse
+from domin_scales import to_mid_range
 
 def convert_dominance_values(input_file, output_file):
     """
@@ -9,22 +10,8 @@ def convert_dominance_values(input_file, output_file):
         input_file (str): Path to the input CSV file
         output_file (str): Path to save the converted CSV file
     """
-    dominance_mapping = {
-        0.1: 0.1,
-        1: 0.3,
-        2: 0.5,
-        3: 3,
-        4: 8,
-        5: 18,
-        6: 30,
-        7: 42,
-        8: 63,
-        9: 83,
-        10: 96
-    }
-
     df = pd.read_csv(input_file)
-    df['DOMIN'] = df['DOMIN'].apply(lambda x: dominance_mapping.get(x, x))
+    df['DOMIN'] = df['DOMIN'].apply(to_mid_range)
     df.to_csv(output_file, index=False)
     print(f"File converted and saved to {output_file}")
 
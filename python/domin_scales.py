@@ -0,0 +1,72 @@
+from functools import lru_cache
+import numpy as np
+
+DOMIN_TO_MID_RANGE = {
+    0.1: 0.1,
+    1: 0.3,
+    2: 0.5,
+    3: 3,
+    4: 8,
+    5: 18,
+    6: 30,
+    7: 42,
+    8: 63,
+    9: 83,
+    10: 96
+}
+
+def to_mid_range(domin_score):
+    """Return the mid-range percentage cover for a DOMIN score, or the score unchanged if it is not a DOMIN value."""
+    return DOMIN_TO_MID_RANGE.get(domin_score, domin_score)
+
+# Values each cover scale may take; 0.1 stands for '+' on the DOMIN and Braun-Blanquet scales
+SCALE_VALUES = {
+    'domin': frozenset(DOMIN_TO_MID_RANGE.keys()),
+    'mid-range': frozenset(DOMIN_TO_MID_RANGE.values()),
+    'braun-blanquet': frozenset([0.1, 0.5, 1, 2, 3, 4, 5])
+}
+
+# Lower bounds (% cover) of each Braun-Blanquet class, as used to translate the 2022 survey
+BRAUN_BLANQUET_BINS = [0.1, 0.5, 1, 5, 25, 50, 75]
+BRAUN_BLANQUET_CLASSES = [0, 0.1, 0.5, 1, 2, 3, 4, 5]
+
+def cover_to_braun_blanquet(cover):
+    """Vectorised binning of percentage cover into Braun-Blanquet classes (0 below 0.1%)."""
+    indices = np.searchsorted(BRAUN_BLANQUET_BINS, np.asarray(cover, dtype=float), side='right')
+    return np.asarray(BRAUN_BLANQUET_CLASSES)[indices]
+
+@lru_cache(maxsize=None)
+def scale_lookup(from_scale, to_scale):
+    """
+    Return (keys, values) arrays mapping every value of `from_scale` onto `to_scale`.
+
+    Tables are derived from DOMIN_TO_MID_RANGE once and cached.
+    """
+    domin = np.array(sorted(DOMIN_TO_MID_RANGE), dtype=float)
+    mid_range = np.array([DOMIN_TO_MID_RANGE[d] for d in sorted(DOMIN_TO_MID_RANGE)], dtype=float)
+    columns = {
+        'domin': domin,
+        'mid-range': mid_range,
+        'braun-blanquet': cover_to_braun_blanquet(mid_range).astype(float)
+    }
+    if from_scale not in columns or to_scale not in columns:
+        raise ValueError(f"No conversion from '{from_scale}' to '{to_scale}'")
+    if from_scale == 'braun-blanquet' and to_scale != from_scale:
+        raise ValueError("Braun-Blanquet classes cannot be converted back to a finer scale")
+
+    keys, first = np.unique(columns[from_scale], return_index=True)
+    return keys, columns[to_scale][first]
+
+def convert_scale(values, to_scale, from_scale='domin'):
+    """
+    Convert an array of cover values between scales with a cached lookup table.
+
+    Values that are not on `from_scale` are returned unchanged, as in `to_mid_range`.
+    """
+    values = np.asarray(values, dtype=float)
+    if to_scale == from_scale:
+        return values
+    keys, mapped = scale_lookup(from_scale, to_scale)
+    indices = np.clip(np.searchsorted(keys, values), 0, len(keys) - 1)
+    found = np.isclose(keys[indices], values)
+    return np.where(found, mapped[indices], values)
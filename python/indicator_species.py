@@ -0,0 +1,184 @@
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from community_matrix import load_survey, community_matrix, label_releve_ids
+from management import MANAGEMENT_TYPES, classify_releves
+
+def group_means(onehot, stacked, sizes):
+    """
+    Per-group means of the columns of `stacked` for a batch of labellings.
+
+    `onehot` is (labellings x groups x relevés); all labellings are reduced
+    with a single (labellings * groups) x relevés @ relevés x columns product.
+    """
+    batch, k, n = onehot.shape
+    return (onehot.reshape(batch * k, n) @ stacked).reshape(batch, k, -1) / sizes[:, None]
+
+def indval_components(means, species_count):
+    """
+    Specificity (A), fidelity (B) and IndVal = A * B from stacked group means.
+
+    The first `species_count` columns of `means` hold mean abundance per
+    group, the rest the share of the group's relevés holding the species.
+    """
+    abundance, fidelity = means[..., :species_count], means[..., species_count:]
+    total = abundance.sum(axis=-2, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        specificity = np.where(total > 0, abundance / total, 0.0)
+    return specificity, fidelity, specificity * fidelity
+
+def permutation_batch(stacked, codes, k, observed, permutations, seed):
+    """
+    How often a shuffle of the group labels gives each species a maximum
+    IndVal at least as high as observed.
+
+    Runs in a worker process; `seed` makes the batch reproducible.
+    """
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permuted(np.tile(codes, (permutations, 1)), axis=1)
+    onehot = (shuffled[:, None, :] == np.arange(k)[None, :, None]).astype(stacked.dtype)
+    sizes = np.bincount(codes, minlength=k).astype(stacked.dtype)
+    _, _, indval = indval_components(group_means(onehot, stacked, sizes), len(observed))
+    return (indval.max(axis=1) >= observed - 1e-12).sum(axis=0)
+
+def indicator_species(matrix, labels, species, permutations=9999, workers=None, seed=0, batch_size=500):
+    """
+    Indicator value (Dufrêne & Legendre IndVal.g) of every species for every group.
+
+    Specificity is a species' mean cover in a group over the sum of its mean
+    covers across groups; fidelity is the share of the group's relevés it
+    occurs in. Each species is assigned to the group where A * B peaks, and
+    its p-value is the share of label permutations giving a peak at least
+    as high. Permutations run in batches with child seeds of `seed`, spread
+    over a process pool, so results do not depend on the number of workers.
+
+    Returns a table with one row per species, ranked by group and IndVal.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    # Categorical labels keep their category order in the table; others are sorted
+    labels = pd.Categorical(labels).remove_unused_categories()
+    groups, codes = np.asarray(labels.categories), labels.codes.astype(np.int64)
+    k = len(groups)
+    if k < 2:
+        raise ValueError("Indicator species analysis needs at least two groups")
+
+    stacked = np.hstack([matrix, (matrix > 0).astype(float)])
+    sizes = np.bincount(codes, minlength=k).astype(float)
+    onehot = (codes[None, None, :] == np.arange(k)[None, :, None]).astype(float)
+    specificity, fidelity, indval = (x[0] for x in indval_components(group_means(onehot, stacked, sizes),
+                                                                      len(species)))
+    best = indval.argmax(axis=0)
+    observed = indval.max(axis=0)
+
+    exceed = np.zeros(len(species), dtype=np.int64)
+    if permutations:
+        batches = [min(batch_size, permutations - start) for start in range(0, permutations, batch_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(batches))
+        if workers == 1 or len(batches) == 1:
+            counts = [permutation_batch(stacked, codes, k, observed, size, child)
+                      for size, child in zip(batches, seeds)]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                counts = list(pool.map(permutation_batch, [stacked] * len(batches), [codes] * len(batches),
+                                       [k] * len(batches), [observed] * len(batches), batches, seeds))
+        exceed = np.sum(counts, axis=0)
+
+    columns = np.arange(len(species))
+    table = pd.DataFrame({
+        'SPECIES_NAME': np.asarray(species),
+        'GROUP': groups[best],
+        'SPECIFICITY': specificity[best, columns].round(4),
+        'FIDELITY': fidelity[best, columns].round(4),
+        'INDVAL': observed.round(4),
+        'P_VALUE': ((exceed + 1) / (permutations + 1)).round(5) if permutations else np.nan,
+        'FREQUENCY': (matrix > 0).sum(axis=0)
+    })
+    table['GROUP'] = pd.Categorical(table['GROUP'], categories=groups, ordered=True)
+    table = table.sort_values(['GROUP', 'INDVAL', 'SPECIES_NAME'], ascending=[True, False, True], kind='stable')
+    table['GROUP'] = table['GROUP'].astype(str)
+    return table.reset_index(drop=True)
+
+def management_groups(df):
+    """Relevé x species matrix of a Site 68 survey with the management type of each relevé."""
+    matrix, releves, species = community_matrix(df)
+    labels = classify_releves(label_releve_ids(df, releves).astype(int))
+    return matrix, pd.Categorical(labels, categories=MANAGEMENT_TYPES), species
+
+def treatment_groups(specs):
+    """
+    Relevé x species matrix pooled from per-treatment CSVs, given as (label, csv_path) pairs.
+
+    A relevé listed in more than one file belongs to the first, so an
+    overlapping catch-all file (such as ORG_MGMT_MOWING_ONLY.csv) can be
+    given last to hold the remaining relevés.
+    """
+    frames = []
+    for label, path in specs:
+        df = load_survey(path)
+        frames.append(df.assign(GROUP=label))
+    pooled = pd.concat(frames, ignore_index=True)
+    first = pooled.drop_duplicates('RELEVE_ID')[['RELEVE_ID', 'GROUP']]
+    pooled = pooled.merge(first, on='RELEVE_ID', suffixes=('_FILE', ''))
+    pooled = pooled[pooled['GROUP_FILE'] == pooled['GROUP']]
+    matrix, releves, species = community_matrix(pooled)
+    labels = first.set_index('RELEVE_ID')['GROUP'].reindex(releves)
+    return matrix, pd.Categorical(labels, categories=[label for label, _ in specs]), species
+
+def indicators_by_group(table, alpha=0.05, top=10):
+    """The `top` significant indicators of each group, as {group: [row dicts]}."""
+    significant = table[table['P_VALUE'] <= alpha] if table['P_VALUE'].notna().all() else table
+    return {group: rows.head(top).to_dict('records') for group, rows in significant.groupby('GROUP', sort=False)}
+
+def format_indicator_table(table, alpha=0.05, top=10):
+    """Format the leading indicator species of each group as readable text."""
+    lines = []
+    for group, rows in indicators_by_group(table, alpha, top).items():
+        lines.append(f"\n=== {group} ===")
+        header = f"{'Species':<40} {'A':>6} {'B':>6} {'IndVal':>7} {'p':>8}"
+        lines += [header, "-" * len(header)]
+        for r in rows:
+            lines.append(f"{r['SPECIES_NAME']:<40} {r['SPECIFICITY']:>6.3f} {r['FIDELITY']:>6.3f} "
+                         f"{r['INDVAL']:>7.3f} {r['P_VALUE']:>8.4f}")
+    return "\n".join(lines) if lines else f"No indicator species at p <= {alpha}"
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Indicator species (IndVal) of management types or treatment groups',
+        epilog='Example: -t Grazing GRAZING_FERTILISER.csv -t Mowing FERTILISER_MOWING.csv '
+               '-t "Infrequent mowing" INFREQUENT_MOWING.csv -t Organic ORG_MGMT_MOWING_ONLY.csv'
+    )
+    parser.add_argument('input_file', nargs='?', help='Site 68 relevé CSV, grouped by management type')
+    parser.add_argument('-t', '--treatment', nargs=2, action='append', metavar=('LABEL', 'CSV'), default=[],
+                        help='Treatment group and its relevé CSV, instead of management types')
+    parser.add_argument('-p', '--permutations', type=int, default=9999, help='Label permutations')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('-a', '--alpha', type=float, default=0.05, help='Significance level for the tables')
+    parser.add_argument('-n', '--top', type=int, default=10, help='Indicators to list per group')
+    parser.add_argument('-o', '--output', help='Write the full indicator table to this CSV')
+
+    args = parser.parse_args()
+
+    if bool(args.input_file) == bool(args.treatment):
+        parser.error("give either an input file or at least two --treatment groups")
+
+    try:
+        if args.treatment:
+            matrix, labels, species = treatment_groups(args.treatment)
+        else:
+            matrix, labels, species = management_groups(load_survey(args.input_file))
+        table = indicator_species(matrix, labels, species, args.permutations, args.workers, args.seed)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(format_indicator_table(table, args.alpha, args.top))
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"\nIndicator values for {len(table)} species saved to {Path(args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,18 @@
-import csv
 import sys
 from collections import defaultdict
+import numpy as np
+from releve_records import records_from_frame
+from releve_validation import UNUSABLE_CHECKS, load_releves, load_vocabulary, format_report
+from species_ranking import top_species
 
 def analyze_species_data(file_path):
     """Analyze species data and return comprehensive statistics."""
-    species_scores = defaultdict(float)
-    unique_species = set()
-    species_per_site = defaultdict(set)
-    
     try:
-        with open(file_path, mode='r') as csvfile:
-            reader = csv.DictReader(csvfile)
-            if not all(field in reader.fieldnames for field in ['SITE_ID', 'SPECIES_NAME', 'DOMIN']):
-                raise ValueError("CSV file must contain SITE_ID, SPECIES_NAME, and DOMIN columns")
-                
-            for row in reader:
-                site_id = row['SITE_ID']
-                species_name = row['SPECIES_NAME']
-                try:
-                    domin_score = float(row['DOMIN'])
-                except ValueError:
-                    continue  # skip rows with invalid DOMIN values
-                
-                # Update overall statistics
-                species_scores[species_name] += domin_score
-                unique_species.add(species_name)
-                
-                # Update per-SITE_ID statistics
-                species_per_site[site_id].add(species_name)
-                
+        df, report = load_releves(file_path, scale=None, vocabulary=load_vocabulary(), grid_range=None,
+                                  drop_invalid=UNUSABLE_CHECKS)
+        if report['errors']:
+            print(format_report(report), file=sys.stderr)
+        records = records_from_frame(df, releves=False, sites=True)
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         sys.exit(1)
@@ -36,17 +20,26 @@ def analyze_species_data(file_path):
         print(f"Error: {e}")
         sys.exit(1)
     
-    if not species_scores:
+    if not len(records):
         print("Error: No valid data found in the file.")
         sys.exit(1)
     
+    species = records.species
+    species_scores = defaultdict(float, zip(species, records.species_totals().tolist()))
+    unique_species = set(species)
+    
+    # Species recorded at each SITE_ID, from the distinct (site, species) code pairs
+    species_per_site = defaultdict(set)
+    pairs = np.unique(records.site_codes.astype(np.int64) * len(species) + records.species_codes)
+    for site_code, species_code in zip(*np.divmod(pairs, len(species))):
+        species_per_site[records.sites[site_code]].add(species[species_code])
+    
     max_species = max(species_scores.items(), key=lambda x: x[1])
     return species_scores, max_species, unique_species, species_per_site
 
 def get_top_species(species_scores, n=50):
     """Return the top n species by their combined DOMIN scores."""
-    sorted_species = sorted(species_scores.items(), key=lambda x: x[1], reverse=True)
-    return sorted_species[:n]
+    return top_species(species_scores, n)
 
 def format_species_table(top_species):
     """Format the top species list as a readable table."""
@@ -0,0 +1,505 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from community_matrix import load_survey, releve_labels
+
+FORMAT_VERSION = 2
+PROJECT_CHUNK = 2048     # relevés compared with the landmarks per block
+FULL_NMDS_LIMIT = 500    # largest survey the diagnostics also ordinate in full
+
+class CoverRows:
+    """
+    Sparse relevé x species cover in compressed rows (indptr, indices, data).
+
+    DOMIN scores are summed per relevé and species, as in R-code/nmds.R.
+    `totals` holds each relevé's total cover over every species recorded,
+    including species outside the column vocabulary, so Bray-Curtis
+    dissimilarities stay exact when a survey is laid onto an older
+    ordination's species list.
+    """
+
+    __slots__ = ('releves', 'species', 'indptr', 'indices', 'data', 'totals')
+
+    def __init__(self, releves, species, indptr, indices, data, totals):
+        self.releves, self.species = releves, species
+        self.indptr, self.indices, self.data = indptr, indices, data
+        self.totals = totals
+
+    @classmethod
+    def from_frame(cls, df, species=None):
+        """Cover of a long-format survey, on `species` columns (its own species by default)."""
+        releve_codes, releves = pd.factorize(releve_labels(df), sort=True)
+        values = df['DOMIN'].to_numpy(dtype=float)
+        if species is None:
+            species_codes, species = pd.factorize(df['SPECIES_NAME'], sort=True)
+        else:
+            species_codes = pd.Index(species).get_indexer(df['SPECIES_NAME'])
+        totals = np.bincount(releve_codes, weights=values, minlength=len(releves))
+
+        keep = species_codes >= 0
+        keys, inverse = np.unique(releve_codes[keep].astype(np.int64) * len(species) + species_codes[keep],
+                                  return_inverse=True)
+        data = np.bincount(inverse, weights=values[keep], minlength=len(keys))
+        indptr = np.searchsorted(keys // len(species), np.arange(len(releves) + 1))
+        return cls(np.asarray(releves).astype(str), np.asarray(species), indptr, keys % len(species), data, totals)
+
+    def take(self, rows):
+        """The given relevés as a CoverRows of their own."""
+        rows = np.asarray(rows)
+        starts, ends = self.indptr[rows], self.indptr[rows + 1]
+        picked = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)] or [np.empty(0, dtype=np.int64)])
+        indptr = np.concatenate([[0], np.cumsum(ends - starts)])
+        return CoverRows(self.releves[rows], self.species, indptr, self.indices[picked], self.data[picked],
+                         self.totals[rows])
+
+    def __len__(self):
+        return len(self.releves)
+
+    def dense(self, rows):
+        """Dense cover of the given relevés, on the species columns."""
+        rows = np.asarray(rows)
+        matrix = np.zeros((len(rows), len(self.species)))
+        for i, row in enumerate(rows):
+            start, end = self.indptr[row], self.indptr[row + 1]
+            matrix[i, self.indices[start:end]] = self.data[start:end]
+        return matrix
+
+def bray_curtis_to(cover, rows, reference, reference_totals):
+    """
+    Bray-Curtis dissimilarity of relevés `rows` (a slice of `cover`) to each
+    row of the dense `reference` cover matrix.
+
+    Only the species each relevé holds are visited: the shared cover
+    sum_j min(x_j, y_j) gathers the reference columns of the relevé's
+    non-zero entries and sums them per relevé.
+    """
+    start, end = cover.indptr[rows.start], cover.indptr[rows.stop]
+    counts = np.diff(cover.indptr[rows.start:rows.stop + 1])
+    shared = np.zeros((len(counts), len(reference)))
+    if end > start:
+        contributions = np.minimum(cover.data[start:end, None], reference[:, cover.indices[start:end]].T)
+        filled = counts > 0
+        shared[filled] = np.add.reduceat(contributions, (cover.indptr[rows.start:rows.stop] - start)[filled], axis=0)
+    denominator = cover.totals[rows][:, None] + reference_totals[None, :]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        distance = np.where(denominator > 0, 1 - 2 * shared / denominator, 0.0)
+    return np.clip(distance, 0.0, 1.0)
+
+def dissimilarities(cover, reference, reference_totals):
+    """Bray-Curtis dissimilarity of every relevé of `cover` to the reference rows, in blocks."""
+    return np.vstack([bray_curtis_to(cover, slice(start, min(start + PROJECT_CHUNK, len(cover))),
+                                     reference, reference_totals)
+                      for start in range(0, len(cover), PROJECT_CHUNK)] or [np.empty((0, len(reference)))])
+
+def select_landmarks(cover, count, method='maxmin', seed=0):
+    """
+    Row indices of `count` landmark relevés.
+
+    'maxmin' starts from a random relevé and repeatedly adds the relevé
+    furthest from every landmark chosen so far, spreading the landmarks
+    over the whole gradient; 'random' draws them uniformly.
+    """
+    rng = np.random.default_rng(seed)
+    count = min(count, len(cover))
+    if method == 'random':
+        return np.sort(rng.choice(len(cover), size=count, replace=False))
+    if method != 'maxmin':
+        raise ValueError(f"Unknown landmark selection '{method}'")
+
+    chosen = [int(rng.integers(len(cover)))]
+    nearest = np.full(len(cover), np.inf)
+    for _ in range(count - 1):
+        landmark = chosen[-1]
+        nearest = np.minimum(nearest, dissimilarities(cover, cover.dense([landmark]), cover.totals[[landmark]])[:, 0])
+        nearest[chosen] = -1
+        chosen.append(int(nearest.argmax()))
+    return np.sort(chosen)
+
+def pairwise_distances(points):
+    difference = points[:, None, :] - points[None, :, :]
+    return np.sqrt((difference ** 2).sum(axis=-1))
+
+def pcoa(distance, k):
+    """Classical scaling (PCoA) of a dissimilarity matrix; returns (coordinates, eigenvalues)."""
+    squared = np.asarray(distance) ** 2
+    centred = -0.5 * (squared - squared.mean(axis=0) - squared.mean(axis=1)[:, None] + squared.mean())
+    values, vectors = np.linalg.eigh(centred)
+    order = np.argsort(values)[::-1]
+    values, vectors = values[order], vectors[:, order]
+    positive = np.maximum(values[:k], 0)
+    return vectors[:, :k] * np.sqrt(positive), values
+
+def isotonic(values, passes=32):
+    """
+    Least-squares non-decreasing fit to `values` by pooling adjacent violators.
+
+    Every run of decreasing block means is pooled at once for a few
+    vectorised passes, which settles nearly all of a monotone regression;
+    the few blocks left are finished one by one.
+    """
+    sums, counts = np.asarray(values, dtype=float), np.ones(len(values))
+    for _ in range(passes):
+        means = sums / counts
+        starts = np.r_[True, means[:-1] <= means[1:]]
+        if starts.all():
+            return np.repeat(means, counts.astype(np.int64))
+        group = np.cumsum(starts) - 1
+        sums, counts = np.bincount(group, weights=sums), np.bincount(group, weights=counts)
+
+    pooled_sums, pooled_counts = [], []
+    for total, count in zip(sums.tolist(), counts.tolist()):
+        while pooled_sums and pooled_sums[-1] * count > total * pooled_counts[-1]:
+            total += pooled_sums.pop()
+            count += pooled_counts.pop()
+        pooled_sums.append(total)
+        pooled_counts.append(count)
+    return np.repeat(np.array(pooled_sums) / np.array(pooled_counts), np.array(pooled_counts, dtype=np.int64))
+
+def disparities(dissimilarity, distance):
+    """
+    Monotone regression of configuration distances on dissimilarities.
+
+    Ties in dissimilarity may take different disparities (Kruskal's
+    primary approach). Returns disparities in the input order.
+    """
+    order = np.lexsort((distance, dissimilarity))
+    fitted = np.empty_like(distance)
+    fitted[order] = isotonic(distance[order])
+    return fitted
+
+def stress1(dissimilarity, distance):
+    """Kruskal's stress-1 of configuration distances against dissimilarities (condensed vectors)."""
+    fitted = disparities(dissimilarity, distance)
+    scale = (distance ** 2).sum()
+    return float(np.sqrt(((distance - fitted) ** 2).sum() / scale)) if scale > 0 else 0.0
+
+def nmds(distance, k, init, iterations=300, tolerance=1e-6):
+    """
+    Non-metric MDS by SMACOF: alternate monotone regression with Guttman transforms.
+
+    Starts from `init` (PCoA coordinates); returns (coordinates, stress-1).
+    """
+    n = len(distance)
+    upper = np.triu_indices(n, k=1)
+    dissimilarity = np.asarray(distance)[upper]
+    points = init - init.mean(axis=0)
+    previous = np.inf
+    for _ in range(iterations):
+        config = pairwise_distances(points)
+        condensed = config[upper]
+        fitted = disparities(dissimilarity, condensed)
+        fitted *= np.sqrt(len(fitted) / max((fitted ** 2).sum(), 1e-12))
+        stress = np.sqrt(((condensed - fitted) ** 2).sum() / max((condensed ** 2).sum(), 1e-12))
+        if previous - stress < tolerance:
+            break
+        previous = stress
+
+        target = np.zeros((n, n))
+        target[upper] = fitted
+        target += target.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            b = np.where(config > 0, -target / config, 0.0)
+        b[np.diag_indices(n)] = -b.sum(axis=1)
+        points = b @ points / n
+    config = pairwise_distances(points)[upper]
+    return points, stress1(dissimilarity, config)
+
+def placement_curve(dissimilarity, fitted):
+    """
+    Piecewise-linear monotone map from dissimilarity to configuration distance.
+
+    Interpolating the NMDS disparities directly would send whole ranges of
+    dissimilarity to one distance: they are a step function, and tied
+    dissimilarities (Bray-Curtis 1 above all) carry many different values.
+    Disparities are averaged over tied dissimilarities, each constant run
+    is replaced by its centre, and the curve is anchored at (0, 0) so a
+    relevé identical to a landmark is placed on it. Returns (x, y).
+    """
+    values, inverse, counts = np.unique(dissimilarity, return_inverse=True, return_counts=True)
+    means = np.bincount(inverse, weights=fitted) / counts
+    starts = np.r_[True, means[1:] > means[:-1]]
+    run = np.cumsum(starts) - 1
+    centres = np.bincount(run, weights=values * counts) / np.bincount(run, weights=counts)
+    return np.r_[0.0, centres], np.r_[0.0, means[starts]]
+
+def procrustes_correlation(a, b):
+    """Procrustes correlation of two configurations of the same points (vegan's protest statistic)."""
+    a = a - a.mean(axis=0)
+    b = b - b.mean(axis=0)
+    a /= np.sqrt((a ** 2).sum())
+    b /= np.sqrt((b ** 2).sum())
+    width = max(a.shape[1], b.shape[1])
+    a, b = np.pad(a, ((0, 0), (0, width - a.shape[1]))), np.pad(b, ((0, 0), (0, width - b.shape[1])))
+    return float(np.linalg.svd(a.T @ b, compute_uv=False).sum())
+
+class LandmarkOrdination:
+    """
+    NMDS or PCoA fitted on a subset of landmark relevés, into which any
+    other relevé is placed from its dissimilarities to the landmarks alone.
+
+    Fitting costs O(L²) in the number of landmarks L and placing relevés
+    O(n L), instead of the O(n²) of a full ordination. New relevés are
+    placed by distance triangulation (Landmark MDS): their squared
+    distances to the landmarks, centred, are solved against the centred
+    landmark coordinates by least squares. For NMDS the dissimilarities are
+    first mapped through the fitted monotone regression, and each placement
+    is refined by single-point SMACOF until it settles.
+    """
+
+    def __init__(self, method, species, landmark_ids, landmark_cover, landmark_totals, coordinates,
+                 curve_x=None, curve_y=None, stress=0.0):
+        self.method = method
+        self.species = np.asarray(species)
+        self.landmark_ids = np.asarray(landmark_ids)
+        self.landmark_cover = landmark_cover
+        self.landmark_totals = landmark_totals
+        self.coordinates = coordinates
+        self.curve_x, self.curve_y = curve_x, curve_y
+        self.stress = float(stress)
+        centred = coordinates - coordinates.mean(axis=0)
+        self._norms = (coordinates ** 2).sum(axis=1)
+        self._solver = np.linalg.pinv(centred).T
+        self._radius = float(np.sqrt((centred ** 2).sum(axis=1).mean()))
+
+    @property
+    def axes(self):
+        prefix = 'MDS' if self.method == 'nmds' else 'PCo'
+        return [f'{prefix}{i + 1}' for i in range(self.coordinates.shape[1])]
+
+    @classmethod
+    def fit(cls, df, landmarks=200, k=3, method='nmds', selection='maxmin', seed=0):
+        """Choose landmarks from a survey and ordinate them."""
+        if method not in ('nmds', 'pcoa'):
+            raise ValueError(f"Unknown ordination method '{method}'")
+        cover = CoverRows.from_frame(df)
+        if len(cover) < k + 2:
+            raise ValueError(f"Ordination in {k} dimensions needs at least {k + 2} relevés")
+        rows = select_landmarks(cover, max(landmarks, k + 2), selection, seed)
+        landmark_cover = cover.dense(rows)
+        landmark_totals = cover.totals[rows]
+        distance = dissimilarities(cover.take(rows), landmark_cover, landmark_totals)
+        distance = (distance + distance.T) / 2
+
+        coordinates, _ = pcoa(distance, k)
+        if method == 'pcoa':
+            upper = np.triu_indices(len(rows), k=1)
+            stress = stress1(distance[upper], pairwise_distances(coordinates)[upper])
+            return cls(method, cover.species, cover.releves[rows], landmark_cover, landmark_totals, coordinates,
+                       stress=stress)
+
+        coordinates, stress = nmds(distance, k, coordinates)
+        # Monotone map from dissimilarity to configuration distance, used to place new relevés
+        upper = np.triu_indices(len(rows), k=1)
+        dissimilarity = distance[upper]
+        fitted = disparities(dissimilarity, pairwise_distances(coordinates)[upper])
+        curve_x, curve_y = placement_curve(dissimilarity, fitted)
+        return cls(method, cover.species, cover.releves[rows], landmark_cover, landmark_totals, coordinates,
+                   curve_x, curve_y, stress)
+
+    def target_distances(self, dissimilarity):
+        """Configuration distances the placement of a relevé should match."""
+        if self.method == 'pcoa':
+            return dissimilarity
+        return np.interp(dissimilarity, self.curve_x, self.curve_y)
+
+    def place(self, dissimilarity, iterations=300, tolerance=1e-5):
+        """
+        Coordinates of relevés from their (relevés x landmarks) dissimilarities.
+
+        For NMDS the triangulated positions are refined by weighted Guttman
+        updates against the fixed landmarks, each relevé until it moves less
+        than `tolerance` times the RMS radius of the landmark configuration.
+        Landmarks are weighted by the inverse of their target distance
+        (floored at a thousandth of the radius), so the landmarks a relevé
+        resembles decide where it lands and a copy of a landmark lands on it.
+        """
+        target = self.target_distances(dissimilarity)
+        squared = target ** 2
+        points = -0.5 * (squared - squared.mean(axis=1, keepdims=True)
+                         - (self._norms - self._norms.mean())) @ self._solver
+        if self.method != 'nmds':
+            return points
+
+        weights = 1 / np.maximum(target, 1e-3 * self._radius)
+        weights /= weights.sum(axis=1, keepdims=True)
+        active = np.arange(len(points))
+        for _ in range(iterations):
+            if not len(active):
+                break
+            offset = points[active, None, :] - self.coordinates[None, :, :]
+            length = np.sqrt((offset ** 2).sum(axis=-1, keepdims=True))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                pull = np.where(length > 0, target[active, :, None] * offset / length, 0.0)
+            moved = ((self.coordinates[None, :, :] + pull) * weights[active, :, None]).sum(axis=1)
+            step = np.sqrt(((moved - points[active]) ** 2).sum(axis=1))
+            points[active] = moved
+            active = active[step >= tolerance * self._radius]
+        return points
+
+    def project(self, df):
+        """
+        Place every relevé of a survey into the ordination, without refitting.
+
+        Returns (coordinates table, placement stress): the table has one row
+        per relevé (RELEVE plus one column per axis), and the stress is
+        stress-1 of the relevés' distances to the landmarks against their
+        dissimilarities.
+        """
+        cover = CoverRows.from_frame(df, self.species)
+        dissimilarity = dissimilarities(cover, self.landmark_cover, self.landmark_totals)
+        points = np.vstack([self.place(dissimilarity[start:start + PROJECT_CHUNK])
+                            for start in range(0, len(cover), PROJECT_CHUNK)] or [np.empty((0, len(self.axes)))])
+        reached = np.sqrt(((points[:, None, :] - self.coordinates[None, :, :]) ** 2).sum(axis=-1))
+
+        table = pd.DataFrame(points, columns=self.axes)
+        table.insert(0, 'RELEVE', cover.releves)
+        return table, stress1(dissimilarity.ravel(), reached.ravel()) if len(cover) else 0.0
+
+    def save(self, path):
+        """Persist the ordination as a compressed .npz; landmark cover is stored sparse."""
+        rows, cols = np.nonzero(self.landmark_cover)
+        np.savez_compressed(
+            path, version=FORMAT_VERSION, method=self.method, species=self.species.astype(str),
+            landmark_ids=self.landmark_ids, cover_rows=rows.astype(np.int32),
+            cover_cols=cols.astype(np.int32), cover_values=self.landmark_cover[rows, cols],
+            landmark_totals=self.landmark_totals, coordinates=self.coordinates,
+            curve_x=self.curve_x if self.curve_x is not None else np.empty(0),
+            curve_y=self.curve_y if self.curve_y is not None else np.empty(0), stress=self.stress
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data['version']) != FORMAT_VERSION:
+                raise ValueError(f"{path} uses ordination version {int(data['version'])}, expected {FORMAT_VERSION}")
+            cover = np.zeros((len(data['landmark_ids']), len(data['species'])))
+            cover[data['cover_rows'], data['cover_cols']] = data['cover_values']
+            method = str(data['method'])
+            curve = (data['curve_x'], data['curve_y']) if method == 'nmds' else (None, None)
+            return cls(method, data['species'], data['landmark_ids'], cover, data['landmark_totals'],
+                       data['coordinates'], *curve, float(data['stress']))
+
+def ordination_diagnostics(df, landmarks=200, k=3, method='nmds', selection='maxmin', seed=0,
+                           full_limit=FULL_NMDS_LIMIT):
+    """
+    Fit a landmark ordination of a survey and judge how well it represents it.
+
+    Reports the stress of the landmark fit and of the other relevés placed
+    from their distances to the landmarks. For surveys of at most
+    `full_limit` relevés the survey is also ordinated in full with the same
+    method, giving the full stress, the stress of the landmark
+    configuration against every pairwise dissimilarity, and the Procrustes
+    correlation between the two configurations. Returns (model,
+    coordinates table, diagnostics).
+    """
+    started = time.perf_counter()
+    model = LandmarkOrdination.fit(df, landmarks, k, method, selection, seed)
+    # Landmarks keep their fitted coordinates; only the other relevés are placed
+    placed = ~releve_labels(df).astype(str).isin(model.landmark_ids).to_numpy()
+    table, placement_stress = model.project(df[placed])
+    fitted = pd.DataFrame(model.coordinates, columns=model.axes)
+    fitted.insert(0, 'RELEVE', model.landmark_ids)
+    table = pd.concat([fitted.assign(LANDMARK=True), table.assign(LANDMARK=False)], ignore_index=True)
+    releves = pd.factorize(releve_labels(df), sort=True)[1].astype(str)
+    table = table.iloc[pd.Index(table['RELEVE']).get_indexer(releves)].reset_index(drop=True)
+    diagnostics = {
+        'method': method,
+        'releves': int(len(table)),
+        'landmarks': int(len(model.landmark_ids)),
+        'dimensions': int(k),
+        'landmark_stress': round(model.stress, 4),
+        'placement_stress': round(placement_stress, 4),
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+
+    if len(table) <= full_limit:
+        cover = CoverRows.from_frame(df)
+        full = cover.dense(np.arange(len(cover)))
+        distance = dissimilarities(cover, full, cover.totals)
+        distance = (distance + distance.T) / 2
+        upper = np.triu_indices(len(cover), k=1)
+        started = time.perf_counter()
+        init, _ = pcoa(distance, k)
+        if method == 'nmds':
+            full_points, full_stress = nmds(distance, k, init)
+        else:
+            full_points, full_stress = init, stress1(distance[upper], pairwise_distances(init)[upper])
+        landmark_points = table[model.axes].to_numpy()
+        diagnostics.update({
+            'full_stress': round(full_stress, 4),
+            'landmark_stress_all_pairs': round(stress1(distance[upper], pairwise_distances(landmark_points)[upper]), 4),
+            'procrustes_r': round(procrustes_correlation(full_points, landmark_points), 4),
+            'full_seconds': round(time.perf_counter() - started, 2)
+        })
+    return model, table, diagnostics
+
+def format_diagnostics(diagnostics):
+    """Format ordination diagnostics as readable text."""
+    d = diagnostics
+    lines = [f"{d['method'].upper()} in {d['dimensions']} dimensions on {d['landmarks']} landmarks "
+             f"of {d['releves']} relevés ({d['seconds']:.2f}s)",
+             f"Landmark stress:   {d['landmark_stress']:.4f}",
+             f"Placement stress:  {d['placement_stress']:.4f}"]
+    if 'full_stress' in d:
+        lines += [f"Full {d['method'].upper()} stress: {d['full_stress']:.4f} ({d['full_seconds']:.2f}s)",
+                  f"Landmark configuration, stress on all pairs: {d['landmark_stress_all_pairs']:.4f}",
+                  f"Procrustes correlation with full ordination: {d['procrustes_r']:.4f}"]
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description='Landmark NMDS/PCoA ordination with out-of-sample placement')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    fit_parser = subparsers.add_parser('fit', help='Fit an ordination on landmark relevés of a survey')
+    fit_parser.add_argument('input_file', help='Relevé CSV file')
+    fit_parser.add_argument('-o', '--output', required=True, help='Ordination file to write (.npz)')
+    fit_parser.add_argument('-l', '--landmarks', type=int, default=200, help='Number of landmark relevés')
+    fit_parser.add_argument('-k', '--dimensions', type=int, default=3, help='Ordination axes')
+    fit_parser.add_argument('-m', '--method', choices=['nmds', 'pcoa'], default='nmds')
+    fit_parser.add_argument('--selection', choices=['maxmin', 'random'], default='maxmin',
+                            help='How landmarks are chosen')
+    fit_parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    fit_parser.add_argument('-c', '--coordinates', help='Write the coordinates of every relevé to this CSV')
+
+    project_parser = subparsers.add_parser('project', help='Place the relevés of a survey into a fitted ordination')
+    project_parser.add_argument('ordination', help='Ordination file (.npz)')
+    project_parser.add_argument('input_file', help='Relevé CSV file, on the same cover scale as the fit')
+    project_parser.add_argument('-o', '--output', help='Write the coordinates to this CSV')
+    project_parser.add_argument('--append', action='store_true',
+                                help='Add to --output rather than overwrite it, replacing relevés already there')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'fit':
+            model, table, diagnostics = ordination_diagnostics(
+                load_survey(args.input_file), args.landmarks, args.dimensions, args.method, args.selection, args.seed)
+            model.save(args.output)
+            print(format_diagnostics(diagnostics))
+            print(f"\nOrdination saved to {args.output}")
+            if args.coordinates:
+                table.to_csv(args.coordinates, index=False)
+                print(f"Coordinates of {len(table)} relevés saved to {args.coordinates}")
+
+        elif args.command == 'project':
+            model = LandmarkOrdination.load(args.ordination)
+            table, stress = model.project(load_survey(args.input_file))
+            print(f"Placed {len(table)} relevés on {len(model.landmark_ids)} landmarks, placement stress {stress:.4f}")
+            if args.output:
+                if args.append and Path(args.output).exists():
+                    earlier = pd.read_csv(args.output, dtype={'RELEVE': str})
+                    table = pd.concat([earlier[~earlier['RELEVE'].isin(table['RELEVE'].astype(str))], table],
+                                      ignore_index=True)
+                table.to_csv(args.output, index=False)
+                print(f"Coordinates saved to {args.output}")
+            else:
+                print(table.to_string(index=False))
+    except (FileNotFoundError, ValueError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import numpy as np
+
+MANAGEMENT_TYPES = ['Grazing+Fertiliser', 'Mowing+Fertiliser', 'Organic']
+
+def classify_releve(releve_id):
+    """Return the management type of a Site 68 relevé from its RELEVE_ID."""
+    if 1 <= releve_id <= 10:
+        return 'Grazing+Fertiliser'
+    elif 28 <= releve_id <= 38:
+        return 'Mowing+Fertiliser'
+    else:
+        return 'Organic'
+
+def classify_releves(releve_ids):
+    """Vectorised `classify_releve` over an array of RELEVE_IDs."""
+    releve_ids = np.asarray(releve_ids)
+    return np.select(
+        [(releve_ids >= 1) & (releve_ids <= 10), (releve_ids >= 28) & (releve_ids <= 38)],
+        MANAGEMENT_TYPES[:2],
+        default=MANAGEMENT_TYPES[2]
+    )
@@ -0,0 +1,155 @@
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from community_matrix import load_survey
+from management import MANAGEMENT_TYPES, classify_releves
+
+def summed_matrix(df):
+    """
+    Relevé x species matrix of summed DOMIN scores, as totalled by `analyze_species_data`.
+
+    Returns (matrix, releve_ids, species).
+    """
+    releve_codes, releve_ids = pd.factorize(df['RELEVE_ID'], sort=True)
+    species_codes, species = pd.factorize(df['SPECIES_NAME'], sort=True)
+    matrix = np.zeros((len(releve_ids), len(species)))
+    np.add.at(matrix, (releve_codes, species_codes), df['DOMIN'].to_numpy(dtype=float))
+    return matrix, np.asarray(releve_ids), np.asarray(species)
+
+def bootstrap_batch(matrix, replicates, seed):
+    """
+    Statistics of `replicates` resamples of the relevés (rows) of `matrix`, drawn with replacement.
+
+    Each resample is a row of draw counts, so all replicates are evaluated
+    with one (replicates x relevés) @ (relevés x species) product. Runs in a
+    worker process; `seed` makes the batch reproducible.
+    """
+    rng = np.random.default_rng(seed)
+    releve_count = len(matrix)
+    draws = rng.integers(0, releve_count, size=(replicates, releve_count))
+    offsets = np.arange(replicates)[:, None] * releve_count
+    weights = np.bincount((draws + offsets).ravel(), minlength=replicates * releve_count) \
+        .reshape(replicates, releve_count).astype(float)
+
+    species_sums = weights @ matrix
+    releve_richness = (matrix > 0).sum(axis=1)
+    return {
+        'total_score': species_sums.sum(axis=1),
+        'richness': (species_sums > 0).sum(axis=1),
+        'mean_richness': weights @ releve_richness / releve_count,
+        'species_sums': species_sums,
+        # argmax takes the lowest code on ties, i.e. the first name alphabetically
+        'top_species': species_sums.argmax(axis=1)
+    }
+
+def interval(values, point, alpha):
+    """Point value with its percentile bootstrap interval."""
+    lower, upper = np.percentile(values, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+    return {'value': round(float(point), 3), 'lower': round(float(lower), 3), 'upper': round(float(upper), 3)}
+
+def bootstrap_group(matrix, species, replicates=1000, workers=None, seed=0, alpha=0.05, top=10, batch_size=250):
+    """
+    Bootstrap confidence intervals for one management group.
+
+    Relevés are resampled with replacement; replicates are split into
+    batches with child seeds of `seed`, spread over a process pool, so the
+    result does not depend on the number of workers. Covers total DOMIN
+    score, species richness, mean relevé richness, the share of the `top`
+    leading species and how often the observed top species stays on top.
+    """
+    batches = [min(batch_size, replicates - start) for start in range(0, replicates, batch_size)]
+    seeds = seed.spawn(len(batches)) if isinstance(seed, np.random.SeedSequence) \
+        else np.random.SeedSequence(seed).spawn(len(batches))
+
+    if workers == 1 or len(batches) == 1:
+        results = [bootstrap_batch(matrix, size, child) for size, child in zip(batches, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(bootstrap_batch, [matrix] * len(batches), batches, seeds))
+    boot = {key: np.concatenate([r[key] for r in results]) for key in results[0]}
+
+    sums = matrix.sum(axis=0)
+    total = sums.sum()
+    observed_top = int(sums.argmax())
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shares = boot['species_sums'] / boot['total_score'][:, None]
+    leading = np.lexsort((np.arange(len(sums)), -sums))[:top]
+
+    top_counts = np.bincount(boot['top_species'], minlength=len(species))
+    contenders = [(species[code], round(float(top_counts[code] / replicates), 3))
+                  for code in np.argsort(-top_counts, kind='stable')[:3] if top_counts[code]]
+
+    return {
+        'releves': int(len(matrix)),
+        'replicates': int(replicates),
+        'total_score': interval(boot['total_score'], total, alpha),
+        'richness': interval(boot['richness'], (sums > 0).sum(), alpha),
+        'mean_richness': interval(boot['mean_richness'], (matrix > 0).sum(axis=1).mean(), alpha),
+        'top_species': species[observed_top],
+        'top_species_stability': round(float(top_counts[observed_top] / replicates), 3),
+        'top_species_contenders': contenders,
+        'species_shares': [dict(species=species[code], **interval(shares[:, code], sums[code] / total, alpha))
+                           for code in leading]
+    }
+
+def bootstrap_management(df, replicates=1000, workers=None, seed=0, alpha=0.05, top=10):
+    """Bootstrap intervals for each management type, in MANAGEMENT_TYPES order."""
+    matrix, releve_ids, species = summed_matrix(df)
+    labels = classify_releves(releve_ids)
+    groups = [mgmt for mgmt in MANAGEMENT_TYPES if (labels == mgmt).any()]
+    seeds = np.random.SeedSequence(seed).spawn(len(groups))
+
+    results = {}
+    for mgmt, group_seed in zip(groups, seeds):
+        rows = matrix[labels == mgmt]
+        present = rows.any(axis=0)
+        results[mgmt] = bootstrap_group(rows[:, present], species[present], replicates, workers,
+                                        group_seed, alpha, top)
+    return results
+
+def format_bootstrap_table(results, alpha=0.05):
+    """Format the bootstrap intervals of each management type as readable text."""
+    level = round(100 * (1 - alpha))
+    lines = []
+    for mgmt, r in results.items():
+        lines.append(f"\n=== {mgmt} ({r['releves']} relevés, {r['replicates']} resamples, {level}% intervals) ===")
+        for key, label in [('total_score', 'Total DOMIN score'), ('richness', 'Species richness'),
+                           ('mean_richness', 'Mean relevé richness')]:
+            s = r[key]
+            lines.append(f"{label:<22} {s['value']:>9.1f}  [{s['lower']:.1f}, {s['upper']:.1f}]")
+        lines.append(f"Top species: {r['top_species']} (top in {r['top_species_stability']:.0%} of resamples)")
+        lines.append(f"{'Species':<40} {'Share':>7}  Interval")
+        for s in r['species_shares']:
+            lines.append(f"{s['species']:<40} {s['value']:>7.3f}  [{s['lower']:.3f}, {s['upper']:.3f}]")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description='Bootstrap confidence intervals for management-level statistics')
+    parser.add_argument('input_file', help='Site 68 relevé CSV file')
+    parser.add_argument('-r', '--replicates', type=int, default=1000, help='Bootstrap resamples per group')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('-a', '--alpha', type=float, default=0.05, help='1 - confidence level')
+    parser.add_argument('-n', '--top', type=int, default=10, help='Leading species to report shares for')
+    parser.add_argument('-o', '--output', help='Write the intervals to this JSON file')
+
+    args = parser.parse_args()
+
+    try:
+        results = bootstrap_management(load_survey(args.input_file), args.replicates, args.workers,
+                                       args.seed, args.alpha, args.top)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(format_bootstrap_table(results, args.alpha))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nIntervals saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from spatial_index import load_coordinates, project_coordinates
+
+CHUNK_POINTS = 4096  # points tested against a zone's edges at once, to bound the (points x edges) arrays
+MAX_ZONE_SPAN = 32   # grid cells along either side of the largest zone's bounding box
+
+class Zone:
+    """A named (multi)polygon, with its rings projected to local metres."""
+
+    def __init__(self, name, rings, properties=None):
+        self.name = str(name)
+        self.rings = rings
+        self.properties = properties or {}
+        # Every ring's edges as (start, end) vertex arrays; holes and extra parts
+        # are handled by the even-odd rule of the crossing test
+        self.starts = np.concatenate([ring[:-1] for ring in rings])
+        self.ends = np.concatenate([ring[1:] for ring in rings])
+        vertices = np.concatenate(rings)
+        self.bounds = np.concatenate([vertices.min(axis=0), vertices.max(axis=0)])
+
+    def contains(self, points):
+        """Boolean mask of the points (n x 2, metres) lying inside the zone."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        inside = np.zeros(len(points), dtype=bool)
+        (x0, y0), (x1, y1) = self.starts.T, self.ends.T
+        dy = y1 - y0
+        for start in range(0, len(points), CHUNK_POINTS):
+            px, py = points[start:start + CHUNK_POINTS, :1], points[start:start + CHUNK_POINTS, 1:]
+            spans = (y0 > py) != (y1 > py)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                crossing_x = x0 + (py - y0) * (x1 - x0) / dy
+            inside[start:start + CHUNK_POINTS] = (spans & (px < crossing_x)).sum(axis=1) % 2 == 1
+        return inside
+
+def polygon_rings(geometry):
+    """Closed rings of a GeoJSON Polygon or MultiPolygon, as (lon, lat) arrays."""
+    if geometry is None or geometry.get('type') not in ('Polygon', 'MultiPolygon'):
+        kind = geometry.get('type') if geometry else None
+        raise ValueError(f"Zone geometries must be Polygon or MultiPolygon, not {kind}")
+    polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+    rings = []
+    for polygon in polygons:
+        for ring in polygon:
+            ring = np.asarray(ring, dtype=float)[:, :2]
+            if len(ring) < 3:
+                raise ValueError("Polygon rings need at least three positions")
+            if not np.array_equal(ring[0], ring[-1]):
+                ring = np.vstack([ring, ring[:1]])
+            rings.append(ring)
+    return rings
+
+def load_zones(path, name_property='name'):
+    """
+    Read the zones of a GeoJSON FeatureCollection.
+
+    Each feature's `name_property` names its zone; features sharing a name
+    are merged into one zone. Returns (zones in file order, (lat, lon)
+    origin of the local projection).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        collection = json.load(f)
+    features = collection.get('features', []) if collection.get('type') == 'FeatureCollection' else [collection]
+
+    named = {}
+    for feature in features:
+        properties = feature.get('properties') or {}
+        if name_property not in properties:
+            raise ValueError(f"{path}: a feature has no '{name_property}' property")
+        rings = polygon_rings(feature.get('geometry'))
+        entry = named.setdefault(str(properties[name_property]), {'rings': [], 'properties': properties})
+        entry['rings'] += rings
+    if not named:
+        raise ValueError(f"{path} contains no zones")
+
+    vertices = np.concatenate([ring for entry in named.values() for ring in entry['rings']])
+    origin = (vertices[:, 1].mean(), vertices[:, 0].mean())
+    zones = [Zone(name, [project_coordinates(ring[:, 1], ring[:, 0], origin) for ring in entry['rings']],
+                  entry['properties'])
+             for name, entry in named.items()]
+    return zones, origin
+
+class ZoneIndex:
+    """
+    Uniform grid over zone bounding boxes for batched point-in-polygon lookups.
+
+    Each zone is registered in the grid cells its bounding box covers, kept
+    as (cell, zone) pairs sorted by cell. A batch of points is binned into
+    cells once and each point looks up its candidate zones; each zone then
+    runs the crossing test only on its candidate points.
+    """
+
+    def __init__(self, zones, cell_size=None):
+        self.zones = list(zones)
+        bounds = np.array([zone.bounds for zone in self.zones])
+        self.extent = np.concatenate([bounds[:, :2].min(axis=0), bounds[:, 2:].max(axis=0)])
+        if cell_size is None:
+            # About as fine as a typical zone, but coarse enough that no zone's
+            # box spans more than MAX_ZONE_SPAN cells a side, so one tiny or
+            # one huge polygon cannot blow up the grid
+            spans = (bounds[:, 2:] - bounds[:, :2]).max(axis=1)
+            cell_size = max(float(np.median(spans)), float(spans.max()) / (MAX_ZONE_SPAN - 1), 1.0)
+        self.cell_size = float(cell_size)
+        if self.cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.shape = np.floor((self.extent[2:] - self.extent[:2]) / self.cell_size).astype(np.int64) + 1
+
+        cells, codes = [], []
+        for code, (low, high) in enumerate(zip(self._cells(bounds[:, :2]), self._cells(bounds[:, 2:]))):
+            xs, ys = np.meshgrid(np.arange(low[0], high[0] + 1), np.arange(low[1], high[1] + 1), indexing='ij')
+            cells.append((xs * self.shape[1] + ys).ravel())
+            codes.append(np.full(xs.size, code, dtype=np.int64))
+        cells, codes = np.concatenate(cells), np.concatenate(codes)
+        order = np.lexsort((codes, cells))
+        self.cell_keys, self.cell_zones = cells[order], codes[order]
+
+    def _cells(self, points):
+        return np.floor((np.asarray(points) - self.extent[:2]) / self.cell_size).astype(np.int64)
+
+    def assign(self, points):
+        """
+        Index into `zones` of the zone holding each point (n x 2, metres), or -1.
+
+        Where zones overlap, the first zone in file order wins.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        cells = self._cells(points)
+        within = np.flatnonzero(np.all((cells >= 0) & (cells < self.shape), axis=1))
+        keys = cells[within, 0] * self.shape[1] + cells[within, 1]
+
+        # Every (point, zone) pair whose cell the zone's box covers
+        lo = np.searchsorted(self.cell_keys, keys, side='left')
+        counts = np.searchsorted(self.cell_keys, keys, side='right') - lo
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        pair_points = np.repeat(within, counts)
+        pair_zones = self.cell_zones[np.repeat(lo, counts) + offsets]
+        order = np.argsort(pair_zones, kind='stable')
+        pair_points, pair_zones = pair_points[order], pair_zones[order]
+        groups = np.searchsorted(pair_zones, np.arange(len(self.zones) + 1))
+
+        assigned = np.full(len(points), -1, dtype=np.int64)
+        for code, zone in enumerate(self.zones):
+            candidates = pair_points[groups[code]:groups[code + 1]]
+            candidates = candidates[assigned[candidates] < 0]
+            if len(candidates):
+                assigned[candidates[zone.contains(points[candidates])]] = code
+        return assigned
+
+def assign_zones(coords, layers):
+    """
+    Label each coordinate row with its zone in every layer.
+
+    `layers` maps a column name to (zones, origin) as returned by
+    `load_zones`. Returns a copy of `coords` with one column per layer,
+    empty where a relevé falls outside every zone of that layer.
+    """
+    labelled = coords.copy()
+    for column, (zones, origin) in layers.items():
+        points = project_coordinates(coords['Latitude'], coords['Longitude'], origin)
+        codes = ZoneIndex(zones).assign(points)
+        names = np.array([zone.name for zone in zones] + [''], dtype=object)
+        labelled[column] = names[codes]
+    return labelled
+
+def zone_filename(name):
+    """File name of a zone's dataset, in the style of GRAZING_FERTILISER.csv."""
+    return re.sub(r'[^A-Z0-9]+', '_', name.upper()).strip('_') + '.csv'
+
+def split_by_zone(dataset_file, labelled, column, output_dir):
+    """
+    Write one dataset per zone of `column`, keeping each relevé's rows of `dataset_file`.
+
+    Relevés with more than one coordinate row take the zone of the first.
+    Returns {zone: (output path, relevé count)}.
+    """
+    df = pd.read_csv(dataset_file)
+    zones = labelled.drop_duplicates('Releve').set_index('Releve')[column]
+    zones = zones[zones != '']
+    row_zones = df['RELEVE_ID'].map(zones)
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written = {}
+    for zone, rows in df.groupby(row_zones, sort=False):
+        path = output_dir / zone_filename(zone)
+        rows.to_csv(path, index=False)
+        written[zone] = (path, rows['RELEVE_ID'].nunique())
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Assign relevés to field and treatment zones from GeoJSON boundaries',
+        epilog='Example: coordinates/*.csv -z TREATMENT treatments.geojson -z FIELD fields.geojson '
+               '--dataset COMBINED_MID_RANGE.csv --split TREATMENT -d treatments/'
+    )
+    parser.add_argument('coords', nargs='+', help='Relevé coordinate CSV files')
+    parser.add_argument('-z', '--zones', nargs=2, action='append', required=True, metavar=('COLUMN', 'GEOJSON'),
+                        help='Zone layer: output column and GeoJSON file of its polygons')
+    parser.add_argument('-p', '--name-property', default='name', help='Feature property holding the zone name')
+    parser.add_argument('-o', '--output', help='Write the labelled coordinates to this CSV')
+    parser.add_argument('--dataset', help='Survey CSV to split into one dataset per zone')
+    parser.add_argument('--split', metavar='COLUMN', help='Zone layer to split --dataset by (default: the first)')
+    parser.add_argument('-d', '--output-dir', default='.', help='Directory for the per-zone datasets')
+
+    args = parser.parse_args()
+
+    try:
+        layers = {column: load_zones(path, args.name_property) for column, path in args.zones}
+        labelled = assign_zones(load_coordinates(args.coords), layers)
+        split_column = args.split or args.zones[0][0]
+        if split_column not in layers:
+            parser.error(f"--split must name one of the zone layers: {', '.join(layers)}")
+        written = split_by_zone(args.dataset, labelled, split_column, args.output_dir) if args.dataset else {}
+    except (FileNotFoundError, ValueError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for column in layers:
+        counts = labelled[column].replace('', '(outside)').value_counts(sort=False)
+        print(f"\n=== {column} ===")
+        for zone, count in counts.items():
+            print(f"{zone:<30} {count:>6} relevés")
+    if args.output:
+        labelled.to_csv(args.output, index=False)
+        print(f"\nLabelled coordinates saved to {args.output}")
+    for zone, (path, releves) in written.items():
+        print(f"{zone}: {releves} relevés written to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import argparse
+import json
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import numpy as np
+from synthetic_surveys import SurveyGenerator, load_groups
+
+TASK_SIZE = 25  # replicates per worker task; each finished task is checkpointed
+
+def chi2_sf(x, df):
+    """Upper tail of the chi-squared distribution for integer degrees of freedom."""
+    if x <= 0:
+        return 1.0
+    half = x / 2
+    if df % 2 == 0:
+        terms, total = 1.0, 1.0
+        for i in range(1, df // 2):
+            terms *= half / i
+            total += terms
+        return math.exp(-half) * total
+    total = math.erfc(math.sqrt(half))
+    terms = math.sqrt(half) / math.gamma(1.5)
+    for i in range(1, (df + 1) // 2):
+        total += math.exp(-half) * terms
+        terms *= half / (i + 0.5)
+    return min(total, 1.0)
+
+def kruskal_wallis(values, labels):
+    """Kruskal-Wallis H test with the tie correction used by R's kruskal.test; returns (H, p)."""
+    values = np.asarray(values, dtype=float)
+    order = np.argsort(values, kind='stable')
+    sorted_values = values[order]
+    # Average ranks for ties
+    _, first, counts = np.unique(sorted_values, return_index=True, return_counts=True)
+    average = first + (counts + 1) / 2
+    ranks = np.empty(len(values))
+    ranks[order] = np.repeat(average, counts)
+
+    n = len(values)
+    groups, codes = np.unique(labels, return_inverse=True)
+    sizes = np.bincount(codes)
+    rank_sums = np.bincount(codes, weights=ranks)
+    h = 12 / (n * (n + 1)) * (rank_sums ** 2 / sizes).sum() - 3 * (n + 1)
+    ties = 1 - (counts ** 3 - counts).sum() / (n ** 3 - n)
+    if ties <= 0:
+        return 0.0, 1.0
+    h /= ties
+    return float(h), chi2_sf(h, len(groups) - 1)
+
+def bray_curtis_matrix(matrix):
+    """Pairwise Bray-Curtis dissimilarity between the rows of a relevé x species matrix."""
+    matrix = np.asarray(matrix, dtype=float)
+    totals = matrix.sum(axis=1)
+    common = np.minimum(matrix[:, None, :], matrix[None, :, :]).sum(axis=2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        distance = 1 - 2 * common / (totals[:, None] + totals[None, :])
+    return np.nan_to_num(distance)
+
+def permanova(distance, labels, permutations, rng):
+    """
+    One-way PERMANOVA (adonis) pseudo-F and permutation p-value.
+
+    All label permutations are scored at once: with one-hot group matrices
+    G (permutations x relevés x groups), the within-group sum of squares is
+    sum_k (G_k' D² G_k) / (2 n_k).
+    """
+    squared = np.asarray(distance) ** 2
+    n = len(squared)
+    groups, codes = np.unique(labels, return_inverse=True)
+    k = len(groups)
+    sizes = np.bincount(codes, minlength=k)
+    total = squared.sum() / (2 * n)
+
+    shuffled = np.vstack([codes, rng.permuted(np.tile(codes, (permutations, 1)), axis=1)])
+    onehot = np.eye(k)[shuffled]
+    within = (np.einsum('pik,ij,pjk->pk', onehot, squared, onehot) / (2 * sizes)).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        f = ((total - within) / (k - 1)) / (within / (n - k))
+    p = ((f[1:] >= f[0] - 1e-12).sum() + 1) / (permutations + 1)
+    return float(f[0]), float(p)
+
+def k_medoids(distance, k, rng, restarts=5, iterations=50):
+    """Partition around medoids on a precomputed distance matrix; best of several random starts."""
+    n = len(distance)
+    best_cost, best_labels = np.inf, None
+    for _ in range(restarts):
+        medoids = rng.choice(n, size=k, replace=False)
+        for _ in range(iterations):
+            labels = distance[:, medoids].argmin(axis=1)
+            # New medoid: the member with the smallest summed distance to its cluster
+            costs = np.where(labels[None, :] == labels[:, None], distance, 0).sum(axis=1)
+            updated = np.array([np.flatnonzero(labels == c)[costs[labels == c].argmin()] if (labels == c).any()
+                                else medoids[c] for c in range(k)])
+            if np.array_equal(updated, medoids):
+                break
+            medoids = updated
+        cost = distance[np.arange(n), medoids[labels]].sum()
+        if cost < best_cost:
+            best_cost, best_labels = cost, labels
+    return best_labels
+
+def adjusted_rand_index(a, b):
+    """Agreement between two partitions, 0 for chance and 1 for identical."""
+    _, a = np.unique(a, return_inverse=True)
+    _, b = np.unique(b, return_inverse=True)
+    table = np.zeros((a.max() + 1, b.max() + 1))
+    np.add.at(table, (a, b), 1)
+    pairs = lambda x: (x * (x - 1) / 2).sum()
+    index, rows, cols = pairs(table), pairs(table.sum(axis=1)), pairs(table.sum(axis=0))
+    expected = rows * cols / pairs(np.array([len(a)]))
+    maximum = (rows + cols) / 2
+    return float((index - expected) / (maximum - expected)) if maximum != expected else 1.0
+
+def replicate_seed(seed, effect_index, replicate):
+    """Seed of one replicate, independent of how replicates are spread over workers."""
+    return np.random.SeedSequence(seed, spawn_key=(effect_index, replicate))
+
+def run_replicates(groups, effect_index, effect, replicates, seed, permutations):
+    """
+    Generate and test the given replicates at one effect size.
+
+    Each replicate runs a Kruskal-Wallis test on relevé richness, a
+    PERMANOVA on Bray-Curtis dissimilarity, and a k-medoids clustering of
+    the same dissimilarities scored by its adjusted Rand index against the
+    true groups.
+    """
+    generator = SurveyGenerator(groups)
+    results = []
+    for replicate in replicates:
+        rng = np.random.default_rng(replicate_seed(seed, effect_index, replicate))
+        matrix, labels = generator.generate(effect, rng)
+        distance = bray_curtis_matrix(matrix)
+        _, kw_p = kruskal_wallis((matrix > 0).sum(axis=1), labels)
+        f, permanova_p = permanova(distance, labels, permutations, rng)
+        clusters = k_medoids(distance, len(generator.groups), rng)
+        results.append({
+            'effect': effect,
+            'replicate': replicate,
+            'kruskal_p': round(kw_p, 6),
+            'permanova_f': round(f, 4),
+            'permanova_p': round(permanova_p, 6),
+            'cluster_ari': round(adjusted_rand_index(clusters, labels), 4)
+        })
+    return results
+
+def read_checkpoint(path, settings):
+    """
+    Replicates already recorded in a JSONL checkpoint written with the same settings.
+
+    A line cut short by an interruption is dropped from the file, so new
+    records are appended after the last complete one.
+    """
+    done = []
+    if not Path(path).exists():
+        return done
+    with open(path, 'rb+') as f:
+        header = json.loads(f.readline() or 'null')
+        if header != {'settings': settings}:
+            raise ValueError(f"{path} was written with different settings; use another checkpoint file")
+        valid = f.tell()
+        for line in f:
+            try:
+                done.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+            valid += len(line)
+        f.truncate(valid)
+    return done
+
+def power_analysis(effects, replicates=1000, permutations=199, groups=None, seed=0, workers=None,
+                   checkpoint=None):
+    """
+    Monte Carlo power of the richness, composition and clustering analyses.
+
+    Replicates are generated at each effect size and tested in a process
+    pool, in tasks of TASK_SIZE replicates. With `checkpoint`, each finished
+    task is appended to a JSONL file, and replicates already in it are not
+    run again, so an interrupted run resumes where it stopped.
+    """
+    settings = {'effects': list(effects), 'permutations': permutations, 'groups': groups, 'seed': seed}
+    results = read_checkpoint(checkpoint, settings) if checkpoint else []
+    done = {(r['effect'], r['replicate']) for r in results}
+
+    tasks = []
+    for effect_index, effect in enumerate(effects):
+        pending = [r for r in range(replicates) if (effect, r) not in done]
+        for start in range(0, len(pending), TASK_SIZE):
+            tasks.append((effect_index, effect, pending[start:start + TASK_SIZE]))
+
+    log = None
+    if checkpoint:
+        new_file = not Path(checkpoint).exists()
+        log = open(checkpoint, 'a')
+        if new_file:
+            log.write(json.dumps({'settings': settings}) + "\n")
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_replicates, groups, effect_index, effect, chunk, seed, permutations)
+                       for effect_index, effect, chunk in tasks]
+            for future in as_completed(futures):
+                batch = future.result()
+                results.extend(batch)
+                if log:
+                    log.write("".join(json.dumps(r) + "\n" for r in batch))
+                    log.flush()
+    finally:
+        if log:
+            log.close()
+
+    return sorted((r for r in results if r['replicate'] < replicates), key=lambda r: (r['effect'], r['replicate']))
+
+def summarise_power(results, alpha=0.05, ari_threshold=0.5):
+    """
+    Rejection rates per effect size: detection power, or the false-positive
+    rate at effect 0 where the groups do not differ.
+    """
+    summary = []
+    for effect in sorted({r['effect'] for r in results}):
+        rows = [r for r in results if r['effect'] == effect]
+        ari = np.array([r['cluster_ari'] for r in rows])
+        summary.append({
+            'effect': effect,
+            'replicates': len(rows),
+            'kruskal_power': round(float(np.mean([r['kruskal_p'] < alpha for r in rows])), 3),
+            'permanova_power': round(float(np.mean([r['permanova_p'] < alpha for r in rows])), 3),
+            'cluster_recovery': round(float((ari >= ari_threshold).mean()), 3),
+            'mean_cluster_ari': round(float(ari.mean()), 3)
+        })
+    return summary
+
+def format_power_table(summary, alpha=0.05):
+    """Format the power summary as a readable table."""
+    header = f"{'Effect':>7} {'Reps':>6} {'KW richness':>12} {'PERMANOVA':>10} {'Clusters':>9} {'Mean ARI':>9}"
+    rows = [f"Rejection rate at alpha = {alpha} (false-positive rate at effect 0)", header, "-" * len(header)]
+    for s in summary:
+        rows.append(f"{s['effect']:>7.2f} {s['replicates']:>6} {s['kruskal_power']:>12.3f} "
+                    f"{s['permanova_power']:>10.3f} {s['cluster_recovery']:>9.3f} {s['mean_cluster_ari']:>9.3f}")
+    return "\n".join(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description='Monte Carlo power analysis on synthetic relevé datasets')
+    parser.add_argument('-e', '--effects', type=float, nargs='+', default=[0, 0.1, 0.25, 0.5, 1.0],
+                        help='Effect sizes to simulate (0 = no group differences, 1 = generate-data.py blocks)')
+    parser.add_argument('-r', '--replicates', type=int, default=1000, help='Datasets per effect size')
+    parser.add_argument('-p', '--permutations', type=int, default=199, help='PERMANOVA permutations')
+    parser.add_argument('-a', '--alpha', type=float, default=0.05, help='Significance level')
+    parser.add_argument('-g', '--groups', help='JSON file describing the groups')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('-c', '--checkpoint', help='JSONL file to record replicates in and resume from')
+    parser.add_argument('-o', '--output', help='Write the power summary to this JSON file')
+
+    args = parser.parse_args()
+
+    try:
+        groups = load_groups(args.groups) if args.groups else None
+        results = power_analysis(args.effects, args.replicates, args.permutations, groups, args.seed,
+                                 args.workers, args.checkpoint)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    summary = summarise_power(results, args.alpha)
+    print(format_power_table(summary, args.alpha))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nSummary saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+import pandas as pd
+from releve_store import HEADER_FILENAME, open_store
+
+MAX_HEADER_BYTES = 16384
+
+def load_dataset(path, default_site='68'):
+    """
+    Load a relevé CSV or a relevé store directory into a DataFrame.
+
+    Files without a SITE_ID column (the Site 68 surveys) are assigned
+    `default_site`.
+    """
+    path = Path(path)
+    if path.is_dir():
+        df = open_store(path).to_frame()
+    else:
+        df = pd.read_csv(path, skipinitialspace=True, dtype={'SPECIES_NAME': 'category'})
+    if not all(field in df.columns for field in ['RELEVE_ID', 'SPECIES_NAME', 'DOMIN']):
+        raise ValueError("Dataset must contain RELEVE_ID, SPECIES_NAME, and DOMIN columns")
+    if 'SITE_ID' not in df.columns:
+        df.insert(0, 'SITE_ID', default_site)
+    species = df['SPECIES_NAME'].astype('category')
+    df['SPECIES_NAME'] = species.cat.rename_categories(species.cat.categories.astype(str).str.strip())
+    return df
+
+def dataset_mtime(path):
+    """Modification time that changes whenever a dataset is rewritten."""
+    path = Path(path)
+    return (path / HEADER_FILENAME if path.is_dir() else path).stat().st_mtime_ns
+
+class QueryIndex:
+    """
+    Inverted indexes over one relevé dataset.
+
+    - species -> relevés holding it, with their cover, sorted by cover
+      descending, so a cover threshold is a binary search and a slice
+    - relevé -> species with cover, and its richness
+    - site -> species recorded there
+
+    Relevés are keyed 'SITE_ID/RELEVE_ID', as relevé numbers repeat across
+    ISGS sites.
+    """
+
+    def __init__(self, df):
+        # Rows without a species or a cover would index as species -1 and break
+        # the cover ordering, so they are left out
+        df = df[df['SPECIES_NAME'].notna() & df['DOMIN'].notna()]
+        df = df.assign(SPECIES_NAME=df['SPECIES_NAME'].cat.remove_unused_categories())
+        species_codes = df['SPECIES_NAME'].cat.codes.to_numpy()
+        self.species = df['SPECIES_NAME'].cat.categories.tolist()
+        self.species_lookup = {name.lower(): code for code, name in enumerate(self.species)}
+
+        sites = df['SITE_ID'].astype(str).to_numpy()
+        releve_ids = df['RELEVE_ID'].astype(str).to_numpy()
+        keys = np.char.add(np.char.add(sites.astype(str), '/'), releve_ids)
+        releve_codes, self.releves = pd.factorize(keys)
+        self.releves = self.releves.tolist()
+        first = np.unique(releve_codes, return_index=True)[1]
+        self.releve_site = sites[first].tolist()
+        self.releve_number = releve_ids[first].tolist()
+        cover = df['DOMIN'].to_numpy(dtype=float)
+
+        # species -> relevés, cover descending within each species
+        order = np.lexsort((releve_codes, -cover, species_codes))
+        bounds = np.searchsorted(species_codes[order], np.arange(len(self.species) + 1))
+        self.species_releves = {}
+        for code in range(len(self.species)):
+            rows = order[bounds[code]:bounds[code + 1]]
+            self.species_releves[code] = (releve_codes[rows], cover[rows])
+
+        # relevé -> species, cover descending within each relevé
+        order = np.lexsort((species_codes, -cover, releve_codes))
+        bounds = np.searchsorted(releve_codes[order], np.arange(len(self.releves) + 1))
+        self.releve_species = []
+        for code in range(len(self.releves)):
+            rows = order[bounds[code]:bounds[code + 1]]
+            self.releve_species.append([(self.species[s], float(c)) for s, c in zip(species_codes[rows], cover[rows])])
+        self.richness = [len({name for name, _ in records}) for records in self.releve_species]
+
+        # relevé number -> relevé codes, for lookups without a site
+        self.releves_by_number = {}
+        for code, number in enumerate(self.releve_number):
+            self.releves_by_number.setdefault(number, []).append(code)
+
+        self.site_species = {}
+        pairs = pd.DataFrame({'site': sites, 'species': species_codes}).drop_duplicates()
+        for site, group in pairs.groupby('site', sort=False):
+            self.site_species[site] = sorted(self.species[s] for s in group['species'])
+
+        self.rows = len(df)
+
+    def species_query(self, name, min_domin=None, limit=None):
+        """Relevés containing `name`, optionally only those with cover of at least `min_domin`."""
+        code = self.species_lookup.get(name.strip().lower())
+        if code is None:
+            raise KeyError(f"Unknown species '{name}'")
+        if limit is not None and limit <= 0:
+            raise ValueError("limit must be a positive integer")
+        releves, cover = self.species_releves[code]
+        if min_domin is not None:
+            # cover is sorted descending, so the matching relevés are a prefix
+            end = len(cover) - np.searchsorted(cover[::-1], min_domin, side='left')
+            releves, cover = releves[:end], cover[:end]
+        if limit is not None:
+            releves, cover = releves[:limit], cover[:limit]
+        return {
+            'species': self.species[code],
+            'count': len(releves),
+            'releves': [{'releve': self.releves[r], 'domin': float(c)} for r, c in zip(releves, cover)]
+        }
+
+    def site_query(self, site_id):
+        """Species recorded at a site."""
+        species = self.site_species.get(str(site_id).strip())
+        if species is None:
+            raise KeyError(f"Unknown site '{site_id}'")
+        return {'site': str(site_id).strip(), 'count': len(species), 'species': species}
+
+    def releve_query(self, releve_id, site_id=None):
+        """Species and richness of a relevé; without a site, every site's relevé with that number."""
+        codes = self.releves_by_number.get(str(releve_id).strip(), [])
+        if site_id is not None:
+            codes = [code for code in codes if self.releve_site[code] == str(site_id).strip()]
+        if not codes:
+            raise KeyError(f"Unknown relevé '{releve_id}'")
+        return {
+            'releves': [{
+                'releve': self.releves[code],
+                'site': self.releve_site[code],
+                'richness': self.richness[code],
+                'species': [{'name': name, 'domin': cover} for name, cover in self.releve_species[code]]
+            } for code in codes]
+        }
+
+class QueryServer:
+    """
+    Long-running HTTP/JSON query service over a relevé dataset.
+
+    The dataset is loaded and indexed once; queries are answered from the
+    in-memory indexes. A background task polls the dataset's modification
+    time and rebuilds the indexes in a worker thread when it changes,
+    swapping them in only once complete so queries never see a half-built
+    index.
+    """
+
+    def __init__(self, dataset, reload_interval=2.0, default_site='68'):
+        self.dataset = dataset
+        self.reload_interval = reload_interval
+        self.default_site = default_site
+        self.mtime = dataset_mtime(dataset)
+        started = time.perf_counter()
+        self.index = QueryIndex(load_dataset(dataset, default_site))
+        self.load_seconds = time.perf_counter() - started
+        self.loaded_at = time.time()
+
+    async def watch(self):
+        """Rebuild the indexes whenever the dataset changes on disk."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                mtime = dataset_mtime(self.dataset)
+                if mtime == self.mtime:
+                    continue
+                started = time.perf_counter()
+                index = await loop.run_in_executor(None, lambda: QueryIndex(load_dataset(self.dataset, self.default_site)))
+            except (OSError, ValueError) as e:
+                # A file caught mid-write is retried on the next poll
+                print(f"Warning: reload of {self.dataset} failed: {e}", file=sys.stderr)
+                continue
+            self.index, self.mtime = index, mtime
+            self.load_seconds = time.perf_counter() - started
+            self.loaded_at = time.time()
+            print(f"Reloaded {self.dataset} ({index.rows} rows, {self.load_seconds:.2f}s)")
+
+    def answer(self, path, params):
+        """Dispatch one query; returns (status, payload)."""
+        index = self.index
+
+        def param(name, required=True):
+            values = params.get(name)
+            if not values:
+                if required:
+                    raise ValueError(f"Missing query parameter '{name}'")
+                return None
+            return values[0]
+
+        try:
+            if path == '/species':
+                min_domin = param('min_domin', required=False)
+                limit = param('limit', required=False)
+                return 200, index.species_query(param('name'),
+                                                float(min_domin) if min_domin is not None else None,
+                                                int(limit) if limit is not None else None)
+            if path == '/site':
+                return 200, index.site_query(param('id'))
+            if path == '/releve':
+                return 200, index.releve_query(param('id'), param('site', required=False))
+            if path == '/stats':
+                return 200, {
+                    'dataset': str(self.dataset),
+                    'rows': index.rows,
+                    'releves': len(index.releves),
+                    'species': len(index.species),
+                    'sites': len(index.site_species),
+                    'load_seconds': round(self.load_seconds, 3),
+                    'loaded_at': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.loaded_at))
+                }
+            return 404, {'error': f"Unknown query '{path}'; use /species, /site, /releve or /stats"}
+        except KeyError as e:
+            return 404, {'error': e.args[0]}
+        except ValueError as e:
+            return 400, {'error': str(e)}
+
+    async def handle(self, reader, writer):
+        """Serve HTTP/1.1 GET requests on one connection, keeping it alive between requests."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.respond(writer, 431, {'error': 'Request headers too large'}, keep_alive=False)
+                    break
+
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                method, target, version = (request_line.split(' ') + ['', '', ''])[:3]
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip().lower()
+                keep_alive = headers.get('connection') != 'close' and version == 'HTTP/1.1'
+
+                if method != 'GET':
+                    await self.respond(writer, 405, {'error': 'Only GET is supported'}, keep_alive)
+                else:
+                    url = urlsplit(target)
+                    status, payload = self.answer(url.path.rstrip('/') or '/', parse_qs(url.query))
+                    await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode('utf-8')
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                  431: 'Request Header Fields Too Large'}[status]
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        watcher = asyncio.create_task(self.watch())
+        print(f"Serving {self.dataset} on http://{host}:{port} "
+              f"({self.index.rows} rows, {len(self.index.releves)} relevés, loaded in {self.load_seconds:.2f}s)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Local HTTP/JSON query service for species and relevé lookups',
+        epilog='Queries: /species?name=Lolium perenne&min_domin=5, /site?id=68, '
+               '/releve?id=72[&site=68], /stats'
+    )
+    parser.add_argument('dataset', help='Relevé CSV or relevé store directory')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('-p', '--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--reload-interval', type=float, default=2.0,
+                        help='Seconds between checks for a changed dataset')
+    parser.add_argument('--site', default='68', help='SITE_ID for datasets without a SITE_ID column')
+
+    args = parser.parse_args()
+
+    try:
+        server = QueryServer(args.dataset, args.reload_interval, args.site)
+        asyncio.run(server.serve(args.host, args.port))
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
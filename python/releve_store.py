@@ -0,0 +1,265 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from domin_scales import SCALE_VALUES, convert_scale
+
+FORMAT_NAME = "releve-store"
+FORMAT_VERSION = 1
+HEADER_FILENAME = "header.json"
+KEY_COLUMNS = ['SITE_ID', 'RELEVE_ID', 'SPECIES_NAME', 'GRID_NO']  # identify a row when checking copies
+SPECIES_OFFSETS_FILENAME = "species.offsets"
+SPECIES_STRINGS_FILENAME = "species.strings"
+
+# Fixed-width little-endian layout of each column file
+COLUMN_TYPES = {
+    'ID': '<i4',
+    'SITE_ID': '<i4',
+    'RELEVE_ID': '<i4',
+    'GRID_NO': '<i4',
+    'SPECIES': '<i4',
+    'DOMIN': '<f8'
+}
+
+class ReleveStore:
+    """
+    Read-only view of a relevé store directory.
+
+    Columns are `np.memmap` arrays, so every process that opens the same
+    store shares the operating system's page cache instead of holding its
+    own parsed copy. Pickling a store only sends its path, which makes it
+    cheap to hand to `ProcessPoolExecutor` workers.
+
+    Only the raw DOMIN column is stored; other cover scales are derived on
+    request through `cover(scale)`.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / HEADER_FILENAME, 'r') as f:
+            self.header = json.load(f)
+        if self.header.get('format') != FORMAT_NAME:
+            raise ValueError(f"{self.path} is not a relevé store")
+        if self.header['version'] > FORMAT_VERSION:
+            raise ValueError(f"{self.path} uses store version {self.header['version']}, expected {FORMAT_VERSION}")
+
+        self.rows = self.header['rows']
+        self.scale = self.header.get('domin_scale', 'domin')
+        self.columns = {}
+        for name, dtype in self.header['columns'].items():
+            if self.rows:
+                self.columns[name] = np.memmap(self.path / f"{name}.bin", dtype=dtype, mode='r', shape=(self.rows,))
+            else:
+                self.columns[name] = np.empty(0, dtype=dtype)
+
+        self._offsets = np.fromfile(self.path / SPECIES_OFFSETS_FILENAME, dtype='<i8')
+        self._strings = np.memmap(self.path / SPECIES_STRINGS_FILENAME, dtype=np.uint8, mode='r') \
+            if self._offsets[-1] else np.empty(0, dtype=np.uint8)
+        self._species_names = None
+
+    def __reduce__(self):
+        return (ReleveStore, (str(self.path),))
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @property
+    def species_names(self):
+        """Species string table, decoded on first use; index with the SPECIES column codes."""
+        if self._species_names is None:
+            data = bytes(self._strings)
+            self._species_names = [
+                data[start:end].decode('utf-8')
+                for start, end in zip(self._offsets[:-1], self._offsets[1:])
+            ]
+        return self._species_names
+
+    def cover(self, scale=None):
+        """DOMIN column on the requested cover scale ('domin', 'mid-range' or 'braun-blanquet')."""
+        if scale is None or scale == self.scale:
+            return self.columns['DOMIN']
+        return convert_scale(self.columns['DOMIN'], scale, self.scale)
+
+    def to_frame(self, scale=None):
+        """Materialise the store as a DataFrame with SPECIES_NAME as a categorical column."""
+        data = {}
+        for name in self.header['column_order']:
+            if name == 'SPECIES_NAME':
+                data[name] = pd.Categorical.from_codes(np.asarray(self.columns['SPECIES']), self.species_names)
+            elif name == 'DOMIN':
+                data[name] = np.asarray(self.cover(scale))
+            else:
+                data[name] = np.asarray(self.columns[name])
+        return pd.DataFrame(data)
+
+def open_store(path):
+    """Open a relevé store directory for reading."""
+    return ReleveStore(path)
+
+def write_store(df, store_path, source=None, scale='domin'):
+    """
+    Write a relevé DataFrame as a store directory.
+
+    Integer id columns and DOMIN are written as raw fixed-width arrays,
+    SPECIES_NAME becomes int32 codes into a UTF-8 string table. `scale`
+    records which cover scale the DOMIN column holds.
+    """
+    store_path = Path(store_path)
+    store_path.mkdir(parents=True, exist_ok=True)
+
+    species = df['SPECIES_NAME'].astype(str).str.strip().astype('category')
+    names = species.cat.categories.tolist()
+    encoded = [name.encode('utf-8') for name in names]
+    offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    offsets.tofile(store_path / SPECIES_OFFSETS_FILENAME)
+    with open(store_path / SPECIES_STRINGS_FILENAME, 'wb') as f:
+        f.write(b''.join(encoded))
+
+    columns = {}
+    column_order = []
+    for name in df.columns:
+        if name == 'SPECIES_NAME':
+            values = species.cat.codes.to_numpy()
+            name = 'SPECIES'
+            column_order.append('SPECIES_NAME')
+        elif name in COLUMN_TYPES:
+            values = df[name].to_numpy()
+            column_order.append(name)
+        else:
+            raise ValueError(f"Column '{name}' is not supported by the relevé store")
+        dtype = COLUMN_TYPES[name]
+        np.ascontiguousarray(values, dtype=dtype).tofile(store_path / f"{name}.bin")
+        columns[name] = dtype
+
+    header = {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'rows': int(len(df)),
+        'columns': columns,
+        'column_order': column_order,
+        'species_count': len(names),
+        'domin_scale': scale,
+        'source': str(source) if source else None
+    }
+    # Header last, so a half-written store is never mistaken for a complete one
+    with open(store_path / HEADER_FILENAME, 'w') as f:
+        json.dump(header, f, indent=2)
+    return store_path
+
+def csv_to_store(csv_path, store_path, scale='domin'):
+    """Convert a relevé CSV (e.g. RELEVE_SP_DATA.txt) into a store directory."""
+    df = pd.read_csv(csv_path, skipinitialspace=True, dtype={'SPECIES_NAME': 'category'})
+    if not all(field in df.columns for field in ['RELEVE_ID', 'SPECIES_NAME', 'DOMIN']):
+        raise ValueError("CSV file must contain RELEVE_ID, SPECIES_NAME, and DOMIN columns")
+    return write_store(df, store_path, source=csv_path, scale=scale)
+
+def store_to_csv(store_path, csv_path, scale=None):
+    """Write a store directory back out in its original CSV column layout, optionally on another scale."""
+    open_store(store_path).to_frame(scale).to_csv(csv_path, index=False)
+    return csv_path
+
+def check_copy(store_path, csv_path, scale):
+    """
+    Compare a CSV copy held on another scale (e.g. RELEVE_SP_DATA_MID_RANGE.txt)
+    with the values derived from the store.
+
+    Rows are matched on (SITE_ID, RELEVE_ID, SPECIES_NAME, GRID_NO), using
+    whichever of these both sides have, so a copy that leaves out some
+    relevés (such as COMBINED_MID_RANGE.csv without relevé 28) can still be
+    checked. Returns (mismatches, missing, extra): matched rows whose values
+    disagree, store rows absent from the copy and copy rows absent from the
+    store. A copy adds nothing when `mismatches` and `extra` are empty.
+    """
+    store = open_store(store_path)
+    derived = store.to_frame(scale)
+    copy = pd.read_csv(csv_path, skipinitialspace=True)
+    copy['SPECIES_NAME'] = copy['SPECIES_NAME'].astype(str).str.strip()
+    derived['SPECIES_NAME'] = derived['SPECIES_NAME'].astype(str)
+
+    key = [name for name in KEY_COLUMNS if name in derived.columns and name in copy.columns]
+    if 'RELEVE_ID' not in key:
+        raise ValueError(f"{csv_path} has no RELEVE_ID column to match rows on")
+    # Repeated keys are paired in file order
+    derived['_OCCURRENCE'] = derived.groupby(key, sort=False).cumcount()
+    copy['_OCCURRENCE'] = copy.groupby(key, sort=False).cumcount()
+    joined = derived.merge(copy, on=key + ['_OCCURRENCE'], how='outer', suffixes=('', '_COPY'), indicator=True)
+
+    matched = joined[joined['_merge'] == 'both']
+    differs = ~np.isclose(matched['DOMIN'].to_numpy(dtype=float), matched['DOMIN_COPY'].to_numpy(dtype=float))
+    for name in [c for c in ['ID'] if c in derived.columns and c in copy.columns]:
+        differs |= matched[name].to_numpy() != matched[f'{name}_COPY'].to_numpy()
+
+    mismatches = matched[differs][list(derived.columns.drop('_OCCURRENCE'))].copy()
+    mismatches['COPY_DOMIN'] = matched['DOMIN_COPY'][differs]
+    missing = joined[joined['_merge'] == 'left_only'][list(derived.columns.drop('_OCCURRENCE'))]
+    extra = joined[joined['_merge'] == 'right_only'][key + ['DOMIN_COPY']].rename(columns={'DOMIN_COPY': 'DOMIN'})
+    return mismatches.reset_index(drop=True), missing.reset_index(drop=True), extra.reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert relevé CSV files to and from the memory-mapped store format')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    to_store = subparsers.add_parser('import', help='Convert a CSV file into a store directory')
+    to_store.add_argument('csv_file', help='Input relevé CSV')
+    to_store.add_argument('store_dir', help='Output store directory')
+    to_store.add_argument('-s', '--scale', choices=sorted(SCALE_VALUES), default='domin',
+                          help='Cover scale of the DOMIN column in the CSV')
+
+    to_csv = subparsers.add_parser('export', help='Convert a store directory back into CSV')
+    to_csv.add_argument('store_dir', help='Input store directory')
+    to_csv.add_argument('csv_file', help='Output relevé CSV')
+    to_csv.add_argument('-s', '--scale', choices=sorted(SCALE_VALUES), default=None,
+                        help='Cover scale to write (defaults to the stored scale)')
+
+    check = subparsers.add_parser('check', help='Check a CSV copy on another scale against the store')
+    check.add_argument('store_dir', help='Store directory')
+    check.add_argument('csv_file', help='CSV copy, e.g. RELEVE_SP_DATA_MID_RANGE.txt')
+    check.add_argument('-s', '--scale', choices=sorted(SCALE_VALUES), required=True,
+                       help='Cover scale of the CSV copy')
+
+    info = subparsers.add_parser('info', help='Describe a store directory')
+    info.add_argument('store_dir', help='Store directory')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'import':
+            csv_to_store(args.csv_file, args.store_dir, args.scale)
+            print(f"Store written to {args.store_dir}")
+        elif args.command == 'export':
+            store_to_csv(args.store_dir, args.csv_file, args.scale)
+            print(f"CSV written to {args.csv_file}")
+        elif args.command == 'check':
+            mismatches, missing, extra = check_copy(args.store_dir, args.csv_file, args.scale)
+            if len(missing):
+                releves = ', '.join(map(str, missing['RELEVE_ID'].unique()[:20]))
+                print(f"{len(missing)} store rows are not in {args.csv_file} (RELEVE_ID {releves})")
+            if len(extra):
+                print(f"{len(extra)} rows of {args.csv_file} are not in the store:")
+                print(extra.head(20).to_string(index=False))
+            if len(mismatches):
+                print(f"{len(mismatches)} rows of {args.csv_file} differ from the store:")
+                print(mismatches.head(20).to_string(index=False))
+            if len(extra) or len(mismatches):
+                sys.exit(2)
+            print(f"{args.csv_file} matches the store on the {args.scale} scale")
+        else:
+            store = open_store(args.store_dir)
+            print(f"Rows: {len(store)}")
+            print(f"Species: {store.header['species_count']}")
+            print(f"Source: {store.header['source']}")
+            print(f"Stored scale: {store.scale}")
+            for name, dtype in store.header['columns'].items():
+                print(f"  {name:<10} {dtype}")
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import argparse
+import json
+import sys
+import time
+import numpy as np
+import pandas as pd
+from domin_scales import SCALE_VALUES
+
+DEFAULT_VOCABULARY_FILES = [
+    "../datasets/isgs/ISGS_species_list_uniq.txt",
+    "../datasets/vegapp/ISGS_vegapp_species_list.csv"
+]
+
+INTEGER_COLUMNS = ['ID', 'SITE_ID', 'RELEVE_ID', 'GRID_NO']
+REQUIRED_COLUMNS = ['RELEVE_ID', 'SPECIES_NAME', 'DOMIN']
+SAMPLE_SIZE = 20
+
+# Checks whose rows cannot be used in any statistic; the others only flag rows
+UNUSABLE_CHECKS = frozenset([f'invalid_{column.lower()}' for column in INTEGER_COLUMNS] +
+                            ['invalid_domin', 'missing_species'])
+
+def load_vocabulary(paths=DEFAULT_VOCABULARY_FILES):
+    """
+    Load accepted species names from the ISGS list and the VegApp lookup file.
+
+    Names are stored casefolded so the check ignores capitalisation.
+    """
+    names = set()
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().casefold().splitlines()
+        if path.endswith('.csv'):
+            # VegApp lookup: two preamble lines, then ';'-separated rows with NAME second
+            names.update(line.split(';', 2)[1].strip() for line in lines[3:] if ';' in line)
+        else:
+            names.update(line.strip() for line in lines if line.strip())
+    return frozenset(names)
+
+def _off_scale(domin, scale):
+    """
+    Mask of DOMIN values off `scale`; with scale None, the scale fitting the
+    most values is used. Scales are tried in order and the first one that
+    fits every value ends the search, since no later scale can beat it.
+    """
+    values = domin.to_numpy()
+    masks = {}
+    for name, allowed in SCALE_VALUES.items():
+        if scale in (None, name):
+            masks[name] = ~np.isin(values, np.fromiter(allowed, dtype=float))
+            if not masks[name].any():
+                break
+    scale = min(masks, key=lambda name: masks[name].sum())
+    return scale, masks[scale]
+
+def _error_entry(mask, column):
+    """Summarise a failed check: count plus a sample of CSV line numbers and offending values."""
+    rows = np.flatnonzero(mask)
+    sample = rows[:SAMPLE_SIZE]
+    return {
+        'count': int(len(rows)),
+        'lines': (sample + 2).tolist(),
+        'values': sorted({str(v) for v in column.array.take(sample)})
+    }
+
+def _key_column(values):
+    """Non-negative int64 codes for an id column, with missing values mapped to 0."""
+    if pd.api.types.is_integer_dtype(values):
+        return values.to_numpy(dtype=np.int64) + 1
+    codes = np.nan_to_num(values.to_numpy(dtype=float), nan=-1).astype(np.int64)
+    codes += 1
+    return codes
+
+def validate_frame(df, scale='domin', vocabulary=None, grid_range=(1, 30)):
+    """
+    Run every check over a loaded relevé table and return (valid_mask, errors).
+
+    Each check is a vectorised boolean mask over the whole table. Species
+    names are checked once per category rather than once per row.
+    Duplicates are keyed on (SITE_ID, RELEVE_ID, SPECIES_NAME) when a
+    SITE_ID column exists, since ISGS relevé numbers repeat across sites.
+    With `scale` None, DOMIN values are checked against whichever cover
+    scale fits most of them. `df` itself is left unchanged.
+    """
+    failed, errors, _ = _check_frame(df.copy(deep=False), scale, vocabulary, grid_range)
+    return _valid_rows(len(df), failed), errors
+
+def _valid_rows(count, failed, checks=None):
+    """Mask of the rows passing every check in `failed` (or only the named `checks`)."""
+    invalid = np.zeros(count, dtype=bool)
+    for check, mask in failed.items():
+        if checks is None or check in checks:
+            invalid |= mask
+    return ~invalid
+
+def _check_frame(df, scale, vocabulary, grid_range):
+    """
+    The checks of `validate_frame` on a frame they may modify: id and DOMIN
+    columns are converted to numbers in place. Returns ({check: mask of
+    failing rows}, errors, cover scale checked against).
+    """
+    errors = {}
+    failed = {}
+    missing = [field for field in REQUIRED_COLUMNS if field not in df.columns]
+    if missing:
+        errors['schema'] = {'count': len(df), 'missing_columns': missing}
+        return {'schema': np.ones(len(df), dtype=bool)}, errors, scale
+
+    def record(check, mask, column):
+        if mask.any():
+            errors[check] = _error_entry(mask, df[column])
+            failed[check] = mask
+
+    for column in INTEGER_COLUMNS:
+        if column in df.columns:
+            values = df[column]
+            if not pd.api.types.is_integer_dtype(values):
+                numbers = pd.to_numeric(values, errors='coerce')
+                mask = (numbers.isna() | (numbers != np.floor(numbers))).to_numpy()
+                record(f'invalid_{column.lower()}', mask, column)
+                df[column] = numbers
+
+    domin = df['DOMIN']
+    if not pd.api.types.is_float_dtype(domin):
+        domin = pd.to_numeric(domin, errors='coerce')
+        df['DOMIN'] = domin
+    scale, off_scale = _off_scale(domin, scale)
+    record('invalid_domin', off_scale, 'DOMIN')
+
+    species = df['SPECIES_NAME']
+    if not isinstance(species.dtype, pd.CategoricalDtype):
+        species = species.astype('category')
+    codes = species.cat.codes.to_numpy()
+    # A few hundred category names are quicker to walk in Python than through .str.
+    # Each category gets flag bits (1 blank, 2 unknown), plus a last entry for
+    # missing names (code -1), so the rows are looked up in one pass
+    names = [str(name).strip() for name in species.cat.categories.tolist()]
+    flags = np.array([not name for name in names] + [True], dtype=np.uint8)
+    if vocabulary is not None:
+        flags[:-1] |= np.array([name.casefold() not in vocabulary for name in names], dtype=np.uint8) << 1
+    row_flags = flags[codes]
+    record('missing_species', (row_flags & 1).astype(bool), 'SPECIES_NAME')
+    if vocabulary is not None:
+        record('unknown_species', (row_flags & 2).astype(bool), 'SPECIES_NAME')
+
+    # Pack the key into one integer; a sorted scan rules out duplicates cheaply
+    # and the exact (slower) hash-based mask is only built when some exist
+    key = _key_column(df['RELEVE_ID'])
+    releves = key.max() + 1 if len(key) else 1
+    key *= len(names) + 1
+    key += codes
+    key += 1
+    if 'SITE_ID' in df.columns:
+        sites = _key_column(df['SITE_ID'])
+        sites *= releves * (len(names) + 1)
+        key += sites
+    # Keys that fit in 32 bits sort about twice as fast; the copy is sorted in place
+    packed = key.astype(np.int32) if len(key) and key.max() < 2 ** 31 else key.copy()
+    packed.sort()
+    if (packed[1:] == packed[:-1]).any():
+        record('duplicate_species', pd.Series(key).duplicated().to_numpy(), 'SPECIES_NAME')
+
+    if 'GRID_NO' in df.columns and grid_range is not None:
+        grid = df['GRID_NO'].to_numpy(dtype=float)
+        record('grid_out_of_range', ~((grid >= grid_range[0]) & (grid <= grid_range[1])), 'GRID_NO')
+
+    return failed, errors, scale
+
+def load_releves(file_path, scale='domin', vocabulary=None, grid_range=(1, 30), drop_invalid=True):
+    """
+    Load a relevé CSV and validate it in the same pass.
+
+    Returns (dataframe, report). The report is a small JSON-serialisable
+    dict with the row counts, the cover scale checked against (detected
+    when `scale` is None) and one entry per failed check. Rows failing
+    any check are dropped, or only those failing the checks named in
+    `drop_invalid` when it is a collection (such as UNUSABLE_CHECKS), or
+    none when it is False.
+    """
+    df = pd.read_csv(file_path, skipinitialspace=True, dtype={'SPECIES_NAME': 'category'})
+    failed, errors, scale = _check_frame(df, scale, vocabulary, grid_range)
+    valid = _valid_rows(len(df), failed)
+
+    report = {
+        'file': str(file_path),
+        'scale': scale,
+        'rows': int(len(df)),
+        'valid_rows': int(valid.sum()),
+        'errors': errors
+    }
+
+    keep = valid if drop_invalid is True else _valid_rows(len(df), failed, drop_invalid or ())
+    # Checks that only flag rows (such as unknown_species) leave nothing to drop and no copy to make
+    if drop_invalid and 'schema' not in errors and not keep.all():
+        df = df[keep].reset_index(drop=True)
+        for column in INTEGER_COLUMNS:
+            # Id columns hold whole numbers again once their invalid rows are gone
+            if column in df.columns and f'invalid_{column.lower()}' in failed and \
+                    (drop_invalid is True or f'invalid_{column.lower()}' in drop_invalid):
+                df[column] = df[column].astype(np.int64)
+    return df, report
+
+def format_report(report):
+    """Format a validation report as readable text."""
+    lines = [f"{report['file']}: {report['valid_rows']}/{report['rows']} valid rows ({report['scale']} scale)"]
+    for check, entry in report['errors'].items():
+        if check == 'schema':
+            lines.append(f"  schema: missing columns {', '.join(entry['missing_columns'])}")
+            continue
+        lines.append(f"  {check}: {entry['count']} rows, e.g. lines {', '.join(map(str, entry['lines'][:5]))}")
+        lines.append(f"    values: {', '.join(entry['values'][:5])}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate relevé CSV files at load time')
+    parser.add_argument('input_files', nargs='+', help='Relevé CSV files to validate')
+    parser.add_argument('-s', '--scale', choices=sorted(SCALE_VALUES), default='domin',
+                        help='Cover scale used by the DOMIN column')
+    parser.add_argument('--no-vocabulary', action='store_true',
+                        help='Skip checking species names against the ISGS/VegApp lists')
+    parser.add_argument('--grid-range', nargs=2, type=int, default=[1, 30], metavar=('MIN', 'MAX'),
+                        help='Allowed GRID_NO range')
+    parser.add_argument('-r', '--report', help='Write the JSON error report to this file')
+    parser.add_argument('--timing', action='store_true', help='Print the validation overhead')
+
+    args = parser.parse_args()
+
+    try:
+        vocabulary = None if args.no_vocabulary else load_vocabulary()
+        reports = []
+        for input_file in args.input_files:
+            if args.timing:
+                start = time.perf_counter()
+                pd.read_csv(input_file, skipinitialspace=True, dtype={'SPECIES_NAME': 'category'})
+                load_only = time.perf_counter() - start
+
+            start = time.perf_counter()
+            df, report = load_releves(input_file, args.scale, vocabulary, tuple(args.grid_range))
+            elapsed = time.perf_counter() - start
+            reports.append(report)
+            print(format_report(report))
+
+            if args.timing:
+                print(f"  load {load_only * 1000:.1f} ms, load+validate {elapsed * 1000:.1f} ms "
+                      f"(overhead {100 * (elapsed - load_only) / load_only:.0f}%)")
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(reports, f, indent=2)
+        print(f"Report saved to {args.report}")
+
+    if any(report['errors'] for report in reports):
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import argparse
+import sys
+import zlib
+import numpy as np
+import pandas as pd
+from community_matrix import load_survey, community_matrix
+from domin_scales import SCALE_VALUES, convert_scale
+
+FORMAT_VERSION = 1
+MERSENNE_PRIME = (1 << 31) - 1
+SIGNATURE_CHUNK = 1024   # relevés hashed per block, bounding the (rows x permutations) temporary
+PAIR_CHUNK = 8192        # candidate pairs re-ranked per block
+
+def species_hashes(names):
+    """Stable 31-bit hash of each species name, so surveys with different vocabularies hash alike."""
+    return np.array([zlib.crc32(str(name).strip().lower().encode('utf-8')) % MERSENNE_PRIME for name in names],
+                    dtype=np.int64)
+
+def cover_matrix(df, scale, species=None):
+    """Relevé x species cover matrix on the mid-range (% cover) scale, whatever scale the survey uses."""
+    df = df.assign(DOMIN=convert_scale(df['DOMIN'], 'mid-range', scale))
+    return community_matrix(df, species)
+
+def minhash_signatures(matrix, hashes, a, b):
+    """
+    MinHash signature of every row of a relevé x species matrix.
+
+    Each of the len(a) hash functions is h(x) = (a*x + b) mod p over the
+    species name hashes; a relevé's signature holds the minimum of each
+    function over its species. Rows without species get p everywhere.
+    """
+    table = (hashes[:, None] * a + b) % MERSENNE_PRIME
+    signatures = np.full((len(matrix), len(a)), MERSENNE_PRIME, dtype=np.int64)
+    for start in range(0, len(matrix), SIGNATURE_CHUNK):
+        rows, cols = np.nonzero(matrix[start:start + SIGNATURE_CHUNK] > 0)
+        if not len(rows):
+            continue
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        signatures[start + rows[starts]] = np.minimum.reduceat(table[cols], starts, axis=0)
+    return signatures
+
+def band_keys(signatures, bands):
+    """Hash each band of `rows` signature values into one uint64 bucket key per relevé."""
+    rows = signatures.shape[1] // bands
+    keys = np.zeros((bands, len(signatures)), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for band in range(bands):
+            for value in signatures[:, band * rows:(band + 1) * rows].T.astype(np.uint64):
+                keys[band] = keys[band] * np.uint64(1000003) ^ value
+    return keys
+
+class SimilarityIndex:
+    """
+    MinHash/LSH index of the relevés of a reference survey.
+
+    Relevés whose signatures agree on every value of at least one band
+    become candidates; with `bands` bands of r values, pairs with Jaccard
+    similarity J are found with probability 1 - (1 - J^r)^bands. Candidates
+    are then ranked by exact Bray-Curtis dissimilarity on mid-range cover.
+
+    At the size of the ISGS survey the buckets do not pay off, so queries
+    are exhaustive unless asked otherwise. Matching COMBINED_MID_RANGE (64
+    relevés) against ISGS (4633) with 128 permutations, exhaustive search
+    takes 0.4 s. In 64 bands of 2 rows, half of all pairs are candidates,
+    for no speedup and 80% recall of the true 5 nearest. In 32 bands of 4
+    rows, 1.6% are candidates (6x faster) but recall falls to 21%. True
+    neighbours have a median Jaccard of only 0.18 against 0.10 for all
+    pairs, too close for any band width to separate.
+    """
+
+    def __init__(self, releves, species, cover, a, b, signatures, bands, scale):
+        self.releves = np.asarray(releves).astype(str)
+        self.species = np.asarray(species).astype(str)
+        self.cover = np.asarray(cover, dtype=np.float32)
+        self.totals = self.cover.sum(axis=1)
+        self.a, self.b = a, b
+        self.signatures = signatures
+        self.bands = bands
+        self.scale = scale
+
+        keys = band_keys(signatures, bands)
+        self.band_order = np.argsort(keys, axis=1, kind='stable')
+        self.band_keys = np.take_along_axis(keys, self.band_order, axis=1)
+
+    @classmethod
+    def build(cls, df, scale='domin', num_perm=128, bands=64, seed=0):
+        """Index a long-format survey; `scale` is the cover scale of its DOMIN column."""
+        if num_perm % bands:
+            raise ValueError(f"{num_perm} permutations cannot be split into {bands} equal bands")
+        matrix, releves, species = cover_matrix(df, scale)
+        rng = np.random.default_rng(seed)
+        a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.int64)
+        b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.int64)
+        signatures = minhash_signatures(matrix, species_hashes(species), a, b)
+        return cls(releves, species, matrix, a, b, signatures, bands, scale)
+
+    def save(self, path):
+        """Persist the index as a compressed .npz; cover is stored sparse."""
+        rows, cols = np.nonzero(self.cover)
+        np.savez_compressed(
+            path, version=FORMAT_VERSION, releves=self.releves, species=self.species,
+            cover_rows=rows.astype(np.int32), cover_cols=cols.astype(np.int32), cover_values=self.cover[rows, cols],
+            a=self.a, b=self.b, signatures=self.signatures, bands=self.bands, scale=self.scale
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data['version']) != FORMAT_VERSION:
+                raise ValueError(f"{path} uses index version {int(data['version'])}, expected {FORMAT_VERSION}")
+            cover = np.zeros((len(data['releves']), len(data['species'])), dtype=np.float32)
+            cover[data['cover_rows'], data['cover_cols']] = data['cover_values']
+            return cls(data['releves'], data['species'], cover, data['a'], data['b'],
+                       data['signatures'], int(data['bands']), str(data['scale']))
+
+    def candidate_pairs(self, signatures):
+        """(query, relevé) index pairs that share at least one LSH bucket."""
+        keys = band_keys(signatures, self.bands)
+        pairs = []
+        for band in range(self.bands):
+            lo = np.searchsorted(self.band_keys[band], keys[band], side='left')
+            hi = np.searchsorted(self.band_keys[band], keys[band], side='right')
+            counts = hi - lo
+            if not counts.sum():
+                continue
+            queries = np.repeat(np.arange(len(signatures)), counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            pairs.append(queries * len(self.releves) + self.band_order[band][np.repeat(lo, counts) + offsets])
+        if not pairs:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        pairs = np.unique(np.concatenate(pairs))
+        return pairs // len(self.releves), pairs % len(self.releves)
+
+    def query(self, df, scale='mid-range', k=5, exhaustive=True):
+        """
+        The k most similar indexed relevés for every relevé of a survey.
+
+        With `exhaustive` (the default), every indexed relevé is a candidate
+        and the answer is exact; otherwise only relevés sharing an LSH bucket
+        are compared, which approximates it. Returns a DataFrame
+        of QUERY_RELEVE, RANK, RELEVE, BRAY_CURTIS, JACCARD_ESTIMATE.
+        """
+        full, query_releves, query_species = cover_matrix(df, scale)
+        totals = full.sum(axis=1)
+        signatures = minhash_signatures(full, species_hashes(query_species), self.a, self.b)
+
+        # Each query's shared species as a padded (column, cover) list; the
+        # padding points at an all-zero column appended to the index cover
+        shared = pd.Index(self.species).get_indexer(query_species)
+        present = (full > 0) & (shared >= 0)
+        width = max(int(present.sum(axis=1).max()) if len(full) else 0, 1)
+        columns = np.full((len(full), width), len(self.species), dtype=np.int64)
+        values = np.zeros((len(full), width), dtype=np.float32)
+        rows, cols = np.nonzero(present)
+        slots = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        columns[rows, slots] = shared[cols]
+        values[rows, slots] = full[rows, cols]
+        padded = np.hstack([self.cover, np.zeros((len(self.cover), 1), dtype=np.float32)])
+
+        if exhaustive:
+            queries = np.repeat(np.arange(len(full)), len(self.releves))
+            candidates = np.tile(np.arange(len(self.releves)), len(full))
+        else:
+            queries, candidates = self.candidate_pairs(signatures)
+            # Queries the buckets cannot fill fall back to every indexed relevé
+            short = np.flatnonzero(np.bincount(queries, minlength=len(full)) < k)
+            if len(short):
+                kept = ~np.isin(queries, short)
+                queries = np.concatenate([queries[kept], np.repeat(short, len(self.releves))])
+                candidates = np.concatenate([candidates[kept], np.tile(np.arange(len(self.releves)), len(short))])
+
+        # Bray-Curtis = 1 - 2 * sum(min(x, y)) / (sum(x) + sum(y)); only the
+        # query's shared species can contribute to the minimum
+        dissimilarity = np.empty(len(queries))
+        jaccard = np.empty(len(queries))
+        for start in range(0, len(queries), PAIR_CHUNK):
+            q, c = queries[start:start + PAIR_CHUNK], candidates[start:start + PAIR_CHUNK]
+            common = np.minimum(values[q], padded[c[:, None], columns[q]]).sum(axis=1)
+            dissimilarity[start:start + PAIR_CHUNK] = 1 - 2 * common / (totals[q] + self.totals[c])
+            jaccard[start:start + PAIR_CHUNK] = (signatures[q] == self.signatures[c]).mean(axis=1)
+
+        order = np.lexsort((candidates, dissimilarity, queries))
+        queries, candidates = queries[order], candidates[order]
+        dissimilarity, jaccard = dissimilarity[order], jaccard[order]
+        starts = np.flatnonzero(np.r_[True, queries[1:] != queries[:-1]]) if len(queries) else np.empty(0, dtype=np.int64)
+        rank = np.arange(len(queries)) - np.repeat(starts, np.diff(np.r_[starts, len(queries)]))
+        keep = rank < k
+
+        return pd.DataFrame({
+            'QUERY_RELEVE': np.asarray(query_releves)[queries[keep]],
+            'RANK': rank[keep] + 1,
+            'RELEVE': self.releves[candidates[keep]],
+            'BRAY_CURTIS': dissimilarity[keep].round(4) + 0.0,
+            'JACCARD_ESTIMATE': jaccard[keep].round(3)
+        })
+
+def main():
+    parser = argparse.ArgumentParser(description='Find the most floristically similar relevés of a reference survey')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    scales = sorted(SCALE_VALUES.keys() - {'braun-blanquet'})
+
+    build = subparsers.add_parser('build', help='Build and save a similarity index')
+    build.add_argument('reference_file', help='Reference relevé CSV, e.g. RELEVE_SP_DATA.txt')
+    build.add_argument('index_file', help='Output index (.npz)')
+    build.add_argument('-s', '--scale', choices=scales, default='domin', help='Cover scale of the reference file')
+    build.add_argument('--num-perm', type=int, default=128, help='MinHash functions per signature')
+    build.add_argument('--bands', type=int, default=64, help='LSH bands (num-perm must divide evenly)')
+    build.add_argument('--seed', type=int, default=0, help='Seed for the hash functions')
+
+    query = subparsers.add_parser('query', help='Find the nearest indexed relevés for every relevé of a survey')
+    query.add_argument('index_file', help='Index built with the build command')
+    query.add_argument('query_file', help='Relevé CSV to classify, e.g. COMBINED_MID_RANGE.csv')
+    query.add_argument('-s', '--scale', choices=scales, default='mid-range', help='Cover scale of the query file')
+    query.add_argument('-k', type=int, default=5, help='Neighbours per relevé')
+    query.add_argument('--lsh', action='store_true',
+                       help='Compare only relevés sharing an LSH bucket (approximate; exact search is the default)')
+    query.add_argument('-o', '--output', help='Write the neighbours to this CSV')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'build':
+            index = SimilarityIndex.build(load_survey(args.reference_file), args.scale,
+                                          args.num_perm, args.bands, args.seed)
+            index.save(args.index_file)
+            print(f"Indexed {len(index.releves)} relevés and {len(index.species)} species; saved to {args.index_file}")
+        else:
+            index = SimilarityIndex.load(args.index_file)
+            neighbours = index.query(load_survey(args.query_file), args.scale, args.k, not args.lsh)
+            if args.output:
+                neighbours.to_csv(args.output, index=False)
+                print(f"Neighbours of {neighbours['QUERY_RELEVE'].nunique()} relevés saved to {args.output}")
+            else:
+                print(neighbours.to_string(index=False))
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
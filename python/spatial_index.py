@@ -0,0 +1,262 @@
+import argparse
+import sys
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_M = 6371008.8
+
+def load_coordinates(paths):
+    """Load one or more relevé coordinate CSVs (Latitude, Longitude, Releve[, Grid]) into one DataFrame."""
+    frames = []
+    for path in paths:
+        df = pd.read_csv(path)
+        if not all(field in df.columns for field in ['Latitude', 'Longitude', 'Releve']):
+            raise ValueError(f"{path} must contain Latitude, Longitude and Releve columns")
+        if 'Grid' not in df.columns:
+            df['Grid'] = -1
+        df['Source'] = str(path)
+        frames.append(df[['Latitude', 'Longitude', 'Releve', 'Grid', 'Source']])
+
+    coords = pd.concat(frames, ignore_index=True)
+    coords = coords.dropna(subset=['Latitude', 'Longitude'])
+    return coords.reset_index(drop=True)
+
+def project_coordinates(latitudes, longitudes, origin=None):
+    """
+    Project lat/lon in degrees to local x/y in metres.
+
+    Uses an equirectangular projection about `origin` (lat, lon), which is
+    accurate to well under a metre across a site the size of Site 68.
+    Defaults to the centroid of the points.
+    """
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+
+    if origin is None:
+        lat0, lon0 = lat.mean(), lon.mean()
+    else:
+        lat0, lon0 = np.radians(origin[0]), np.radians(origin[1])
+
+    x = EARTH_RADIUS_M * (lon - lon0) * np.cos(lat0)
+    y = EARTH_RADIUS_M * (lat - lat0)
+    return np.column_stack([x, y])
+
+class GridIndex:
+    """Uniform grid hash over 2-D points for radius and nearest-neighbour queries."""
+
+    def __init__(self, points, cell_size):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.cell_size = float(cell_size)
+        if self.cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+
+        cells = np.floor(self.points / self.cell_size).astype(np.int64)
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        sorted_cells = cells[order]
+
+        self.buckets = {}
+        if len(order):
+            breaks = np.flatnonzero(np.any(np.diff(sorted_cells, axis=0) != 0, axis=1)) + 1
+            starts = np.concatenate([[0], breaks])
+            ends = np.concatenate([breaks, [len(order)]])
+            for start, end in zip(starts, ends):
+                cx, cy = sorted_cells[start]
+                self.buckets[(int(cx), int(cy))] = order[start:end]
+            self._min_cell = cells.min(axis=0)
+            self._max_cell = cells.max(axis=0)
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cell_of(self, point):
+        return np.floor(np.asarray(point, dtype=float) / self.cell_size).astype(np.int64)
+
+    def _square(self, cell, reach):
+        """Cell bounds (x0, x1, y0, y1) of the square `reach` cells around `cell`, clamped to the occupied cells."""
+        return (max(int(cell[0]) - reach, int(self._min_cell[0])), min(int(cell[0]) + reach, int(self._max_cell[0])),
+                max(int(cell[1]) - reach, int(self._min_cell[1])), min(int(cell[1]) + reach, int(self._max_cell[1])))
+
+    def _candidates(self, cell, reach):
+        """Indices of points in the square of cells `reach` cells around `cell`."""
+        x0, x1, y0, y1 = self._square(cell, reach)
+        found = [
+            self.buckets[(x, y)]
+            for x in range(x0, x1 + 1)
+            for y in range(y0, y1 + 1)
+            if (x, y) in self.buckets
+        ]
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(found)
+
+    def query_radius(self, point, radius):
+        """Return (distances, indices) of all points within `radius`, nearest first."""
+        if not len(self.points):
+            return np.empty(0), np.empty(0, dtype=np.int64)
+
+        point = np.asarray(point, dtype=float)
+        reach = int(np.ceil(radius / self.cell_size))
+        candidates = self._candidates(self._cell_of(point), reach)
+        distances = np.hypot(*(self.points[candidates] - point).T)
+        keep = distances <= radius
+        order = np.argsort(distances[keep], kind='stable')
+        return distances[keep][order], candidates[keep][order]
+
+    def query_knn(self, point, k=1):
+        """Return (distances, indices) of the `k` nearest points, nearest first."""
+        k = min(k, len(self.points))
+        if k <= 0:
+            return np.empty(0), np.empty(0, dtype=np.int64)
+
+        point = np.asarray(point, dtype=float)
+        cell = self._cell_of(point)
+        bounds = (int(self._min_cell[0]), int(self._max_cell[0]), int(self._min_cell[1]), int(self._max_cell[1]))
+
+        # Grow the search square, starting from the first one that reaches the
+        # data, until the k-th hit is provably inside it; once the square covers
+        # all occupied cells, or more cells than there are points, scan every point
+        reach = max(0, int(np.max(np.concatenate([self._min_cell - cell, cell - self._max_cell]))))
+        while True:
+            x0, x1, y0, y1 = square = self._square(cell, reach)
+            if square == bounds or (x1 - x0 + 1) * (y1 - y0 + 1) >= len(self.points):
+                candidates = np.arange(len(self.points))
+            else:
+                candidates = self._candidates(cell, reach)
+            if len(candidates) >= k:
+                distances = np.hypot(*(self.points[candidates] - point).T)
+                order = np.argsort(distances, kind='stable')[:k]
+                if len(candidates) == len(self.points) or distances[order[-1]] <= reach * self.cell_size:
+                    return distances[order], candidates[order]
+            reach += 1
+
+    def query_knn_batch(self, points, k=1):
+        """Run `query_knn` for every row of `points`; missing neighbours are padded with inf / -1."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        distances = np.full((len(points), k), np.inf)
+        indices = np.full((len(points), k), -1, dtype=np.int64)
+        for i, point in enumerate(points):
+            d, idx = self.query_knn(point, k)
+            distances[i, :len(d)] = d
+            indices[i, :len(idx)] = idx
+        return distances, indices
+
+def match_releves(coords_a, coords_b, max_distance):
+    """
+    Pair each relevé in `coords_a` with its nearest relevé in `coords_b`
+    that lies within `max_distance` metres.
+
+    Both frames are projected about a common origin so distances are comparable.
+    """
+    origin = (
+        np.concatenate([coords_a['Latitude'], coords_b['Latitude']]).mean(),
+        np.concatenate([coords_a['Longitude'], coords_b['Longitude']]).mean()
+    )
+    points_a = project_coordinates(coords_a['Latitude'], coords_a['Longitude'], origin)
+    points_b = project_coordinates(coords_b['Latitude'], coords_b['Longitude'], origin)
+
+    index = GridIndex(points_b, cell_size=max(max_distance, 1.0))
+    distances, indices = index.query_knn_batch(points_a, k=1)
+    distances, indices = distances[:, 0], indices[:, 0]
+    matched = (indices >= 0) & (distances <= max_distance)
+
+    return pd.DataFrame({
+        'RELEVE_A': coords_a['Releve'].to_numpy()[matched],
+        'RELEVE_B': coords_b['Releve'].to_numpy()[indices[matched]],
+        'DISTANCE_M': np.round(distances[matched], 2)
+    })
+
+def flag_edge_releves(coords, buffer_m):
+    """
+    Flag relevés lying within `buffer_m` metres of a grid boundary.
+
+    Grid polygons are not surveyed, so the boundary between two grids is
+    taken as the perpendicular bisector between their relevés: a relevé is
+    within the buffer when a relevé of another grid lies within twice the
+    buffer. Returns a copy of `coords` with EDGE_DISTANCE_M (NaN when no
+    other grid is in range) and EDGE_EFFECT columns.
+    """
+    points = project_coordinates(coords['Latitude'], coords['Longitude'])
+    grids = coords['Grid'].to_numpy()
+    index = GridIndex(points, cell_size=max(2 * buffer_m, 1.0))
+
+    edge_distance = np.full(len(points), np.nan)
+    for i, point in enumerate(points):
+        distances, indices = index.query_radius(point, 2 * buffer_m)
+        other = grids[indices] != grids[i]
+        if other.any():
+            edge_distance[i] = distances[other][0] / 2
+
+    flagged = coords.copy()
+    flagged['EDGE_DISTANCE_M'] = np.round(edge_distance, 2)
+    flagged['EDGE_EFFECT'] = ~np.isnan(edge_distance)
+    return flagged
+
+def remove_edge_releves(dataset_file, coords, buffer_m, output_file):
+    """Write `dataset_file` without the relevés flagged by `flag_edge_releves`."""
+    flagged = flag_edge_releves(coords, buffer_m)
+    edge_ids = set(flagged.loc[flagged['EDGE_EFFECT'], 'Releve'].astype(int))
+
+    df = pd.read_csv(dataset_file)
+    kept = df[~df['RELEVE_ID'].isin(edge_ids)]
+    kept.to_csv(output_file, index=False)
+    print(f"Removed {len(df) - len(kept)} rows from {len(edge_ids)} edge relevés; saved to {output_file}")
+    return sorted(edge_ids)
+
+def main():
+    parser = argparse.ArgumentParser(description='Spatial queries over relevé coordinates')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    match_parser = subparsers.add_parser('match', help='Match relevés of one survey to the nearest relevé of another')
+    match_parser.add_argument('coords_a', help='Coordinate CSV of the first survey')
+    match_parser.add_argument('coords_b', help='Coordinate CSV of the second survey')
+    match_parser.add_argument('-d', '--within', type=float, default=50.0, help='Maximum distance in metres')
+    match_parser.add_argument('-o', '--output', help='Write the matched pairs to this CSV')
+
+    nearest_parser = subparsers.add_parser('nearest', help='List the k nearest relevés to a point')
+    nearest_parser.add_argument('coords', nargs='+', help='Coordinate CSV files')
+    nearest_parser.add_argument('--lat', type=float, required=True)
+    nearest_parser.add_argument('--lon', type=float, required=True)
+    nearest_parser.add_argument('-k', type=int, default=5)
+
+    edge_parser = subparsers.add_parser('edges', help='Flag relevés close to a grid boundary')
+    edge_parser.add_argument('coords', nargs='+', help='Coordinate CSV files with a Grid column')
+    edge_parser.add_argument('-b', '--buffer', type=float, default=20.0, help='Buffer distance in metres')
+    edge_parser.add_argument('--dataset', help='Survey CSV to filter (e.g. COMBINED_MID_RANGE.csv)')
+    edge_parser.add_argument('-o', '--output', help='Output CSV for the filtered dataset')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'match':
+            pairs = match_releves(load_coordinates([args.coords_a]), load_coordinates([args.coords_b]), args.within)
+            if args.output:
+                pairs.to_csv(args.output, index=False)
+                print(f"Matched {len(pairs)} relevés; saved to {args.output}")
+            else:
+                print(pairs.to_string(index=False))
+
+        elif args.command == 'nearest':
+            coords = load_coordinates(args.coords)
+            origin = (coords['Latitude'].mean(), coords['Longitude'].mean())
+            points = project_coordinates(coords['Latitude'], coords['Longitude'], origin)
+            query = project_coordinates([args.lat], [args.lon], origin)[0]
+            distances, indices = GridIndex(points, cell_size=25.0).query_knn(query, args.k)
+            for distance, i in zip(distances, indices):
+                print(f"Releve {coords.at[i, 'Releve']:<6} Grid {coords.at[i, 'Grid']:<4} {distance:8.1f} m")
+
+        elif args.command == 'edges':
+            coords = load_coordinates(args.coords)
+            if args.dataset:
+                if not args.output:
+                    parser.error("--output is required with --dataset")
+                edge_ids = remove_edge_releves(args.dataset, coords, args.buffer, args.output)
+                print(f"Edge relevés: {', '.join(str(r) for r in edge_ids)}")
+            else:
+                flagged = flag_edge_releves(coords, args.buffer)
+                print(flagged[flagged['EDGE_EFFECT']][['Releve', 'Grid', 'EDGE_DISTANCE_M']].to_string(index=False))
+    except (FileNotFoundError, ValueError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
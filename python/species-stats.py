@@ -1,4 +1,4 @@
-import csv
+import argparse
 import sys
 import json
 import subprocess
@@ -6,85 +6,70 @@ from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 import shutil
+import numpy as np
+import pandas as pd
 from jinja2 import Template
 from jinja2 import Environment, FileSystemLoader
+from management import MANAGEMENT_TYPES, classify_releve, classify_releves
+from community_matrix import load_survey, releve_labels, label_releve_ids
+from species_accumulation import accumulation_by_group
+from species_ranking import top_species
+from temporal_turnover import load_surveys, turnover_analysis
+from management_bootstrap import bootstrap_management
+from indicator_species import indicator_species, management_groups, indicators_by_group
+from releve_records import records_from_frame, first_seen_order
+from releve_validation import UNUSABLE_CHECKS, load_releves, load_vocabulary, format_report
+from landmark_ordination import ordination_diagnostics
 
 def analyze_species_data(file_path):
     """Analyze species data and return comprehensive statistics."""
-    species_data = defaultdict(list)
-    species_scores = defaultdict(float)
-    unique_species = set()
-    species_per_releve = defaultdict(set)
-    unique_releve_ids = set()
-    total_domin_score = 0.0
-    
     try:
-        with open(file_path, mode='r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            if not all(field in reader.fieldnames for field in ['RELEVE_ID', 'SPECIES_NAME', 'DOMIN']):
-                raise ValueError("CSV file must contain RELEVE_ID, SPECIES_NAME, and DOMIN columns")
-                
-            for row in reader:
-                releve_id = int(row['RELEVE_ID'])
-                species_name = row['SPECIES_NAME']
-                domin_score = float(row['DOMIN'])
-                
-                species_data[releve_id].append({
-                    'name': species_name,
-                    'score': domin_score
-                })
-                
-                species_scores[species_name] += domin_score
-                unique_species.add(species_name)
-                unique_releve_ids.add(releve_id)
-                total_domin_score += domin_score
-                species_per_releve[releve_id].add(species_name)
-                
+        df, report = load_releves(file_path, scale=None, vocabulary=load_vocabulary(),
+                                  drop_invalid=UNUSABLE_CHECKS)
+        if report['errors']:
+            print(format_report(report), file=sys.stderr)
+        records = records_from_frame(df)
     except Exception as e:
         print(f"Error analyzing data: {str(e)}")
         raise
     
-    if not species_scores:
+    if not len(records):
         raise ValueError("No valid data found in the file")
     
-    # Classify by management type
-    management_data = {
-        'Grazing+Fertiliser': {'releves': [], 'species': defaultdict(float)},
-        'Mowing+Fertiliser': {'releves': [], 'species': defaultdict(float)},
-        'Organic': {'releves': [], 'species': defaultdict(float)}
-    }
+    species = records.species
+    totals = records.species_totals()
+    species_scores = defaultdict(float, zip(species, totals.tolist()))
     
-    for releve_id, records in species_data.items():
-        if 1 <= releve_id <= 10:
-            mgmt = 'Grazing+Fertiliser'
-        elif 28 <= releve_id <= 38:
-            mgmt = 'Mowing+Fertiliser'
-        else:
-            mgmt = 'Organic'
-            
-        management_data[mgmt]['releves'].append(releve_id)
-        for r in records:
-            management_data[mgmt]['species'][r['name']] += r['score']
+    # Classify by management type, visiting relevés in the order they first appear
+    releve_codes, releve_ids = pd.factorize(records.releve_ids, sort=False)
+    releve_mgmt = np.array([classify_releve(int(releve_id)) for releve_id in releve_ids])
+    by_releve = np.argsort(releve_codes, kind='stable')
+    row_mgmt = releve_mgmt[releve_codes[by_releve]]
     
     # Calculate management-level stats
     management_stats = {}
-    for mgmt, data in management_data.items():
-        total_score = sum(data['species'].values())
+    for mgmt in MANAGEMENT_TYPES:
+        rows = by_releve[row_mgmt == mgmt]
+        sums = records.species_totals(rows).tolist()
+        proportions = defaultdict(float, ((species[code], sums[code])
+                                          for code in first_seen_order(records.species_codes[rows]).tolist()))
+        total_score = sum(proportions.values())
         if total_score > 0:
-            top_species = max(data['species'].items(), key=lambda x: x[1])
+            name, score = top_species(proportions, 1)[0]
             management_stats[mgmt] = {
-                'releve_count': len(data['releves']),
+                'releve_count': int((releve_mgmt == mgmt).sum()),
                 'total_score': total_score,
-                'top_species': top_species[0],
-                'top_score': top_species[1],
-                'species_proportions': data['species']
+                'top_species': name,
+                'top_score': score,
+                'species_proportions': proportions
             }
     
     return {
         'management_stats': management_stats,
-        'unique_species': unique_species,
-        'unique_releve_ids': unique_releve_ids,
-        'total_domin_score': total_domin_score,
+        'species_scores': species_scores,
+        'unique_species': set(species),
+        'unique_releve_ids': set(releve_ids.tolist()),
+        'total_domin_score': records.total_domin(),
         'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
 
@@ -132,7 +117,8 @@ def run_r_nmds_analysis(csv_path, output_dir):
             'error': str(e)
         }
 
-def generate_html_report(results, input_filename, output_dir="../docs", template_file="../templates/report_template.html"):
+def generate_html_report(results, input_filename, output_dir="../docs", template_file="../templates/report_template.html",
+                         turnover=None, ordination=False):
     try:
         # Set up paths
         output_path = Path(output_dir)
@@ -154,12 +140,37 @@ def generate_html_report(results, input_filename, output_dir="../docs", template
             nmds_svg_exists = True
 
         # Find overall top species
-        all_species = {}
-        for mgmt, stats in results['management_stats'].items():
-            for species, score in stats['species_proportions'].items():
-                all_species[species] = all_species.get(species, 0) + score
+        overall_top = top_species(results['species_scores'], 1)
+        top_name, top_score = overall_top[0] if overall_top else ("N/A", 0)
+
+        # Species accumulation per management type, to judge survey effort
+        survey = load_survey(input_filename)
+        accumulation = accumulation_by_group(survey, by_management=True, permutations=200)
+
+        # Resampled relevés give intervals around each management type's statistics
+        bootstrap = bootstrap_management(survey, replicates=1000, top=5)
+
+        # Species characterising each management type, with permutation p-values;
+        # a survey of a single management type has nothing to contrast
+        matrix, labels, species = management_groups(survey)
+        indicators = None
+        if len(labels.remove_unused_categories().categories) >= 2:
+            indicators = indicators_by_group(indicator_species(matrix, labels, species, permutations=9999), top=5)
 
-        top_species, top_score = (max(all_species.items(), key=lambda x: x[1]) if all_species else ("N/A", 0))
+        # Landmark NMDS, checked against a full NMDS while the survey is small enough;
+        # only on request, as the full NMDS dominates the report's run time, and
+        # left out when there are too few relevés to ordinate in three dimensions
+        if ordination and releve_labels(survey).nunique() >= 3 + 2:
+            _, coordinates, ordination = ordination_diagnostics(survey, landmarks=25, k=3)
+            coordinates['MANAGEMENT'] = classify_releves(label_releve_ids(survey, coordinates['RELEVE']).astype(int))
+            ordination['groups'] = {
+                mgmt: {'x': rows['MDS1'].round(4).tolist(), 'y': rows['MDS2'].round(4).tolist(),
+                       'releves': rows['RELEVE'].tolist(),
+                       'symbols': np.where(rows['LANDMARK'], 'diamond', 'circle').tolist()}
+                for mgmt, rows in coordinates.groupby('MANAGEMENT', sort=False)
+            }
+        else:
+            ordination = None
 
         # Prepare management types for template
         management_types = {
@@ -177,11 +188,16 @@ def generate_html_report(results, input_filename, output_dir="../docs", template
             'timestamp': results['timestamp'],
             'total_releves': len(results['unique_releve_ids']),
             'unique_species_count': len(results['unique_species']),
-            'top_species': top_species,
+            'top_species': top_name,
             'top_score': top_score,
             'nmds_stress': float(nmds_result['metrics'].get('stress_value', 0)),
             'nmds_metrics': nmds_result['metrics'],
             'management_stats': management_types,
+            'accumulation': accumulation,
+            'turnover': turnover,
+            'bootstrap': bootstrap,
+            'indicators': indicators,
+            'ordination': ordination,
             'nmds_svg_exists': nmds_svg_exists,
             'input_filename': input_path.name
         }
@@ -199,11 +215,16 @@ def generate_html_report(results, input_filename, output_dir="../docs", template
         raise       
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python species_analysis.py <input_file.csv>")
-        sys.exit(1)
-    
-    input_file = sys.argv[1]
+    parser = argparse.ArgumentParser(description='Generate the species statistics HTML report')
+    parser.add_argument('input_file', help='Relevé CSV file')
+    parser.add_argument('-c', '--compare', nargs=2, action='append', metavar=('LABEL', 'CSV'), default=[],
+                        help='Earlier survey to report species turnover against, oldest first')
+    parser.add_argument('-l', '--label', default=None, help='Label of the input survey in the turnover table')
+    parser.add_argument('--ordination', action='store_true',
+                        help='Add the landmark ordination card (with a full NMDS check for surveys of up to 500 relevés)')
+    args = parser.parse_args()
+
+    input_file = args.input_file
     try:
         input_path = Path(input_file)
         if not input_path.exists():
@@ -211,7 +232,13 @@ if __name__ == "__main__":
             sys.exit(1)
             
         results = analyze_species_data(input_file)
-        output_file = generate_html_report(results, input_file)
+
+        turnover = None
+        if args.compare:
+            surveys, species = load_surveys(args.compare + [(args.label or input_path.stem, input_file)])
+            turnover = turnover_analysis(surveys, species)[1]
+
+        output_file = generate_html_report(results, input_file, turnover=turnover, ordination=args.ordination)
         
         if output_file:
             print(f"Open file://{Path(output_file).absolute()} in your browser")
@@ -1,6 +1,6 @@
-import urllib.request
 from io import StringIO
 import re
+from dataset_fetcher import fetch_text
 
 def process_species_list(species_list):
     """
@@ -52,9 +52,8 @@ def read_species_from_url(url):
     Read species list from a URL and return as a list of strings.
     """
     try:
-        with urllib.request.urlopen(url) as response:
-            data = response.read().decode('utf-8')
-            return [line.strip() for line in StringIO(data).readlines() if line.strip()]
+        data = fetch_text(url)
+        return [line.strip() for line in StringIO(data).readlines() if line.strip()]
     except Exception as e:
         print(f"Error reading from URL: {e}")
         return None
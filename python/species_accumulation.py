@@ -0,0 +1,191 @@
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+from community_matrix import load_survey, community_matrix, incidence_bits
+from management import classify_releves
+
+RARE_INCIDENCE = 10  # ICE treats species found in at most this many relevés as infrequent
+
+def _popcount(words):
+    """Number of set bits along the last axis of a uint64 array."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    return np.unpackbits(words.view(np.uint8), axis=-1).sum(axis=-1, dtype=np.int64)
+
+def accumulation_batch(bits, permutations, seed):
+    """
+    Species counts after 1..R relevés for `permutations` random relevé orders.
+
+    All orders advance together: each step ORs the next relevé's species
+    bits into a (permutations x words) accumulator and counts the set bits.
+    Runs in a worker process; `seed` makes the batch reproducible.
+    """
+    rng = np.random.default_rng(seed)
+    releve_count = len(bits)
+    orders = rng.permuted(np.tile(np.arange(releve_count), (permutations, 1)), axis=1)
+
+    seen = np.zeros((permutations, bits.shape[1]), dtype=np.uint64)
+    counts = np.empty((permutations, releve_count), dtype=np.int16)
+    for step in range(releve_count):
+        seen |= bits[orders[:, step]]
+        counts[:, step] = _popcount(seen)
+    return counts
+
+def accumulation_curve(bits, permutations=1000, workers=None, seed=0, batch_size=200):
+    """
+    Species accumulation curve over random relevé orders.
+
+    Permutations are split into batches spread over a process pool, each
+    with its own child seed of `seed`, so results do not depend on the
+    number of workers. Returns the mean curve with its standard deviation
+    and 95% interval.
+    """
+    batches = [min(batch_size, permutations - start) for start in range(0, permutations, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+
+    if workers == 1 or len(batches) == 1:
+        results = [accumulation_batch(bits, size, child) for size, child in zip(batches, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(accumulation_batch, [bits] * len(batches), batches, seeds))
+
+    counts = np.concatenate(results)
+    lower, upper = np.percentile(counts, [2.5, 97.5], axis=0)
+    return {
+        'mean': counts.mean(axis=0).round(3).tolist(),
+        'sd': counts.std(axis=0).round(3).tolist(),
+        'lower': lower.tolist(),
+        'upper': upper.tolist()
+    }
+
+def rarefaction_curve(incidence):
+    """
+    Expected richness of 1..R relevés drawn without replacement (Mao Tau).
+
+    S(m) = S_obs - sum_j Q_j * C(R - j, m) / C(R, m), where Q_j is the number
+    of species found in exactly j relevés. Computed in log space from a
+    table of log-factorials, one row per incidence class.
+    """
+    releve_count = incidence.shape[0]
+    frequencies = np.asarray(incidence > 0).sum(axis=0)
+    frequencies = frequencies[frequencies > 0]
+    classes, class_counts = np.unique(frequencies, return_counts=True)
+
+    log_factorial = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, releve_count + 1)))])
+    m = np.arange(1, releve_count + 1)
+    remaining = releve_count - classes[:, None]
+    possible = remaining >= m
+    log_alpha = (log_factorial[np.clip(remaining, 0, None)]
+                 - log_factorial[np.clip(remaining - m, 0, None)]
+                 - log_factorial[releve_count]
+                 + log_factorial[releve_count - m])
+    alpha = np.where(possible, np.exp(np.where(possible, log_alpha, 0)), 0.0)
+    return (len(frequencies) - (class_counts[:, None] * alpha).sum(axis=0)).round(3).tolist()
+
+def richness_estimators(incidence):
+    """
+    Incidence-based richness estimators for a relevé x species matrix.
+
+    'chao' is the bias-corrected Chao estimator for incidence data (Chao2),
+    S_obs + (R - 1)/R * Q1 (Q1 - 1) / (2 (Q2 + 1)), the counterpart of Chao1
+    when cover rather than individuals is recorded.
+    'ice' is the incidence-based coverage estimator.
+    """
+    present = np.asarray(incidence > 0)
+    releve_count = present.shape[0]
+    frequencies = present.sum(axis=0)
+    frequencies = frequencies[frequencies > 0]
+    observed = len(frequencies)
+    q1 = int((frequencies == 1).sum())
+    q2 = int((frequencies == 2).sum())
+
+    correction = (releve_count - 1) / releve_count if releve_count else 0
+    chao = observed + correction * q1 * (q1 - 1) / (2 * (q2 + 1))
+
+    rare = frequencies <= RARE_INCIDENCE
+    rare_species = int(rare.sum())
+    rare_incidences = int(frequencies[rare].sum())
+    rare_columns = np.flatnonzero(present.any(axis=0))[rare]
+    rare_releves = int(present[:, rare_columns].any(axis=1).sum())
+
+    if rare_incidences == 0 or q1 == rare_incidences:
+        ice = float(observed)  # no infrequent species, or too few to estimate coverage
+    else:
+        coverage = 1 - q1 / rare_incidences
+        j = frequencies[rare]
+        gamma = rare_species / coverage * rare_releves / max(rare_releves - 1, 1) \
+            * (j * (j - 1)).sum() / rare_incidences ** 2 - 1
+        ice = (observed - rare_species) + rare_species / coverage + q1 / coverage * max(gamma, 0)
+
+    return {
+        'releves': int(releve_count),
+        'observed': observed,
+        'uniques': q1,
+        'duplicates': q2,
+        'chao': round(float(chao), 2),
+        'ice': round(float(ice), 2)
+    }
+
+def accumulation_by_group(df, by_management=False, permutations=1000, workers=None, seed=0):
+    """Accumulation, rarefaction and estimators for a survey, optionally per management type."""
+    groups = {'All relevés': df}
+    if by_management:
+        labels = classify_releves(df['RELEVE_ID'].to_numpy())
+        for mgmt in sorted(set(labels)):
+            groups[mgmt] = df[labels == mgmt]
+
+    results = {}
+    for label, group in groups.items():
+        matrix, _, _ = community_matrix(group)
+        results[label] = {
+            'estimators': richness_estimators(matrix),
+            'rarefaction': rarefaction_curve(matrix),
+            'accumulation': accumulation_curve(incidence_bits(matrix), permutations, workers, seed)
+        }
+    return results
+
+def format_estimators_table(results):
+    """Format the richness estimators of each group as a readable table."""
+    name_width = max(len(label) for label in results) + 2
+    header = f"{'Group'.ljust(name_width)} {'Relevés':>8} {'S_obs':>7} {'Q1':>5} {'Q2':>5} {'Chao':>8} {'ICE':>8}"
+    rows = [header, "-" * len(header)]
+    for label, result in results.items():
+        e = result['estimators']
+        rows.append(f"{label.ljust(name_width)} {e['releves']:>8} {e['observed']:>7} {e['uniques']:>5} "
+                    f"{e['duplicates']:>5} {e['chao']:>8.1f} {e['ice']:>8.1f}")
+    return "\n".join(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description='Species accumulation, rarefaction and richness estimators')
+    parser.add_argument('input_files', nargs='+', help='Relevé CSV files (one dataset each)')
+    parser.add_argument('-m', '--by-management', action='store_true',
+                        help='Also split each dataset by management type (Site 68 RELEVE_ID ranges)')
+    parser.add_argument('-p', '--permutations', type=int, default=1000, help='Random relevé orders per curve')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('-o', '--output', help='Write the curves to this JSON file')
+
+    args = parser.parse_args()
+
+    curves = {}
+    try:
+        for input_file in args.input_files:
+            df = load_survey(input_file)
+            results = accumulation_by_group(df, args.by_management, args.permutations, args.workers, args.seed)
+            print(f"\n=== {Path(input_file).name} ===")
+            print(format_estimators_table(results))
+            curves[Path(input_file).stem] = results
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(curves, f)
+        print(f"\nCurves saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,14 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import argparse
 import sys
+from species_ranking import rank_species
 
 def create_dominance_chart(csv_path, output_svg="dominant_species.svg", top_n=5, label=None):
     """Create a compact dominance pie chart from CSV data"""
     try:
         # Read and process data
         df = pd.read_csv(csv_path)
-        species_totals = df.groupby("SPECIES_NAME")["DOMIN"].sum().reset_index()
-        top_species = species_totals.sort_values("DOMIN", ascending=False).head(top_n)
+        top_species = rank_species(df, n=top_n)
 
         # Setup compact figure
         plt.figure(figsize=(4, 3))
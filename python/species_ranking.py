@@ -0,0 +1,111 @@
+import argparse
+import heapq
+import sys
+import numpy as np
+import pandas as pd
+from community_matrix import load_survey
+from management import classify_releves
+
+GROUPINGS = ['SITE_ID', 'GRID_NO', 'management']
+
+def top_species(species_scores, n=50):
+    """
+    Return the top n (species, score) pairs of a species -> score mapping.
+
+    Uses a bounded heap, so only n items are ever ordered. Ties are broken
+    by species name, so equal scores always come out in the same order.
+    """
+    return heapq.nsmallest(n, species_scores.items(), key=lambda x: (-x[1], x[0]))
+
+def group_labels(df, by):
+    """Group label of each row: a column of `df`, or 'management' for the Site 68 RELEVE_ID ranges."""
+    if by == 'management':
+        return pd.Series(classify_releves(df['RELEVE_ID'].to_numpy()), index=df.index)
+    if by not in df.columns:
+        raise ValueError(f"CSV file has no {by} column to group by")
+    return df[by]
+
+def rank_codes(group_codes, species_codes, scores, n):
+    """
+    Top-n species of every group at once, from coded arrays.
+
+    Sums `scores` per (group, species) pair, then orders all pairs by group,
+    descending score and species code with a single lexsort and keeps the
+    first n of each group. Cost depends on the number of distinct pairs,
+    not on the number of groups. Returns (group, species, score, rank) arrays.
+    """
+    species_count = int(species_codes.max()) + 1 if len(species_codes) else 1
+    pair_keys, pair_codes = np.unique(group_codes.astype(np.int64) * species_count + species_codes,
+                                      return_inverse=True)
+    pair_scores = np.bincount(pair_codes.ravel(), weights=scores, minlength=len(pair_keys))
+    groups = pair_keys // species_count
+    species = pair_keys % species_count
+
+    order = np.lexsort((species, -pair_scores, groups))
+    groups, species, pair_scores = groups[order], species[order], pair_scores[order]
+
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    rank = np.arange(len(groups)) - np.repeat(starts, np.diff(np.r_[starts, len(groups)]))
+    keep = rank < n
+    return groups[keep], species[keep], pair_scores[keep], rank[keep] + 1
+
+def rank_species(df, by=None, n=10):
+    """
+    Rank species by summed DOMIN score, overall or within each group.
+
+    `by` is None for an overall ranking, or one or more of SITE_ID, GRID_NO
+    and 'management'. Species codes are assigned in name order, so ties are
+    broken alphabetically. Rows without a species name or a group label
+    (such as a blank GRID_NO) are left out, as factorize would code them -1
+    and corrupt the packed (group, species) keys. Returns a DataFrame with
+    the group columns, RANK, SPECIES_NAME and DOMIN.
+    """
+    by = [] if by is None else [by] if isinstance(by, str) else list(by)
+    labels = [group_labels(df, column) for column in by]
+    keep = df['SPECIES_NAME'].notna().to_numpy()
+    for label in labels:
+        keep = keep & label.notna().to_numpy()
+    if not keep.all():
+        df = df[keep]
+        labels = [label[keep] for label in labels]
+
+    species_codes, species = pd.factorize(df['SPECIES_NAME'], sort=True)
+    scores = df['DOMIN'].to_numpy(dtype=float)
+
+    if by:
+        group_codes, group_values = pd.factorize(pd.MultiIndex.from_arrays(labels), sort=True)
+    else:
+        group_codes = np.zeros(len(df), dtype=np.int64)
+
+    groups, codes, totals, ranks = rank_codes(group_codes, species_codes, scores, n)
+
+    ranking = pd.DataFrame({column: group_values.get_level_values(level)[groups] for level, column in enumerate(by)})
+    ranking['RANK'] = ranks
+    ranking['SPECIES_NAME'] = np.asarray(species)[codes]
+    ranking['DOMIN'] = totals
+    return ranking
+
+def main():
+    parser = argparse.ArgumentParser(description='Rank species by summed DOMIN score, overall or per group')
+    parser.add_argument('input_file', help='Relevé CSV file')
+    parser.add_argument('-b', '--by', nargs='+', choices=GROUPINGS, default=None,
+                        help='Rank within each SITE_ID, GRID_NO and/or management type')
+    parser.add_argument('-n', '--top', type=int, default=10, help='Number of species per group')
+    parser.add_argument('-o', '--output', help='Write the ranking to this CSV file')
+
+    args = parser.parse_args()
+
+    try:
+        ranking = rank_species(load_survey(args.input_file), args.by, args.top)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output:
+        ranking.to_csv(args.output, index=False)
+        print(f"Ranking of {len(ranking)} rows written to {args.output}")
+    else:
+        print(ranking.to_string(index=False, float_format=lambda x: f"{x:.1f}"))
+
+if __name__ == "__main__":
+    main()
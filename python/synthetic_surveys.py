@@ -0,0 +1,131 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+SPECIES_LISTS = {
+    'full': "../datasets/generated-data/2007-survey.txt",
+    'grasses': "../datasets/generated-data/2007-survey-grasses.txt",
+    'grasses-with-forbs': "../datasets/generated-data/2007-survey-grasses-with-forbs.txt"
+}
+
+# The three blocks written by generate-data.py
+DEFAULT_GROUPS = [
+    {'name': 'Intensive', 'releves': 20, 'richness': [2, 4], 'pool': 'grasses', 'domin': [7, 10]},
+    {'name': 'Grass with forbs', 'releves': 19, 'richness': [6, 12], 'pool': 'grasses-with-forbs', 'domin': [7, 10]},
+    {'name': 'Traditional', 'releves': 19, 'richness': [15, 25], 'pool': 'full', 'domin': [1, 10]}
+]
+
+def get_species_list(file_path):
+    with open(file_path, 'r') as file:
+        return [line.strip() for line in file if line.strip()]
+
+class SurveyGenerator:
+    """
+    Generates synthetic relevé datasets made of structured groups.
+
+    Each group has its own richness range, species pool and DOMIN range.
+    `effect` scales how far the groups depart from a common baseline: at 1
+    they are as configured, at 0 every group draws from the averaged
+    richness and DOMIN ranges and the full species list, so any difference
+    a test finds is a false positive.
+    """
+
+    def __init__(self, groups=None, species_lists=None):
+        self.groups = groups or DEFAULT_GROUPS
+        lists = {name: get_species_list(path) for name, path in (species_lists or SPECIES_LISTS).items()}
+        if 'full' not in lists:
+            raise ValueError("A 'full' species list is required for the baseline")
+        self.species = sorted(set().union(*lists.values()))
+        index = {name: code for code, name in enumerate(self.species)}
+        self.pools = {}
+        for name, members in lists.items():
+            pool = np.zeros(len(self.species))
+            pool[[index[m] for m in members]] = 1 / len(set(members))
+            self.pools[name] = pool
+
+        for group in self.groups:
+            if group['pool'] not in self.pools:
+                raise ValueError(f"Group '{group['name']}' uses unknown species list '{group['pool']}'")
+            if group['richness'][1] > np.count_nonzero(self.pools[group['pool']]):
+                raise ValueError(f"Group '{group['name']}' asks for more species than its list holds")
+
+        self.labels = np.repeat(np.arange(len(self.groups)), [g['releves'] for g in self.groups])
+        self.baseline_richness = np.mean([g['richness'] for g in self.groups], axis=0)
+        self.baseline_domin = np.mean([g['domin'] for g in self.groups], axis=0)
+
+    def group_parameters(self, group, effect):
+        """Richness range, DOMIN range and species weights of a group at the given effect size."""
+        richness = np.rint(self.baseline_richness + effect * (np.array(group['richness']) - self.baseline_richness))
+        domin = np.rint(self.baseline_domin + effect * (np.array(group['domin']) - self.baseline_domin))
+        weights = effect * self.pools[group['pool']] + (1 - effect) * self.pools['full']
+        return richness.astype(int), domin.astype(int), weights
+
+    def generate(self, effect=1.0, seed=None):
+        """
+        One dataset as a relevé x species DOMIN matrix, with the group of each relevé.
+
+        Species are drawn without replacement with probability proportional
+        to their weight, all relevés of a group at once: adding Gumbel noise
+        to the log weights and keeping each row's largest keys is equivalent
+        to sequential weighted sampling.
+        """
+        rng = np.random.default_rng(seed)
+        matrix = np.zeros((len(self.labels), len(self.species)))
+        start = 0
+        for group in self.groups:
+            (low, high), (domin_low, domin_high), weights = self.group_parameters(group, effect)
+            n = group['releves']
+            with np.errstate(divide='ignore'):
+                keys = np.log(weights) + rng.gumbel(size=(n, len(self.species)))
+            order = np.argsort(-keys, axis=1)
+            richness = np.minimum(rng.integers(low, high, endpoint=True, size=n), np.count_nonzero(weights))
+            chosen = np.arange(len(self.species)) < richness[:, None]
+            rows = np.repeat(np.arange(start, start + n), richness)
+            matrix[rows, order[chosen]] = rng.integers(domin_low, domin_high, endpoint=True, size=chosen.sum())
+            start += n
+        return matrix, self.labels
+
+    def to_frame(self, matrix):
+        """Long RELEVE_ID, SPECIES_NAME, DOMIN format, as written by generate-data.py."""
+        rows, cols = np.nonzero(matrix)
+        return pd.DataFrame({
+            'RELEVE_ID': rows + 1,
+            'SPECIES_NAME': np.asarray(self.species)[cols],
+            'DOMIN': matrix[rows, cols].astype(int)
+        })
+
+def load_groups(path):
+    """Read a group configuration (a JSON list shaped like DEFAULT_GROUPS)."""
+    with open(path, 'r') as f:
+        groups = json.load(f)
+    for group in groups:
+        missing = {'name', 'releves', 'richness', 'pool', 'domin'} - set(group)
+        if missing:
+            raise ValueError(f"Group {group.get('name', '?')} is missing {', '.join(sorted(missing))}")
+    return groups
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic relevé dataset with structured groups')
+    parser.add_argument('-o', '--output', default='generated-data-set.csv', help='Output CSV')
+    parser.add_argument('-e', '--effect', type=float, default=1.0,
+                        help='Effect size: 1 for the configured groups, 0 for no difference between them')
+    parser.add_argument('-g', '--groups', help='JSON file describing the groups (defaults to generate-data.py\'s blocks)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed')
+
+    args = parser.parse_args()
+
+    try:
+        generator = SurveyGenerator(load_groups(args.groups) if args.groups else None)
+        matrix, _ = generator.generate(args.effect, args.seed)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    generator.to_frame(matrix).to_csv(args.output, index=False)
+    print(f"{len(matrix)} relevés written to {Path(args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import argparse
+import json
+import sys
+import numpy as np
+import pandas as pd
+from community_matrix import load_survey, community_matrix, releve_labels
+from domin_scales import SCALE_VALUES, convert_scale
+from spatial_index import load_coordinates, match_releves
+
+MATCH_DISTANCE_M = 50.0
+
+def shared_vocabulary(frames):
+    """
+    Map the species of several surveys onto one vocabulary.
+
+    Names are matched ignoring case and surrounding whitespace, as in
+    docs/species-comparison.py; each species keeps the spelling it was
+    first recorded under. Returns (frames with SPECIES_NAME rewritten,
+    sorted species list).
+    """
+    names = pd.concat([df['SPECIES_NAME'].astype(str).str.strip() for df in frames], ignore_index=True)
+    keys = names.str.lower()
+    canonical = names.groupby(keys, sort=False).first()
+    aligned = [df.assign(SPECIES_NAME=canonical.reindex(df['SPECIES_NAME'].astype(str).str.strip().str.lower()).to_numpy())
+               for df in frames]
+    return aligned, sorted(canonical.unique())
+
+def beta_partition(a, b, c):
+    """
+    Baselga's partition of Sørensen dissimilarity into turnover and nestedness.
+
+    a, b, c are the species shared, found only in the first and only in the
+    second assemblage (arrays of any shape). Returns (sor, sim, sne) where
+    sim is the turnover (Simpson) component and sne = sor - sim is the
+    nestedness-resultant component.
+    """
+    a, b, c = (np.asarray(x, dtype=float) for x in (a, b, c))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sor = np.where(2 * a + b + c > 0, (b + c) / (2 * a + b + c), 0.0)
+        low = np.minimum(b, c)
+        sim = np.where(a + low > 0, low / (a + low), 0.0)
+    return sor, sim, sor - sim
+
+def multiple_site_partition(presence):
+    """
+    Baselga's multiple-site Sørensen partition over every assemblage (row) of `presence`.
+
+    Returns (sor, sim, sne) for the whole series rather than for pairs.
+    """
+    presence = np.asarray(presence, dtype=np.int64)
+    richness = presence.sum(axis=1)
+    total = int(presence.any(axis=0).sum())
+    shared = presence @ presence.T
+    only = richness[:, None] - shared
+    upper = np.triu_indices(len(presence), k=1)
+    low = np.minimum(only, only.T)[upper].sum()
+    high = np.maximum(only, only.T)[upper].sum()
+    base = richness.sum() - total
+    sor = (low + high) / (2 * base + low + high) if (2 * base + low + high) else 0.0
+    sim = low / (base + low) if (base + low) else 0.0
+    return float(sor), float(sim), float(sor - sim)
+
+class Survey:
+    """One survey year: its relevé x species cover matrix on the shared vocabulary, and optional coordinates."""
+
+    def __init__(self, label, df, species, scale='mid-range', coordinates=None):
+        self.label = str(label)
+        df = df.assign(DOMIN=convert_scale(df['DOMIN'], 'mid-range', scale))
+        self.cover, self.releves, _ = community_matrix(df, species)
+        self.presence = self.cover > 0
+        # Coordinate files carry the bare RELEVE_ID, without the SITE_ID prefix of the matrix rows
+        numbers = pd.Series(df['RELEVE_ID'].to_numpy(), index=releve_labels(df).to_numpy())
+        self.releve_ids = numbers.groupby(level=0).first().reindex(self.releves).to_numpy()
+        self.coordinates = coordinates
+
+def load_surveys(specs, scale='mid-range'):
+    """
+    Load and align surveys from (label, csv_path, [coordinate CSVs]) tuples, in time order.
+
+    Cover is compared on the mid-range (% cover) scale; `scale` is the scale
+    of the input files, or a {label: scale} mapping.
+    """
+    frames = [load_survey(spec[1]) for spec in specs]
+    frames, species = shared_vocabulary(frames)
+    surveys = []
+    for (label, _, *coordinate_files), df in zip(specs, frames):
+        survey_scale = scale.get(label, 'mid-range') if isinstance(scale, dict) else scale
+        coordinates = load_coordinates(coordinate_files) if coordinate_files else None
+        surveys.append(Survey(label, df, species, survey_scale, coordinates))
+    return surveys, species
+
+def matched_pairs(first, second, max_distance=MATCH_DISTANCE_M):
+    """
+    Row indices of relevés of `first` and `second` recorded at the same spot.
+
+    Relevés are paired by nearest coordinates within `max_distance` metres;
+    pairs whose relevé numbers are not in the survey data are dropped.
+    """
+    if first.coordinates is None or second.coordinates is None:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    pairs = match_releves(first.coordinates, second.coordinates, max_distance)
+    rows_a = pd.Index(first.releve_ids).get_indexer(pairs['RELEVE_A'])
+    rows_b = pd.Index(second.releve_ids).get_indexer(pairs['RELEVE_B'])
+    found = (rows_a >= 0) & (rows_b >= 0)
+    return rows_a[found], rows_b[found]
+
+def turnover_analysis(surveys, species, max_distance=MATCH_DISTANCE_M):
+    """
+    Compare consecutive surveys on the shared species vocabulary.
+
+    Returns (change_table, summary). The change table has one row per
+    species with its frequency (share of relevés) and mean cover in each
+    survey, and for each consecutive pair the cover change and a status of
+    colonised, extinct, persistent or absent. The summary holds the
+    survey-level beta partition of each pair, colonisation and extinction
+    counts, the same partition for matched relevés, and the multiple-site
+    partition of the whole series.
+    """
+    presence = np.array([s.presence.any(axis=0) for s in surveys])
+    frequency = np.array([s.presence.mean(axis=0) if len(s.releves) else np.zeros(len(species)) for s in surveys])
+    mean_cover = np.array([s.cover.mean(axis=0) if len(s.releves) else np.zeros(len(species)) for s in surveys])
+
+    table = pd.DataFrame({'SPECIES_NAME': species})
+    for i, survey in enumerate(surveys):
+        table[f'FREQ_{survey.label}'] = frequency[i].round(3)
+        table[f'COVER_{survey.label}'] = mean_cover[i].round(3)
+
+    pairs = []
+    for i in range(len(surveys) - 1):
+        first, second = surveys[i], surveys[i + 1]
+        before, after = presence[i], presence[i + 1]
+        suffix = f'{first.label}_{second.label}'
+        table[f'COVER_CHANGE_{suffix}'] = (mean_cover[i + 1] - mean_cover[i]).round(3)
+        table[f'STATUS_{suffix}'] = np.select(
+            [before & after, ~before & after, before & ~after],
+            ['persistent', 'colonised', 'extinct'],
+            default='absent'
+        )
+
+        a, b, c = (before & after).sum(), (before & ~after).sum(), (~before & after).sum()
+        sor, sim, sne = beta_partition(a, b, c)
+        pair = {
+            'from': first.label,
+            'to': second.label,
+            'shared': int(a),
+            'extinct': int(b),
+            'colonised': int(c),
+            'sorensen': round(float(sor), 3),
+            'turnover': round(float(sim), 3),
+            'nestedness': round(float(sne), 3),
+            'matched_releves': 0
+        }
+
+        rows_a, rows_b = matched_pairs(first, second, max_distance)
+        if len(rows_a):
+            p, q = first.presence[rows_a], second.presence[rows_b]
+            sor, sim, sne = beta_partition((p & q).sum(axis=1), (p & ~q).sum(axis=1), (~p & q).sum(axis=1))
+            pair.update({
+                'matched_releves': int(len(rows_a)),
+                'matched_sorensen': round(float(sor.mean()), 3),
+                'matched_turnover': round(float(sim.mean()), 3),
+                'matched_nestedness': round(float(sne.mean()), 3),
+                'matched_colonised': int((~p & q).sum()),
+                'matched_extinct': int((p & ~q).sum())
+            })
+        pairs.append(pair)
+
+    sor, sim, sne = multiple_site_partition(presence)
+    summary = {
+        'surveys': [{'label': s.label, 'releves': int(len(s.releves)), 'species': int(presence[i].sum())}
+                    for i, s in enumerate(surveys)],
+        'pairs': pairs,
+        'series': {'sorensen': round(sor, 3), 'turnover': round(sim, 3), 'nestedness': round(sne, 3)}
+    }
+    return table, summary
+
+def format_turnover_report(summary):
+    """Format the turnover summary as readable text."""
+    lines = ["=== Surveys ==="]
+    for s in summary['surveys']:
+        lines.append(f"{s['label']:<10} {s['releves']:>4} relevés {s['species']:>5} species")
+
+    lines.append("\n=== Change between consecutive surveys ===")
+    header = f"{'Period':<14} {'Shared':>7} {'Lost':>5} {'Gained':>7} {'βsor':>6} {'βsim':>6} {'βsne':>6}"
+    lines += [header, "-" * len(header)]
+    for p in summary['pairs']:
+        lines.append(f"{p['from'] + '-' + p['to']:<14} {p['shared']:>7} {p['extinct']:>5} {p['colonised']:>7} "
+                     f"{p['sorensen']:>6.3f} {p['turnover']:>6.3f} {p['nestedness']:>6.3f}")
+
+    for p in summary['pairs']:
+        if p['matched_releves']:
+            lines.append(f"\n{p['from']}-{p['to']}: {p['matched_releves']} relevés matched by location, "
+                         f"mean βsor {p['matched_sorensen']:.3f} (turnover {p['matched_turnover']:.3f}, "
+                         f"nestedness {p['matched_nestedness']:.3f}), "
+                         f"{p['matched_colonised']} colonisations, {p['matched_extinct']} extinctions")
+
+    series = summary['series']
+    lines.append(f"\nWhole series: βSOR {series['sorensen']:.3f} = turnover {series['turnover']:.3f} "
+                 f"+ nestedness {series['nestedness']:.3f}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Species turnover between survey years',
+        epilog='Example: -s 2007 2007-MID-RANGE.csv survey-coordinates.csv -s 2022 2022-DOMIN.csv '
+               '-s 2025 COMBINED_MID_RANGE.csv coordinates/survey1-coordinates.csv ...'
+    )
+    parser.add_argument('-s', '--survey', nargs='+', action='append', required=True,
+                        metavar=('LABEL CSV', 'COORDINATES'),
+                        help='Survey label, relevé CSV and optional coordinate CSVs, oldest first')
+    parser.add_argument('--scale', choices=sorted(SCALE_VALUES.keys() - {'braun-blanquet'}), default='mid-range',
+                        help='Cover scale of the relevé CSVs')
+    parser.add_argument('-d', '--within', type=float, default=MATCH_DISTANCE_M,
+                        help='Maximum distance in metres for relevés to count as resurveyed')
+    parser.add_argument('-o', '--output', help='Write the species change table to this CSV')
+    parser.add_argument('--json', help='Write the turnover summary to this JSON file')
+
+    args = parser.parse_args()
+
+    if len(args.survey) < 2 or any(len(spec) < 2 for spec in args.survey):
+        parser.error("give at least two surveys, each as LABEL CSV [COORDINATES ...]")
+
+    try:
+        surveys, species = load_surveys(args.survey, args.scale)
+        table, summary = turnover_analysis(surveys, species, args.within)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(format_turnover_report(summary))
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"\nChange table for {len(table)} species saved to {args.output}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary saved to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import importlib.util
+import sys
+from pathlib import Path
+import pytest
+
+# The analysis modules live next to the scripts in python/, not in a package
+PYTHON_DIR = Path(__file__).resolve().parent.parent
+REPO_DIR = PYTHON_DIR.parent
+sys.path.insert(0, str(PYTHON_DIR))
+
+@pytest.fixture
+def species_stats(monkeypatch):
+    """The species-stats.py script as a module, with the R NMDS step stubbed out."""
+    spec = importlib.util.spec_from_file_location('species_stats', PYTHON_DIR / 'species-stats.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, 'run_r_nmds_analysis',
+                        lambda csv_path, output_dir: {'success': True, 'metrics': {'stress_value': 0.1}, 'svg_path': None})
+    return module
@@ -0,0 +1,48 @@
+import json
+import pytest
+from aggregate_state import SNAPSHOT_VERSION, AggregateSnapshot, apply_delta, load_snapshot, save_snapshot
+
+ROWS = [('68', '1', 'Holcus lanatus', 4.0), ('68', '1', 'Carex flacca', 2.0),
+        ('68', '2', 'Juncus effusus', 5.0), ('70', '1', 'Holcus lanatus', 3.0)]
+ERRATA = [('68', '1', 'Holcus lanatus', 6.0), ('68', '1', 'Lotus corniculatus', 1.0)]
+
+def built_from(rows):
+    snapshot = AggregateSnapshot()
+    apply_delta(snapshot, rows)
+    return snapshot.results(), snapshot.row_count, snapshot.total_domin_score
+
+def test_replayed_updates_match_a_fresh_build(tmp_path):
+    path = tmp_path / 'snapshot.json'
+    snapshot = load_snapshot(path)
+    apply_delta(snapshot, ROWS[:2])
+    save_snapshot(snapshot, path)
+    snapshot = load_snapshot(path)
+    apply_delta(snapshot, ROWS[2:])
+    save_snapshot(snapshot, path)
+
+    # Replacing relevé 68/1 reads its old rows back from the journal
+    snapshot = load_snapshot(path)
+    assert apply_delta(snapshot, ERRATA, replace=True) == 1
+    save_snapshot(snapshot, path)
+
+    snapshot = load_snapshot(path)
+    assert (snapshot.results(), snapshot.row_count, snapshot.total_domin_score) == built_from(ROWS[2:] + ERRATA)
+    assert snapshot.site_species('68') and 'Carex flacca' not in snapshot.site_species('68')
+
+def test_appending_a_present_releve_is_refused():
+    snapshot = AggregateSnapshot()
+    apply_delta(snapshot, ROWS)
+    with pytest.raises(ValueError, match='replace'):
+        apply_delta(snapshot, ERRATA)
+    assert built_from(ROWS) == (snapshot.results(), snapshot.row_count, snapshot.total_domin_score)
+
+def test_other_snapshot_versions_are_rejected(tmp_path):
+    path = tmp_path / 'snapshot.json'
+    snapshot = AggregateSnapshot()
+    apply_delta(snapshot, ROWS)
+    save_snapshot(snapshot, path)
+    data = json.loads(path.read_text())
+    path.write_text(json.dumps({**data, 'version': SNAPSHOT_VERSION - 1}))
+
+    with pytest.raises(ValueError, match='version'):
+        load_snapshot(path)
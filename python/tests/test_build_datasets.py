@@ -0,0 +1,46 @@
+import shutil
+import pytest
+from conftest import REPO_DIR
+from build_datasets import build, build_waves
+
+@pytest.fixture
+def site(tmp_path):
+    """A scratch copy of the Site 68 2025 survey with its build spec."""
+    shutil.copytree(REPO_DIR / 'datasets' / 'site-68-2025', tmp_path / 'site', ignore=shutil.ignore_patterns('coordinates'))
+    return tmp_path / 'site'
+
+def test_build_reproduces_the_committed_datasets(site):
+    committed = {path.name: path.read_bytes() for path in site.rglob('*.csv')}
+    rebuilt = build(site / 'build.json', jobs=2, force=True)
+    assert 'COMBINED_MID_RANGE.csv' in rebuilt and 'GRAZING_FERTILISER.csv' in rebuilt
+    for path in site.rglob('*.csv'):
+        assert path.read_bytes() == committed[path.name], path.name
+
+def test_only_outputs_downstream_of_a_change_are_rebuilt(site):
+    build(site / 'build.json', jobs=2)
+    assert build(site / 'build.json', jobs=2) == []
+
+    errata = site / 'errata' / 'GRAZING_FERTILISER_RELEVE_3.csv'
+    errata.write_text(errata.read_text().replace(',30.0\n', ',38.0\n', 1))
+    assert build(site / 'build.json', jobs=2, dry_run=True) == ['GRAZING_FERTILISER.csv']
+    assert build(site / 'build.json', jobs=2) == ['GRAZING_FERTILISER.csv']
+
+def test_hand_edited_outputs_are_not_overwritten(site):
+    build(site / 'build.json', jobs=2)
+    edited = site / 'COMBINED_SURVEY.csv'
+    edited.write_text(edited.read_text() + '99,Holcus lanatus,1,4\n')
+    (site / 'RELEVE_SURVEY_5.csv').write_text((site / 'RELEVE_SURVEY_5.csv').read_text() + '74,Carex flacca,25,2\n')
+
+    with pytest.raises(ValueError, match='COMBINED_SURVEY.csv edited since the last build'):
+        build(site / 'build.json', jobs=2)
+    assert edited.read_text().endswith('99,Holcus lanatus,1,4\n')
+
+    rebuilt = build(site / 'build.json', jobs=2, force=True)
+    assert 'COMBINED_SURVEY.csv' in rebuilt
+    assert edited.read_text().endswith('74,Carex flacca,25,2\n')
+
+def test_waves_follow_dependencies_and_reject_cycles():
+    steps = [{'output': 'c.csv', 'inputs': ['b.csv']}, {'output': 'b.csv', 'inputs': ['a.csv']}]
+    assert [[step['output'] for step in wave] for wave in build_waves(steps)] == [['b.csv'], ['c.csv']]
+    with pytest.raises(ValueError, match='cycle'):
+        build_waves(steps + [{'output': 'a.csv', 'inputs': ['c.csv']}])
@@ -0,0 +1,123 @@
+import asyncio
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from dataset_fetcher import Mirror, fetch, fetch_many
+
+class DatasetServer(ThreadingHTTPServer):
+    """Local HTTP/1.1 server standing in for a remote dataset host."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), DatasetHandler)
+        self.files = {'/a.csv': (b'RELEVE_ID,SPECIES_NAME,DOMIN\n1,Holcus lanatus,4\n', '"a1"'),
+                      '/b.csv': (b'RELEVE_ID,SPECIES_NAME,DOMIN\n1,Holcus lanatus,4\n', '"b1"')}
+        self.requests = []
+        self.connections = 0
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+class DatasetHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def send(self, status, body=b'', **headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name.replace('_', '-'), value)
+        if status != 304:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.path in self.server.files:
+            body, etag = self.server.files[self.path]
+            if self.headers.get('If-None-Match') == etag:
+                self.send(304, ETag=etag)
+            else:
+                self.send(200, body, ETag=etag)
+        elif self.path == '/chunked.csv':
+            body = gzip.compress(b'RELEVE_ID,SPECIES_NAME,DOMIN\n2,Carex flacca,3\n' * 50)
+            self.send_response(200)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.send_header('Content-Encoding', 'gzip')
+            self.end_headers()
+            for start in range(0, len(body), 100):
+                chunk = body[start:start + 100]
+                self.wfile.write(f"{len(chunk):x};ext=1\r\n".encode() + chunk + b'\r\n')
+            self.wfile.write(b'0\r\nX-Trailer: done\r\n\r\n')
+        elif self.path == '/moved':
+            self.send(302, Location='/a.csv')
+        elif self.path == '/error':
+            self.send(500, b'down for maintenance')
+        else:
+            self.send(404, b'not found')
+
+@pytest.fixture
+def server():
+    server = DatasetServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_mirror_serves_fresh_files_and_revalidates_stale_ones(server, tmp_path):
+    url = server.url('/a.csv')
+    body = server.files['/a.csv'][0]
+    assert fetch([url], tmp_path) == {url: body}
+    assert fetch([url], tmp_path) == {url: body}
+    assert server.requests == [('/a.csv', None)]
+
+    # A stale entry is revalidated with its ETag
+    assert fetch([url], tmp_path, max_age=0) == {url: body}
+    assert server.requests[-1] == ('/a.csv', '"a1"')
+
+    server.files['/a.csv'] = (b'RELEVE_ID,SPECIES_NAME,DOMIN\n1,Holcus lanatus,5\n', '"a2"')
+    assert fetch([url], tmp_path, max_age=0) == {url: server.files['/a.csv'][0]}
+    assert Mirror(tmp_path).lookup(url)['etag'] == '"a2"'
+
+def test_identical_files_are_stored_once(server, tmp_path):
+    fetch([server.url('/a.csv'), server.url('/b.csv')], tmp_path)
+    assert len(list((tmp_path / 'objects').rglob('*'))) == 2  # one prefix directory, one object
+
+def test_chunked_gzip_bodies_and_redirects(server, tmp_path):
+    contents = fetch([server.url('/chunked.csv'), server.url('/moved')], tmp_path)
+    assert contents[server.url('/chunked.csv')] == b'RELEVE_ID,SPECIES_NAME,DOMIN\n2,Carex flacca,3\n' * 50
+    assert contents[server.url('/moved')] == server.files['/a.csv'][0]
+
+def test_requests_reuse_one_connection(server, tmp_path):
+    urls = [server.url(path) for path in ['/a.csv', '/b.csv', '/chunked.csv', '/moved']]
+    results = asyncio.run(fetch_many(urls, Mirror(tmp_path), concurrency=1))
+    assert [how for _, how in results.values()] == ['downloaded'] * 4
+    assert server.connections == 1
+
+def test_mirrored_copy_is_used_when_the_server_fails(server, tmp_path):
+    url, error_url = server.url('/a.csv'), server.url('/error')
+    body = fetch([url], tmp_path)[url]
+    mirror = Mirror(tmp_path)
+    mirror.index[error_url] = dict(mirror.index[url], checked=0)
+    mirror.save()
+
+    assert fetch([error_url], tmp_path, max_age=0) == {error_url: body}
+    server.shutdown()
+    server.server_close()
+    assert fetch([url], tmp_path, max_age=0) == {url: body}
+    assert fetch([url], tmp_path, offline=True) == {url: body}
+
+def test_unavailable_files_raise(server, tmp_path):
+    contents = fetch([server.url('/missing'), server.url('/error')], tmp_path, return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in contents.values())
+    with pytest.raises(FileNotFoundError):
+        fetch([server.url('/a.csv')], tmp_path, offline=True)
@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+from domin_scales import DOMIN_TO_MID_RANGE, convert_scale, cover_to_braun_blanquet, to_mid_range
+
+def test_conversion_matches_the_lookup_table():
+    values = np.array(list(DOMIN_TO_MID_RANGE) + [0.0, 11.0, 2.5])
+    np.testing.assert_array_equal(convert_scale(values, 'mid-range'), [to_mid_range(v) for v in values])
+
+def test_braun_blanquet_classes_follow_the_mid_range_cover():
+    domin = np.array(sorted(DOMIN_TO_MID_RANGE))
+    np.testing.assert_array_equal(convert_scale(domin, 'braun-blanquet'),
+                                  cover_to_braun_blanquet([DOMIN_TO_MID_RANGE[d] for d in domin]))
+    assert cover_to_braun_blanquet([0.05, 0.1, 4.9, 5, 80]).tolist() == [0, 0.1, 1, 2, 5]
+
+def test_braun_blanquet_cannot_be_refined():
+    with pytest.raises(ValueError):
+        convert_scale([1.0], 'domin', from_scale='braun-blanquet')
@@ -0,0 +1,70 @@
+from itertools import combinations
+import numpy as np
+import pandas as pd
+import pytest
+from indicator_species import indicator_species, management_groups
+
+def test_management_groups_classify_site_labelled_releves():
+    df = pd.DataFrame({
+        'SITE_ID': [68, 68, 68, 68],
+        'RELEVE_ID': [30, 3, 50, 3],
+        'SPECIES_NAME': ['Holcus lanatus', 'Carex flacca', 'Holcus lanatus', 'Holcus lanatus'],
+        'DOMIN': [4, 2, 5, 3]
+    })
+    matrix, labels, species = management_groups(df)
+
+    # Rows follow the sorted '68/3', '68/30', '68/50' labels
+    assert list(labels) == ['Grazing+Fertiliser', 'Mowing+Fertiliser', 'Organic']
+    assert matrix.shape == (3, 2)
+
+# 6 relevés in two groups of three; species 0 is confined to group 'a'
+MATRIX = np.array([
+    [5, 1, 0],
+    [4, 2, 3],
+    [6, 0, 1],
+    [0, 3, 2],
+    [0, 1, 0],
+    [0, 2, 4],
+], dtype=float)
+LABELS = ['a', 'a', 'a', 'b', 'b', 'b']
+SPECIES = ['Holcus lanatus', 'Carex flacca', 'Juncus effusus']
+
+def naive_indval(matrix, labels):
+    """IndVal of every species in every group, one species and group at a time."""
+    labels = np.asarray(labels)
+    groups = sorted(set(labels))
+    values = np.zeros((len(groups), matrix.shape[1]))
+    for j in range(matrix.shape[1]):
+        means = [matrix[labels == g, j].mean() for g in groups]
+        for i, g in enumerate(groups):
+            specificity = means[i] / sum(means) if sum(means) else 0.0
+            fidelity = (matrix[labels == g, j] > 0).mean()
+            values[i, j] = specificity * fidelity
+    return values
+
+def test_indval_matches_a_naive_computation():
+    table = indicator_species(MATRIX, LABELS, SPECIES, permutations=0).set_index('SPECIES_NAME')
+    expected = naive_indval(MATRIX, LABELS)
+    for j, name in enumerate(SPECIES):
+        assert table.at[name, 'INDVAL'] == pytest.approx(expected.max(axis=0)[j], abs=1e-4)
+        assert table.at[name, 'GROUP'] == 'ab'[expected[:, j].argmax()]
+    assert (table.at['Holcus lanatus', 'SPECIFICITY'], table.at['Holcus lanatus', 'FIDELITY']) == (1.0, 1.0)
+
+def test_p_values_approach_the_exact_permutation_test():
+    table = indicator_species(MATRIX, LABELS, SPECIES, permutations=9999, workers=1).set_index('SPECIES_NAME')
+    observed = naive_indval(MATRIX, LABELS).max(axis=0)
+    # All 20 ways of splitting the six relevés into two groups of three
+    peaks = np.array([naive_indval(MATRIX, ['a' if i in group else 'b' for i in range(6)]).max(axis=0)
+                      for group in combinations(range(6), 3)])
+    exact = (peaks >= observed - 1e-12).mean(axis=0)
+    for j, name in enumerate(SPECIES):
+        assert table.at[name, 'P_VALUE'] == pytest.approx(exact[j], abs=0.02)
+
+def test_p_values_do_not_depend_on_workers():
+    serial = indicator_species(MATRIX, LABELS, SPECIES, permutations=2000, workers=1, batch_size=500)
+    pooled = indicator_species(MATRIX, LABELS, SPECIES, permutations=2000, workers=2, batch_size=500)
+    assert serial.equals(pooled)
+
+def test_a_single_group_is_rejected():
+    with pytest.raises(ValueError):
+        indicator_species(MATRIX, ['a'] * 6, SPECIES, permutations=0)
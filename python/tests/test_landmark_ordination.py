@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from landmark_ordination import FORMAT_VERSION, LandmarkOrdination, placement_curve
+
+def gradient_survey(releves=120, species=40, seed=1):
+    """Relevés along two gradients, each species peaking somewhere on them."""
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(0, 1, (releves, 2))
+    optima = rng.uniform(0, 1, (species, 2))
+    response = np.exp(-((positions[:, None, :] - optima[None, :, :]) ** 2).sum(axis=-1) / 0.08)
+    cover = np.round(10 * response * rng.uniform(0.5, 1.0, response.shape))
+    rows, cols = np.nonzero(cover)
+    return pd.DataFrame({'RELEVE_ID': rows + 1, 'SPECIES_NAME': [f'Species {c}' for c in cols],
+                         'DOMIN': cover[rows, cols]})
+
+def test_landmarks_reproject_onto_themselves():
+    df = gradient_survey()
+    model = LandmarkOrdination.fit(df, landmarks=30, k=2)
+    table, _ = model.project(df[df['RELEVE_ID'].astype(str).isin(model.landmark_ids)])
+    placed = table.set_index('RELEVE').loc[model.landmark_ids, model.axes].to_numpy()
+
+    radius = np.sqrt(((model.coordinates - model.coordinates.mean(axis=0)) ** 2).sum(axis=1).mean())
+    offsets = np.sqrt(((placed[:, None, :] - model.coordinates[None, :, :]) ** 2).sum(axis=-1))
+    assert offsets.diagonal().max() < 0.02 * radius
+    assert (offsets.argmin(axis=1) == np.arange(len(placed))).all()
+
+def test_placement_curve_is_anchored_and_increasing():
+    dissimilarity = np.array([0.4, 0.4, 0.6, 0.7, 1.0, 1.0, 1.0])
+    fitted = np.array([0.5, 0.7, 0.8, 0.8, 1.0, 1.2, 1.4])
+    x, y = placement_curve(dissimilarity, fitted)
+
+    assert (x[0], y[0]) == (0.0, 0.0)
+    assert (np.diff(x) > 0).all() and (np.diff(y) > 0).all()
+    assert np.allclose(np.interp([0.4, 1.0], x, y), [0.6, 1.2])
+
+def test_saved_ordination_places_releves_alike(tmp_path):
+    df = gradient_survey()
+    model = LandmarkOrdination.fit(df, landmarks=30, k=2)
+    model.save(tmp_path / 'ordination.npz')
+    loaded = LandmarkOrdination.load(tmp_path / 'ordination.npz')
+
+    assert np.allclose(loaded.project(df)[0][loaded.axes], model.project(df)[0][model.axes])
+
+def test_other_format_versions_are_rejected(tmp_path):
+    LandmarkOrdination.fit(gradient_survey(), landmarks=30, k=2).save(tmp_path / 'ordination.npz')
+    with np.load(tmp_path / 'ordination.npz') as data:
+        np.savez(tmp_path / 'old.npz', **{**data, 'version': FORMAT_VERSION - 1})
+
+    with pytest.raises(ValueError, match='version'):
+        LandmarkOrdination.load(tmp_path / 'old.npz')
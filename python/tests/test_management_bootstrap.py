@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from conftest import REPO_DIR
+from community_matrix import load_survey
+from management_bootstrap import bootstrap_batch, bootstrap_group, bootstrap_management, summed_matrix
+
+SURVEY = REPO_DIR / 'datasets' / 'site-68-2025' / 'COMBINED_MID_RANGE.csv'
+
+def test_batch_matches_resampling_row_by_row():
+    matrix = np.random.default_rng(1).integers(0, 3, size=(12, 8)).astype(float)
+    seed = np.random.SeedSequence(7)
+    boot = bootstrap_batch(matrix, 50, seed)
+
+    draws = np.random.default_rng(seed).integers(0, 12, size=(50, 12))
+    for r, rows in enumerate(draws):
+        sums = matrix[rows].sum(axis=0)
+        assert boot['total_score'][r] == pytest.approx(sums.sum())
+        assert boot['richness'][r] == (sums > 0).sum()
+        assert boot['mean_richness'][r] == pytest.approx((matrix[rows] > 0).sum(axis=1).mean())
+        assert boot['top_species'][r] == sums.argmax()
+
+def test_point_values_match_the_report_statistics(species_stats):
+    results = bootstrap_management(load_survey(SURVEY), replicates=200)
+    stats = species_stats.analyze_species_data(str(SURVEY))['management_stats']
+    assert list(results) == list(stats)
+    for mgmt, r in results.items():
+        assert r['releves'] == stats[mgmt]['releve_count']
+        assert r['total_score']['value'] == pytest.approx(stats[mgmt]['total_score'], abs=1e-3)
+        assert r['top_species'] == stats[mgmt]['top_species']
+        # Resamples repeat relevés, so richness can only fall short of the observed value
+        for key in ('total_score', 'mean_richness'):
+            assert r[key]['lower'] <= r[key]['value'] <= r[key]['upper']
+        assert r['richness']['upper'] <= r['richness']['value']
+
+def test_intervals_do_not_depend_on_workers():
+    matrix, _, species = summed_matrix(load_survey(SURVEY))
+    serial = bootstrap_group(matrix, species, replicates=600, workers=1, batch_size=200)
+    pooled = bootstrap_group(matrix, species, replicates=600, workers=2, batch_size=200)
+    assert serial == pooled
@@ -0,0 +1,84 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from management_zones import Zone, ZoneIndex, assign_zones, load_zones, split_by_zone
+
+def square(x, y, size):
+    return np.array([[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]], dtype=float)
+
+def star(cx, cy, radius, points=7):
+    angles = np.linspace(0, 2 * np.pi, 2 * points, endpoint=False)
+    radii = np.where(np.arange(2 * points) % 2, radius / 2.5, radius)
+    ring = np.column_stack([cx + radii * np.cos(angles), cy + radii * np.sin(angles)])
+    return np.vstack([ring, ring[:1]])
+
+def point_in_ring(x, y, ring):
+    """Textbook ray casting, one edge at a time."""
+    inside = False
+    for (x0, y0), (x1, y1) in zip(ring[:-1], ring[1:]):
+        if (y0 > y) != (y1 > y) and x < x0 + (y - y0) * (x1 - x0) / (y1 - y0):
+            inside = not inside
+    return inside
+
+def brute_force_assign(zones, points):
+    assigned = np.full(len(points), -1)
+    for i, (x, y) in enumerate(points):
+        for code, zone in enumerate(zones):
+            if sum(point_in_ring(x, y, ring) for ring in zone.rings) % 2:
+                assigned[i] = code
+                break
+    return assigned
+
+ZONES = [
+    Zone('Field with pond', [square(0, 0, 100), square(40, 40, 20)]),  # a hole
+    Zone('Overlapping', [square(80, 80, 60)]),
+    Zone('Star', [star(250, 60, 50)]),
+    Zone('Two parts', [square(-120, 0, 30), square(-120, 100, 30)]),
+    Zone('Tiny', [square(10, -20, 0.5)]),
+    Zone('Huge', [square(-500, -500, 2000)]),
+]
+
+@pytest.mark.parametrize('cell_size', [None, 5.0, 1000.0])
+def test_assign_matches_brute_force(cell_size):
+    rng = np.random.default_rng(0)
+    points = np.vstack([rng.uniform(-200, 350, size=(1500, 2)),
+                        rng.uniform(-700, 1700, size=(300, 2)),
+                        [[50, 50], [10.25, -19.75], [5000, 5000]]])
+    expected = brute_force_assign(ZONES, points)
+    np.testing.assert_array_equal(ZoneIndex(ZONES, cell_size).assign(points), expected)
+    # The hole, the tiny zone and a point outside every zone
+    assert [ZONES[code].name if code >= 0 else '' for code in expected[-3:]] == ['Huge', 'Tiny', '']
+
+def test_geojson_zones_label_and_split_a_survey(tmp_path):
+    lat0, lon0 = 53.5, -8.0
+    def lonlat_square(dlon, dlat, size):
+        return [[lon0 + dlon, lat0 + dlat], [lon0 + dlon + size, lat0 + dlat],
+                [lon0 + dlon + size, lat0 + dlat + size], [lon0 + dlon, lat0 + dlat + size]]
+    collection = {'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'name': 'Grazing fertiliser'},
+         'geometry': {'type': 'Polygon', 'coordinates': [lonlat_square(0, 0, 0.001)]}},
+        {'type': 'Feature', 'properties': {'name': 'Organic'},
+         'geometry': {'type': 'MultiPolygon', 'coordinates': [[lonlat_square(0.002, 0, 0.001)]]}},
+    ]}
+    (tmp_path / 'zones.geojson').write_text(json.dumps(collection))
+    zones, origin = load_zones(tmp_path / 'zones.geojson')
+
+    coords = pd.DataFrame({'Latitude': [lat0 + 0.0005, lat0 + 0.0005, lat0 + 0.0005],
+                           'Longitude': [lon0 + 0.0005, lon0 + 0.0025, lon0 + 0.0015],
+                           'Releve': [1, 2, 3], 'Grid': [1, 2, 3]})
+    labelled = assign_zones(coords, {'TREATMENT': (zones, origin)})
+    assert labelled['TREATMENT'].tolist() == ['Grazing fertiliser', 'Organic', '']
+
+    pd.DataFrame({'RELEVE_ID': [1, 1, 2, 3], 'SPECIES_NAME': ['a', 'b', 'a', 'c'], 'DOMIN': [3, 4, 5, 6]}) \
+        .to_csv(tmp_path / 'survey.csv', index=False)
+    written = split_by_zone(tmp_path / 'survey.csv', labelled, 'TREATMENT', tmp_path / 'zones')
+    assert {zone: (path.name, count) for zone, (path, count) in written.items()} == {
+        'Grazing fertiliser': ('GRAZING_FERTILISER.csv', 1), 'Organic': ('ORGANIC.csv', 1)}
+
+def test_non_polygon_geometry_is_rejected(tmp_path):
+    feature = {'type': 'Feature', 'properties': {'name': 'Gate'},
+               'geometry': {'type': 'Point', 'coordinates': [-8.0, 53.5]}}
+    (tmp_path / 'zones.geojson').write_text(json.dumps({'type': 'FeatureCollection', 'features': [feature]}))
+    with pytest.raises(ValueError):
+        load_zones(tmp_path / 'zones.geojson')
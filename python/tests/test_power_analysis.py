@@ -0,0 +1,96 @@
+import math
+from itertools import combinations
+import numpy as np
+import pytest
+from power_analysis import (adjusted_rand_index, bray_curtis_matrix, chi2_sf, k_medoids, kruskal_wallis, permanova,
+                            power_analysis)
+
+@pytest.mark.parametrize('x, df', [(3.841459, 1), (5.991465, 2), (7.814728, 3), (9.487729, 4), (11.070498, 5)])
+def test_chi2_critical_values(x, df):
+    assert chi2_sf(x, df) == pytest.approx(0.05, abs=1e-6)
+
+def test_chi2_closed_forms():
+    for x in [0.3, 1.0, 4.2, 12.0]:
+        assert chi2_sf(x, 1) == pytest.approx(math.erfc(math.sqrt(x / 2)))
+        assert chi2_sf(x, 2) == pytest.approx(math.exp(-x / 2))
+
+def test_kruskal_wallis_matches_r():
+    # Hollander & Wolfe example from R's ?kruskal.test: chi-squared = 0.77143, df = 2, p-value = 0.68
+    values = [2.9, 3.0, 2.5, 2.6, 3.2, 3.8, 2.7, 4.0, 2.4, 2.8, 3.4, 3.7, 2.2, 2.0]
+    labels = ['x'] * 5 + ['y'] * 4 + ['z'] * 5
+    h, p = kruskal_wallis(values, labels)
+    assert h == pytest.approx(0.77143, abs=1e-5)
+    assert p == pytest.approx(math.exp(-h / 2))
+
+def test_kruskal_wallis_tie_correction():
+    values = np.array([3, 5, 5, 7, 2, 5, 8, 8, 1, 3])
+    labels = np.array(list('aaabbbbccc'))
+    ranks = np.array([np.mean(np.flatnonzero(np.sort(values) == v)) + 1 for v in values])
+    n = len(values)
+    h = 12 / (n * (n + 1)) * sum(ranks[labels == g].sum() ** 2 / (labels == g).sum() for g in 'abc') - 3 * (n + 1)
+    counts = np.unique(values, return_counts=True)[1]
+    h /= 1 - (counts ** 3 - counts).sum() / (n ** 3 - n)
+    assert kruskal_wallis(values, labels)[0] == pytest.approx(h)
+    assert kruskal_wallis([4, 4, 4, 4], list('aabb')) == (0.0, 1.0)
+
+def naive_pseudo_f(distance, labels):
+    labels = np.asarray(labels)
+    n, groups = len(labels), np.unique(labels)
+    total = sum(distance[i, j] ** 2 for i, j in combinations(range(n), 2)) / n
+    within = sum(sum(distance[i, j] ** 2 for i, j in combinations(np.flatnonzero(labels == g), 2)) / (labels == g).sum()
+                 for g in groups)
+    return ((total - within) / (len(groups) - 1)) / (within / (n - len(groups)))
+
+def test_permanova_matches_a_naive_computation():
+    rng = np.random.default_rng(3)
+    matrix = rng.poisson(2, size=(12, 15)) + np.repeat([[0] * 15, [3] * 15, [0] * 15], 4, axis=0) * (np.arange(15) < 5)
+    distance = bray_curtis_matrix(matrix)
+    labels = np.repeat(['a', 'b', 'c'], 4)
+    f, p = permanova(distance, labels, 99, np.random.default_rng(5))
+    assert f == pytest.approx(naive_pseudo_f(distance, labels))
+
+    # The same shuffles, scored one at a time
+    codes = np.unique(labels, return_inverse=True)[1]
+    shuffled = np.random.default_rng(5).permuted(np.tile(codes, (99, 1)), axis=1)
+    exceed = sum(naive_pseudo_f(distance, row) >= f - 1e-12 for row in shuffled)
+    assert p == pytest.approx((exceed + 1) / 100)
+
+def test_bray_curtis_by_hand():
+    distance = bray_curtis_matrix([[1, 2, 0], [1, 0, 3], [0, 0, 0]])
+    assert distance[0, 1] == pytest.approx(1 - 2 * 1 / 7)
+    assert distance[0, 0] == 0 and np.array_equal(distance, distance.T)
+
+def naive_ari(a, b):
+    pairs = list(combinations(range(len(a)), 2))
+    same_a = np.array([a[i] == a[j] for i, j in pairs])
+    same_b = np.array([b[i] == b[j] for i, j in pairs])
+    index = (same_a & same_b).sum()
+    expected = same_a.sum() * same_b.sum() / len(pairs)
+    maximum = (same_a.sum() + same_b.sum()) / 2
+    return (index - expected) / (maximum - expected)
+
+def test_adjusted_rand_index():
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        a, b = rng.integers(0, 3, 20), rng.integers(0, 4, 20)
+        assert adjusted_rand_index(a, b) == pytest.approx(naive_ari(a, b))
+    assert adjusted_rand_index([0, 0, 1, 1], ['y', 'y', 'x', 'x']) == 1.0
+
+def test_k_medoids_recovers_separated_groups():
+    rng = np.random.default_rng(1)
+    points = np.vstack([rng.normal(0, 0.3, (10, 2)), rng.normal(5, 0.3, (10, 2))])
+    distance = np.hypot(*(points[:, None] - points[None, :]).transpose(2, 0, 1))
+    assert adjusted_rand_index(k_medoids(distance, 2, rng), np.repeat([0, 1], 10)) == 1.0
+
+def test_interrupted_run_resumes_from_its_checkpoint(tmp_path):
+    checkpoint = tmp_path / 'power.jsonl'
+    fresh = power_analysis([0.0, 1.0], replicates=6, permutations=19, workers=2)
+
+    power_analysis([0.0, 1.0], replicates=3, permutations=19, workers=2, checkpoint=checkpoint)
+    with open(checkpoint, 'a') as f:
+        f.write('{"effect": 1.0, "replic')  # cut short by an interruption
+    assert power_analysis([0.0, 1.0], replicates=6, permutations=19, workers=2, checkpoint=checkpoint) == fresh
+    assert len(checkpoint.read_text().splitlines()) == 1 + 12
+
+    with pytest.raises(ValueError, match='different settings'):
+        power_analysis([0.0, 2.0], replicates=6, permutations=19, workers=2, checkpoint=checkpoint)
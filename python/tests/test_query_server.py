@@ -0,0 +1,60 @@
+import asyncio
+import json
+import pytest
+from query_server import QueryIndex, QueryServer, load_dataset
+
+SURVEY = """RELEVE_ID,SPECIES_NAME,DOMIN
+1,Holcus lanatus,7
+1,Carex flacca,3
+2,Holcus lanatus,
+2,,5
+3,Holcus lanatus,4
+4,Holcus lanatus,9
+"""
+
+@pytest.fixture
+def server(tmp_path):
+    path = tmp_path / 'survey.csv'
+    path.write_text(SURVEY)
+    return QueryServer(path)
+
+def test_rows_without_species_or_cover_are_not_indexed(tmp_path):
+    path = tmp_path / 'survey.csv'
+    path.write_text(SURVEY)
+    index = QueryIndex(load_dataset(path))
+    assert index.rows == 4
+    assert index.species == ['Carex flacca', 'Holcus lanatus']
+    with pytest.raises(KeyError):
+        index.releve_query('2')
+    assert index.species_query('Holcus lanatus')['count'] == 3
+
+def test_min_domin_is_a_cover_threshold(server):
+    status, payload = server.answer('/species', {'name': ['holcus lanatus'], 'min_domin': ['5']})
+    assert status == 200
+    assert [(r['releve'], r['domin']) for r in payload['releves']] == [('68/4', 9.0), ('68/1', 7.0)]
+
+@pytest.mark.parametrize('limit', ['0', '-1', 'two'])
+def test_invalid_limit_is_rejected(server, limit):
+    status, payload = server.answer('/species', {'name': ['Holcus lanatus'], 'limit': [limit]})
+    assert status == 400
+
+def test_limit_keeps_the_highest_cover(server):
+    status, payload = server.answer('/species', {'name': ['Holcus lanatus'], 'limit': ['2']})
+    assert status == 200
+    assert [r['releve'] for r in payload['releves']] == ['68/4', '68/1']
+
+def test_http_round_trip(server):
+    async def fetch():
+        listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /releve?id=1 HTTP/1.1\r\nConnection: close\r\n\r\n')
+            response = await reader.read()
+            writer.close()
+        return response
+
+    head, _, body = asyncio.run(fetch()).partition(b'\r\n\r\n')
+    assert head.startswith(b'HTTP/1.1 200 OK')
+    releve, = json.loads(body)['releves']
+    assert releve['richness'] == 2 and releve['species'][0] == {'name': 'Holcus lanatus', 'domin': 7.0}
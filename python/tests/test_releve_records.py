@@ -0,0 +1,59 @@
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import REPO_DIR
+from management import classify_releve
+from releve_records import first_seen_order, records_from_frame
+from releve_validation import UNUSABLE_CHECKS, load_releves
+
+SURVEYS = ['site-68-2007/2007-MID-RANGE.csv', 'site-68-2022/2022-DOMIN.csv', 'site-68-2025/COMBINED_SURVEY.csv',
+           'site-68-2025/COMBINED_MID_RANGE.csv']
+
+def dict_statistics(df):
+    """The per-row dictionary loop `analyze_species_data` used before relevé records."""
+    species_scores = defaultdict(float)
+    releves = defaultdict(list)
+    total = 0.0
+    for releve_id, name, score in zip(df['RELEVE_ID'], df['SPECIES_NAME'], df['DOMIN']):
+        species_scores[name] += float(score)
+        releves[int(releve_id)].append((name, float(score)))
+        total += float(score)
+
+    management = {}
+    for releve_id, rows in releves.items():
+        entry = management.setdefault(classify_releve(releve_id), {'releve_count': 0, 'species': defaultdict(float)})
+        entry['releve_count'] += 1
+        for name, score in rows:
+            entry['species'][name] += score
+    return species_scores, management, total
+
+@pytest.mark.parametrize('survey', SURVEYS)
+def test_statistics_match_the_dictionary_loop(species_stats, survey):
+    path = REPO_DIR / 'datasets' / survey
+    df, _ = load_releves(path, scale=None, drop_invalid=UNUSABLE_CHECKS)
+    species_scores, management, total = dict_statistics(df)
+    results = species_stats.analyze_species_data(str(path))
+
+    assert list(results['species_scores'].items()) == list(species_scores.items())
+    assert results['total_domin_score'] == total
+    assert results['unique_releve_ids'] == {int(r) for r in df['RELEVE_ID']}
+    for mgmt, stats in results['management_stats'].items():
+        assert stats['releve_count'] == management[mgmt]['releve_count']
+        assert list(stats['species_proportions'].items()) == list(management[mgmt]['species'].items())
+        assert stats['total_score'] == sum(management[mgmt]['species'].values())
+    assert set(results['management_stats']) == set(management)
+
+def test_records_intern_names_in_first_seen_order():
+    df = pd.DataFrame({'SITE_ID': [70, 68, 70], 'RELEVE_ID': [2, 1, 2],
+                       'SPECIES_NAME': ['Juncus effusus', 'Carex flacca', 'Juncus effusus'], 'DOMIN': [3.0, 4.0, 5.0]})
+    records = records_from_frame(df, sites=True)
+    assert records.species == ['Juncus effusus', 'Carex flacca']
+    assert records.species_codes.tolist() == [0, 1, 0] and records.sites == ['70', '68']
+    assert records.species_totals().tolist() == [8.0, 4.0]
+    assert records.species_totals(np.array([2, 1])).tolist() == [5.0, 4.0]
+    assert first_seen_order(np.array([3, 1, 3, 2, 1])).tolist() == [3, 1, 2]
+
+def test_missing_columns_are_reported():
+    with pytest.raises(ValueError, match='SITE_ID'):
+        records_from_frame(pd.DataFrame({'RELEVE_ID': [1], 'SPECIES_NAME': ['a'], 'DOMIN': [1.0]}), sites=True)
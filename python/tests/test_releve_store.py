@@ -0,0 +1,83 @@
+import json
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import REPO_DIR
+from domin_scales import convert_scale, to_mid_range
+from releve_store import HEADER_FILENAME, check_copy, csv_to_store, open_store, store_to_csv, write_store
+
+ISGS = REPO_DIR / 'datasets' / 'isgs' / 'RELEVE_SP_DATA.txt'
+
+def domin_total(store):
+    return float(store['DOMIN'].sum())
+
+@pytest.fixture(scope='module')
+def isgs_store(tmp_path_factory):
+    return csv_to_store(ISGS, tmp_path_factory.mktemp('store') / 'isgs')
+
+def test_store_round_trips_the_isgs_data(isgs_store, tmp_path):
+    original = pd.read_csv(ISGS, skipinitialspace=True)
+    frame = open_store(isgs_store).to_frame()
+    assert list(frame.columns) == list(original.columns)
+    for column in ['ID', 'SITE_ID', 'RELEVE_ID', 'DOMIN']:
+        np.testing.assert_array_equal(frame[column].to_numpy(), original[column].to_numpy())
+    assert frame['SPECIES_NAME'].astype(str).tolist() == original['SPECIES_NAME'].str.strip().tolist()
+
+    store_to_csv(isgs_store, tmp_path / 'copy.csv')
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'copy.csv'), pd.read_csv(ISGS, skipinitialspace=True)
+                                  .assign(SPECIES_NAME=lambda df: df['SPECIES_NAME'].str.strip()))
+
+def test_workers_reopen_the_store_by_path(isgs_store):
+    store = open_store(isgs_store)
+    assert len(pickle.dumps(store)) < 1000
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        totals = list(pool.map(domin_total, [store] * 2))
+    assert totals == [domin_total(store)] * 2
+
+def test_empty_survey(tmp_path):
+    empty = pd.DataFrame({'RELEVE_ID': pd.Series([], dtype=int), 'SPECIES_NAME': pd.Series([], dtype=str),
+                          'DOMIN': pd.Series([], dtype=float)})
+    frame = open_store(write_store(empty, tmp_path / 'empty')).to_frame()
+    assert len(frame) == 0 and list(frame.columns) == ['RELEVE_ID', 'SPECIES_NAME', 'DOMIN']
+
+def test_newer_store_versions_are_rejected(tmp_path):
+    path = write_store(pd.DataFrame({'RELEVE_ID': [1], 'SPECIES_NAME': ['Holcus lanatus'], 'DOMIN': [4.0]}),
+                       tmp_path / 'store')
+    header = json.loads((path / HEADER_FILENAME).read_text())
+    header['version'] += 1
+    (path / HEADER_FILENAME).write_text(json.dumps(header))
+    with pytest.raises(ValueError, match='store version'):
+        open_store(path)
+
+def test_unsupported_columns_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match='NOTES'):
+        write_store(pd.DataFrame({'RELEVE_ID': [1], 'SPECIES_NAME': ['Holcus lanatus'], 'DOMIN': [4.0],
+                                  'NOTES': ['wet']}), tmp_path / 'store')
+
+def test_mid_range_copy_adds_nothing_to_the_store(isgs_store):
+    mismatches, missing, extra = check_copy(isgs_store, REPO_DIR / 'datasets' / 'isgs' / 'RELEVE_SP_DATA_MID_RANGE.txt',
+                                            'mid-range')
+    assert (len(mismatches), len(missing), len(extra)) == (0, 0, 0)
+
+def test_check_copy_reports_disagreeing_and_extra_rows(tmp_path):
+    survey = pd.DataFrame({'RELEVE_ID': [1, 1, 2], 'SPECIES_NAME': ['Holcus lanatus', 'Carex flacca', 'Holcus lanatus'],
+                           'GRID_NO': [1, 1, 2], 'DOMIN': [4.0, 2.0, 7.0]})
+    store = write_store(survey, tmp_path / 'store')
+    copy = survey.assign(DOMIN=convert_scale(survey['DOMIN'], 'mid-range'))
+    copy.loc[2, 'DOMIN'] = 30.0
+    copy = pd.concat([copy[copy['RELEVE_ID'] == 2],
+                      pd.DataFrame({'RELEVE_ID': [3], 'SPECIES_NAME': ['Juncus effusus'], 'GRID_NO': [2], 'DOMIN': [8.0]})])
+    copy.to_csv(tmp_path / 'copy.csv', index=False)
+
+    mismatches, missing, extra = check_copy(store, tmp_path / 'copy.csv', 'mid-range')
+    assert mismatches[['RELEVE_ID', 'DOMIN', 'COPY_DOMIN']].values.tolist() == [[2, 42.0, 30.0]]
+    assert sorted(missing['SPECIES_NAME']) == ['Carex flacca', 'Holcus lanatus']
+    assert extra['RELEVE_ID'].tolist() == [3]
+
+def test_cover_is_derived_on_request(isgs_store):
+    store = open_store(isgs_store)
+    expected = [to_mid_range(value) for value in store['DOMIN'][:5000].tolist()]
+    np.testing.assert_allclose(store.cover('mid-range')[:5000], expected)
+    assert store.to_frame('braun-blanquet')['DOMIN'].isin([0, 0.1, 0.5, 1, 2, 3, 4, 5]).all()
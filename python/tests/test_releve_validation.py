@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from releve_validation import UNUSABLE_CHECKS, load_releves, validate_frame
+
+VOCABULARY = frozenset(['holcus lanatus', 'carex flacca', 'juncus effusus'])
+
+def test_unknown_species_are_flagged_but_kept(tmp_path):
+    path = tmp_path / 'survey.csv'
+    pd.DataFrame({
+        'RELEVE_ID': [1, 1, 2, 2],
+        'SPECIES_NAME': ['Holcus lanatus', 'Alopercurus pratensis', 'carex flacca', ' '],
+        'DOMIN': [4, 2, 3, 5]
+    }).to_csv(path, index=False)
+    df, report = load_releves(path, scale=None, vocabulary=VOCABULARY, drop_invalid=UNUSABLE_CHECKS)
+
+    assert report['errors']['unknown_species']['values'] == ['Alopercurus pratensis']
+    assert report['errors']['missing_species']['lines'] == [5]
+    assert df['SPECIES_NAME'].tolist() == ['Holcus lanatus', 'Alopercurus pratensis', 'carex flacca']
+
+def test_checks_match_row_by_row_rules():
+    df = pd.DataFrame({
+        'SITE_ID': [1, 2, 1, 1, 1],
+        'RELEVE_ID': [1, 1, 1, 2, 2.5],
+        'SPECIES_NAME': ['Holcus lanatus', 'Holcus lanatus', 'Holcus lanatus', 'Juncus effusus', 'Carex flacca'],
+        'DOMIN': [4, 11, 3, 0.3, 2]
+    })
+    valid, errors = validate_frame(df, scale='domin', vocabulary=VOCABULARY)
+
+    # Same relevé number at another site is not a duplicate; a repeat at the same site is
+    assert errors['duplicate_species']['lines'] == [4]
+    assert errors['invalid_domin']['lines'] == [3, 5]
+    assert errors['invalid_releve_id']['lines'] == [6]
+    assert 'unknown_species' not in errors
+    assert valid.tolist() == [True, False, False, False, False]
+    assert df['RELEVE_ID'].tolist() == [1, 1, 1, 2, 2.5]
+
+def test_scale_is_detected_from_the_values():
+    df = pd.DataFrame({'RELEVE_ID': [1, 1, 2], 'SPECIES_NAME': ['a', 'b', 'a'], 'DOMIN': [3, 8, 63]})
+    _, report_errors = validate_frame(df, scale=None)
+    assert report_errors == {}
+    valid, errors = validate_frame(df, scale='domin')
+    assert np.array_equal(valid, [True, True, False])
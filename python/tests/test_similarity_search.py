@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import REPO_DIR
+from community_matrix import load_survey
+from similarity_search import SimilarityIndex, cover_matrix
+
+SITE_2025 = REPO_DIR / 'datasets' / 'site-68-2025'
+
+@pytest.fixture(scope='module')
+def surveys():
+    """COMBINED_SURVEY (DOMIN) as the index, COMBINED_MID_RANGE (the same relevés but 28) as the query."""
+    indexed = load_survey(SITE_2025 / 'COMBINED_SURVEY.csv')
+    return indexed, SimilarityIndex.build(indexed, scale='domin'), load_survey(SITE_2025 / 'COMBINED_MID_RANGE.csv')
+
+def naive_bray_curtis(x, y):
+    return 1 - 2 * np.minimum(x, y).sum() / (x.sum() + y.sum())
+
+def test_exhaustive_query_matches_naive_bray_curtis(surveys):
+    indexed, index, query = surveys
+    result = index.query(query, scale='mid-range', k=5)
+
+    # Both surveys on one species axis, mid-range cover
+    species = sorted(set(indexed['SPECIES_NAME'].astype(str)) | set(query['SPECIES_NAME'].astype(str)))
+    reference, reference_releves, _ = cover_matrix(indexed, 'domin', species)
+    queries, query_releves, _ = cover_matrix(query, 'mid-range', species)
+    reference_releves = [str(r) for r in reference_releves]
+    for i, releve in enumerate(query_releves):
+        distances = np.array([naive_bray_curtis(queries[i], row) for row in reference])
+        rows = result[result['QUERY_RELEVE'] == releve]
+        np.testing.assert_allclose(rows['BRAY_CURTIS'], np.sort(distances)[:5], atol=1e-4)
+        # The same relevé of the DOMIN survey comes first
+        assert (rows['RANK'].iloc[0], rows['RELEVE'].iloc[0], rows['BRAY_CURTIS'].iloc[0]) == (1, str(releve), 0.0)
+
+def test_signatures_estimate_jaccard_similarity(surveys):
+    indexed, index, _ = surveys
+    present = index.cover > 0
+    errors = []
+    for i in range(0, len(present), 4):
+        for j in range(i + 1, len(present), 7):
+            union = (present[i] | present[j]).sum()
+            jaccard = (present[i] & present[j]).sum() / union
+            errors.append((index.signatures[i] == index.signatures[j]).mean() - jaccard)
+    assert abs(np.mean(errors)) < 0.01 and np.mean(np.abs(errors)) < 0.05
+
+def test_lsh_query_finds_identical_releves(surveys):
+    _, index, query = surveys
+    queries, candidates = index.candidate_pairs(index.signatures)
+    assert set(zip(queries, candidates)) >= {(i, i) for i in range(len(index.releves))}
+    result = index.query(query, scale='mid-range', k=3, exhaustive=False)
+    first = result[result['RANK'] == 1]
+    assert (first['QUERY_RELEVE'].astype(str) == first['RELEVE']).all()
+    assert result.groupby('QUERY_RELEVE').size().eq(3).all()
+
+def test_saved_index_answers_alike(surveys, tmp_path):
+    _, index, query = surveys
+    index.save(tmp_path / 'index.npz')
+    loaded = SimilarityIndex.load(tmp_path / 'index.npz')
+    pd.testing.assert_frame_equal(loaded.query(query, k=5), index.query(query, k=5))
+
+def test_bands_must_divide_the_permutations(surveys):
+    indexed, _, _ = surveys
+    with pytest.raises(ValueError):
+        SimilarityIndex.build(indexed, num_perm=128, bands=48)
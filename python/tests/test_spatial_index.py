@@ -0,0 +1,47 @@
+import time
+import numpy as np
+import pytest
+from spatial_index import GridIndex
+
+def brute_force_knn(points, point, k):
+    distances = np.hypot(*(points - point).T)
+    order = np.argsort(distances, kind='stable')[:k]
+    return distances[order]
+
+def clustered_points(seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.uniform(-2000, 2000, size=(5, 2))
+    return np.concatenate([centre + rng.normal(scale=60, size=(80, 2)) for centre in centres])
+
+@pytest.mark.parametrize('k', [1, 5, 40])
+def test_knn_matches_brute_force(k):
+    points = clustered_points()
+    index = GridIndex(points, cell_size=25.0)
+    queries = np.random.default_rng(1).uniform(-2500, 2500, size=(50, 2))
+    for query in queries:
+        distances, indices = index.query_knn(query, k)
+        np.testing.assert_allclose(distances, brute_force_knn(points, query, k))
+        np.testing.assert_allclose(np.hypot(*(points[indices] - query).T), distances)
+
+def test_knn_far_from_the_data_returns_promptly():
+    # A sign-flipped longitude puts the query thousands of kilometres from the site
+    points = clustered_points()
+    index = GridIndex(points, cell_size=25.0)
+    query = np.array([-1.2e6, 3.0e5])
+    start = time.perf_counter()
+    distances, _ = index.query_knn(query, 3)
+    assert time.perf_counter() - start < 1.0
+    np.testing.assert_allclose(distances, brute_force_knn(points, query, 3))
+
+def test_radius_matches_brute_force():
+    points = clustered_points()
+    index = GridIndex(points, cell_size=40.0)
+    for query in points[::25]:
+        distances, indices = index.query_radius(query, 100.0)
+        expected = np.hypot(*(points - query).T)
+        assert sorted(indices.tolist()) == np.flatnonzero(expected <= 100.0).tolist()
+        assert np.all(np.diff(distances) >= 0)
+
+def test_knn_on_empty_index():
+    distances, indices = GridIndex(np.empty((0, 2)), cell_size=25.0).query_knn([0.0, 0.0], 3)
+    assert len(distances) == len(indices) == 0
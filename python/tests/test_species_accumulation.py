@@ -0,0 +1,43 @@
+from itertools import combinations
+import numpy as np
+import pytest
+from community_matrix import incidence_bits
+from species_accumulation import accumulation_curve, rarefaction_curve, richness_estimators
+
+# 4 relevés x 6 species found in 4, 3, 2, 1, 1 and 1 relevés
+INCIDENCE = np.array([
+    [1, 1, 1, 1, 0, 0],
+    [1, 1, 1, 0, 1, 0],
+    [1, 1, 0, 0, 0, 1],
+    [1, 0, 0, 0, 0, 0],
+])
+
+def test_estimators_by_hand():
+    estimators = richness_estimators(INCIDENCE)
+    assert (estimators['observed'], estimators['uniques'], estimators['duplicates']) == (6, 3, 1)
+    # Chao2: 6 + 3/4 * 3 * 2 / (2 * 2)
+    assert estimators['chao'] == pytest.approx(7.125, abs=0.005)
+    # ICE: C = 1 - 3/12, gamma = 6/C * 4/3 * 20/144 - 1
+    coverage = 0.75
+    gamma = 6 / coverage * 4 / 3 * 20 / 144 - 1
+    assert estimators['ice'] == pytest.approx(6 / coverage + 3 / coverage * gamma, abs=0.005)
+
+def test_chao_without_duplicates():
+    incidence = np.array([[1, 1, 0], [1, 0, 1], [1, 0, 0]])
+    assert richness_estimators(incidence)['chao'] == pytest.approx(3 + 2 / 3 * 2 * 1 / 2, abs=0.005)
+
+def test_chao_is_observed_without_uniques():
+    assert richness_estimators(np.ones((3, 4)))['chao'] == 4
+
+def test_rarefaction_matches_every_subset():
+    expected = [np.mean([INCIDENCE[list(rows)].any(axis=0).sum() for rows in combinations(range(4), m)])
+                for m in range(1, 5)]
+    np.testing.assert_allclose(rarefaction_curve(INCIDENCE), expected, atol=1e-3)
+
+def test_accumulation_does_not_depend_on_workers():
+    bits = incidence_bits(INCIDENCE)
+    serial = accumulation_curve(bits, permutations=500, workers=1, batch_size=100)
+    pooled = accumulation_curve(bits, permutations=500, workers=2, batch_size=100)
+    assert serial == pooled
+    assert serial['mean'][-1] == 6
+    np.testing.assert_allclose(serial['mean'], rarefaction_curve(INCIDENCE), atol=0.2)
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from species_ranking import rank_species
+
+def test_missing_group_labels_are_left_out():
+    df = pd.DataFrame({
+        'RELEVE_ID': [1, 1, 2, 2, 3, 3],
+        'SPECIES_NAME': ['Holcus lanatus', 'Carex flacca', 'Holcus lanatus', 'Carex flacca',
+                         'Carex flacca', 'Juncus effusus'],
+        'GRID_NO': [1, 1, np.nan, 2, 2, np.nan],
+        'DOMIN': [4.0, 2.0, 9.0, 3.0, 5.0, 7.0]
+    })
+    ranking = rank_species(df, 'GRID_NO', n=5)
+
+    assert ranking['GRID_NO'].notna().all()
+    by_grid = {grid: list(zip(rows['SPECIES_NAME'], rows['DOMIN'])) for grid, rows in ranking.groupby('GRID_NO')}
+    assert by_grid == {
+        1: [('Holcus lanatus', 4.0), ('Carex flacca', 2.0)],
+        2: [('Carex flacca', 8.0)]
+    }
+
+def test_missing_species_names_are_left_out():
+    df = pd.DataFrame({
+        'RELEVE_ID': [1, 1, 2],
+        'SPECIES_NAME': ['Holcus lanatus', None, 'Carex flacca'],
+        'GRID_NO': [1, 1, 2],
+        'DOMIN': [4.0, 6.0, 3.0]
+    })
+    ranking = rank_species(df, 'GRID_NO', n=5)
+
+    assert ranking[['GRID_NO', 'SPECIES_NAME', 'DOMIN']].values.tolist() == [
+        [1, 'Holcus lanatus', 4.0],
+        [2, 'Carex flacca', 3.0]
+    ]
@@ -0,0 +1,49 @@
+import pytest
+import pandas as pd
+from conftest import REPO_DIR
+
+def render_report(species_stats, survey, output_dir, **options):
+    results = species_stats.analyze_species_data(str(survey))
+    report = species_stats.generate_html_report(results, str(survey), output_dir=str(output_dir),
+                                                template_file=str(REPO_DIR / 'templates' / 'report_template.html'),
+                                                **options)
+    with open(report, encoding='utf-8') as f:
+        return f.read()
+
+@pytest.mark.parametrize('survey', ['site-68-2007/2007-MID-RANGE.csv', 'site-68-2022/2022-DOMIN.csv'])
+def test_report_renders_for_committed_surveys(species_stats, survey, tmp_path):
+    html = render_report(species_stats, REPO_DIR / 'datasets' / survey, tmp_path)
+    assert 'Dataset Summary' in html and 'Species Accumulation' in html
+
+def test_single_management_type_leaves_out_indicators(species_stats, tmp_path):
+    html = render_report(species_stats, REPO_DIR / 'datasets' / 'site-68-2022' / '2022-DOMIN.csv', tmp_path)
+    assert '<h2 class="card-title">Indicator Species</h2>' not in html
+
+def test_ordination_card_classifies_site_labelled_releves(species_stats, tmp_path):
+    survey = pd.read_csv(REPO_DIR / 'datasets' / 'site-68-2025' / 'COMBINED_SURVEY.csv')
+    survey.insert(0, 'SITE_ID', 68)
+    survey.to_csv(tmp_path / 'COMBINED_SITE.csv', index=False)
+    html = render_report(species_stats, tmp_path / 'COMBINED_SITE.csv', tmp_path, ordination=True)
+
+    assert '<h2 class="card-title">Landmark Ordination</h2>' in html
+    ordination = html[html.index("Plotly.newPlot('ordination-chart'"):]
+    for mgmt in ('Grazing+Fertiliser', 'Mowing+Fertiliser', 'Organic'):
+        assert f'"{mgmt}"' in ordination[:ordination.index('});')]
+
+def test_ordination_card_left_out_of_small_surveys(species_stats, tmp_path):
+    html = render_report(species_stats, REPO_DIR / 'datasets' / 'site-68-2007' / '2007-MID-RANGE.csv', tmp_path,
+                         ordination=True)
+    assert '<h2 class="card-title">Landmark Ordination</h2>' not in html
+
+def survey_files():
+    """Every committed survey CSV with the relevé columns the report reads."""
+    for path in sorted((REPO_DIR / 'datasets').rglob('*.csv')):
+        with open(path, encoding='utf-8', errors='replace') as f:
+            header = f.readline().strip().split(',')
+        if {'RELEVE_ID', 'SPECIES_NAME', 'DOMIN'} <= set(header):
+            yield path
+
+@pytest.mark.parametrize('survey', list(survey_files()), ids=lambda path: path.relative_to(REPO_DIR / 'datasets').as_posix())
+def test_report_renders_for_every_survey(species_stats, survey, tmp_path):
+    html = render_report(species_stats, survey, tmp_path, ordination=True)
+    assert 'Dataset Summary' in html and 'Species Accumulation' in html
@@ -0,0 +1,67 @@
+from itertools import combinations
+import numpy as np
+import pandas as pd
+import pytest
+from temporal_turnover import beta_partition, load_surveys, multiple_site_partition, shared_vocabulary, turnover_analysis
+
+def naive_multiple_site(assemblages):
+    """Baselga's multiple-site Sørensen partition, written out with sets."""
+    total = len(set().union(*assemblages))
+    base = sum(len(s) for s in assemblages) - total
+    low = sum(min(len(x - y), len(y - x)) for x, y in combinations(assemblages, 2))
+    high = sum(max(len(x - y), len(y - x)) for x, y in combinations(assemblages, 2))
+    sor = (low + high) / (2 * base + low + high)
+    sim = low / (base + low)
+    return sor, sim, sor - sim
+
+def test_pairwise_partition_by_hand():
+    sor, sim, sne = beta_partition(3, 1, 4)
+    assert (sor, sim) == pytest.approx((5 / 11, 1 / 4))
+    assert sne == pytest.approx(5 / 11 - 1 / 4)
+
+def test_nested_and_disjoint_assemblages():
+    # A nested pair differs only by nestedness; disjoint ones only by turnover
+    assert beta_partition(3, 0, 2)[1] == 0 and beta_partition(3, 0, 2)[2] == pytest.approx(0.25)
+    assert [float(x) for x in beta_partition(0, 4, 4)] == [1.0, 1.0, 0.0]
+    assert [float(x) for x in beta_partition(0, 0, 0)] == [0.0, 0.0, 0.0]
+
+def test_multiple_site_partition_matches_its_definition():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        presence = rng.random((4, 30)) < rng.uniform(0.2, 0.7, size=(4, 1))
+        assemblages = [set(np.flatnonzero(row)) for row in presence]
+        assert multiple_site_partition(presence) == pytest.approx(naive_multiple_site(assemblages))
+    # Two assemblages reduce to the pairwise partition
+    x, y = presence[0], presence[1]
+    pairwise = beta_partition((x & y).sum(), (x & ~y).sum(), (~x & y).sum())
+    assert multiple_site_partition(presence[:2]) == pytest.approx([float(v) for v in pairwise])
+
+def test_species_are_matched_ignoring_case_and_spacing():
+    first = pd.DataFrame({'RELEVE_ID': [1, 1], 'SPECIES_NAME': ['Holcus lanatus', 'Carex flacca'], 'DOMIN': [3, 4]})
+    second = pd.DataFrame({'RELEVE_ID': [1], 'SPECIES_NAME': [' holcus Lanatus '], 'DOMIN': [5]})
+    (_, aligned), species = shared_vocabulary([first, second])
+    assert species == ['Carex flacca', 'Holcus lanatus']
+    assert aligned['SPECIES_NAME'].tolist() == ['Holcus lanatus']
+
+def test_resurveyed_releves_are_matched_by_location(tmp_path):
+    lat, lon = 53.5, -8.0
+    surveys = {
+        '2007': ([(1, 'Holcus lanatus'), (1, 'Carex flacca'), (2, 'Juncus effusus')], [(1, 0.0), (2, 0.001)]),
+        '2022': ([(7, 'Holcus lanatus'), (7, 'Lotus corniculatus'), (8, 'Juncus effusus')], [(7, 0.00001), (8, 0.00101)]),
+    }
+    specs = []
+    for label, (rows, points) in surveys.items():
+        pd.DataFrame(rows, columns=['RELEVE_ID', 'SPECIES_NAME']).assign(DOMIN=8).to_csv(tmp_path / f'{label}.csv', index=False)
+        pd.DataFrame([(lat, lon + dlon, releve) for releve, dlon in points], columns=['Latitude', 'Longitude', 'Releve']) \
+            .to_csv(tmp_path / f'{label}-coordinates.csv', index=False)
+        specs.append((label, tmp_path / f'{label}.csv', tmp_path / f'{label}-coordinates.csv'))
+
+    table, summary = turnover_analysis(*load_surveys(specs))
+    pair, = summary['pairs']
+    assert (pair['shared'], pair['extinct'], pair['colonised']) == (2, 1, 1)
+    assert (pair['matched_releves'], pair['matched_colonised'], pair['matched_extinct']) == (2, 1, 1)
+    # Relevé 1 -> 7: a = 1, b = 1, c = 1; relevé 2 -> 8 is unchanged
+    assert pair['matched_sorensen'] == pytest.approx(0.25, abs=1e-3)
+    status = table.set_index('SPECIES_NAME')['STATUS_2007_2022']
+    assert status.to_dict() == {'Carex flacca': 'extinct', 'Holcus lanatus': 'persistent',
+                                'Juncus effusus': 'persistent', 'Lotus corniculatus': 'colonised'}
@@ -0,0 +1,55 @@
+import csv
+import xml.etree.ElementTree as ET
+import pytest
+from vegapp_ingest import ingest, read_plots, write_plots
+
+def export(path, plots):
+    """A VegApp XML export holding (name, date, grid, [(genus, spec, quantity)]) plots."""
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<VegApp><Project><Plots>']
+    for name, date, grid, species in plots:
+        lines.append(f'<Plot name="{name}" date="{date}" custom_a_plots="{grid}"><SpeciesList><Species>')
+        lines += [f'<Sp genus="{genus}" spec="{spec}" quantity="{quantity}"/>' for genus, spec, quantity in species]
+        lines.append('</Species></SpeciesList></Plot>')
+    lines.append('</Plots></Project></VegApp>')
+    path.write_text('\n'.join(lines), encoding='utf-8')
+    return path
+
+SURVEY_1 = [('1', '2025-06-02', '1', [('Holcus', 'lanatus', '7'), ('Carex', 'flacca', '+'), ('Juncus', 'effusus', '0'),
+                                      ('Lotus', 'corniculatus', '')]),
+            ('22', '2025-06-02', '1', [('Holcus', 'lanatus', '5')]),
+            ('2', '2025-06-02', '1', [('Agrostis', '', '4')])]
+SURVEY_2 = [('2', '2025-06-02', '1', [('Agrostis', '', '4')]),
+            ('3', '2025-06-03', '2', [('Juncus', 'effusus', '6')]),
+            ('1', '2025-07-15', '1', [('Holcus', 'lanatus', '8')])]
+
+def test_plots_are_read_as_vegapp_to_csv_wrote_them(tmp_path):
+    plots = read_plots(export(tmp_path / 'survey1.xml', SURVEY_1))
+    assert [plot['name'] for plot in plots] == ['1', '2']
+    assert plots[0]['records'] == [('Holcus lanatus', '7'), ('Carex flacca', 0.1)]
+    # A species without an epithet keeps its row with an empty name
+    assert plots[1]['records'] == [('', '4')]
+
+    write_plots(plots, tmp_path / 'survey1.csv')
+    with open(tmp_path / 'survey1.csv', newline='') as f:
+        assert list(csv.reader(f)) == [['RELEVE_ID', 'SPECIES_NAME', 'GRID_NO', 'DOMIN'],
+                                       ['1', 'Holcus lanatus', '1', '7'], ['1', 'Carex flacca', '1', '0.1'],
+                                       ['2', '', '1', '4']]
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_repeated_plots_are_merged_in_file_order(tmp_path, workers):
+    files = [export(tmp_path / 'survey1.xml', SURVEY_1), export(tmp_path / 'survey2.xml', SURVEY_2)]
+    plots, duplicates = ingest(files, workers=workers)
+
+    # Plot 2 was exported twice; plot 1 resurveyed on another date is kept
+    assert [(plot['name'], plot['date']) for plot in plots] == [
+        ('1', '2025-06-02'), ('2', '2025-06-02'), ('3', '2025-06-03'), ('1', '2025-07-15')]
+    assert duplicates == [(('2', '2025-06-02'), str(files[0]), str(files[1]), True)]
+
+def test_exclusions_can_be_cleared(tmp_path):
+    plots = read_plots(export(tmp_path / 'survey1.xml', SURVEY_1), exclude=[])
+    assert [plot['name'] for plot in plots] == ['1', '22', '2']
+
+def test_malformed_exports_name_the_file(tmp_path):
+    (tmp_path / 'broken.xml').write_text('<VegApp><Plots><Plot name="1">')
+    with pytest.raises(ET.ParseError, match='broken.xml'):
+        read_plots(tmp_path / 'broken.xml')
@@ -0,0 +1,74 @@
+import csv
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import REPO_DIR
+from domin_scales import cover_to_braun_blanquet
+from wide_to_long import translate_wide_survey
+
+def naive_translation(rows, ids, scale, policy):
+    """Row-by-row reference: combine each species' cover per relevé, then bin it."""
+    merged = {}
+    for name, *cells in rows:
+        name = name.strip()
+        for releve, cell in zip(ids, cells):
+            try:
+                value = float(cell)
+            except ValueError:
+                continue
+            if not name or np.isnan(value) or value <= 0:
+                continue
+            key = (releve, name)
+            if key not in merged:
+                merged[key] = value
+            elif policy == 'max':
+                merged[key] = max(merged[key], value)
+            elif policy == 'sum':
+                merged[key] += value
+    if scale == 'braun-blanquet':
+        merged = {key: float(cover_to_braun_blanquet(value)) for key, value in merged.items()}
+    return {key: value for key, value in merged.items() if value > 0}
+
+def random_sheet(path, seed=0):
+    rng = np.random.default_rng(seed)
+    names = [f"Species {i}" for i in range(40)] + ['', ' Species 3 ']
+    cells = ['', '0', '0.05', '0.3', '2', '7.5', '30', '62', 'x']
+    rows = [[names[rng.integers(len(names))]] + [cells[c] for c in rng.integers(len(cells), size=6)]
+            for _ in range(300)]
+    with open(path, 'w', newline='') as f:
+        csv.writer(f).writerows(rows)
+    return rows
+
+@pytest.mark.parametrize('policy', ['max', 'sum', 'first'])
+@pytest.mark.parametrize('scale', ['braun-blanquet', 'cover'])
+def test_chunked_translation_matches_a_row_by_row_reference(tmp_path, policy, scale):
+    rows = random_sheet(tmp_path / 'wide.csv')
+    ids = list(range(30, 36))
+    count = translate_wide_survey(tmp_path / 'wide.csv', tmp_path / 'long.csv', releve_ids=ids,
+                                  scale=scale, duplicate_policy=policy, chunk_size=37)
+    result = pd.read_csv(tmp_path / 'long.csv')
+    assert count == len(result)
+    translated = {(r, s): v for r, s, v in result[['RELEVE_ID', 'SPECIES_NAME', 'DOMIN']].itertuples(index=False)}
+    expected = naive_translation(rows, ids, scale, policy)
+    assert translated.keys() == expected.keys()
+    assert translated == pytest.approx(expected)
+    assert result['RELEVE_ID'].is_monotonic_increasing
+
+def test_header_row_names_the_releves(tmp_path):
+    (tmp_path / 'wide.csv').write_text("Species,A1,A2\nHolcus lanatus,12,\nCarex flacca,,0.4\n")
+    translate_wide_survey(tmp_path / 'wide.csv', tmp_path / 'long.csv', header=True)
+    assert pd.read_csv(tmp_path / 'long.csv').values.tolist() == [['A1', 'Holcus lanatus', 2], ['A2', 'Carex flacca', 0.1]]
+
+def test_2022_field_sheet(tmp_path):
+    count = translate_wide_survey(REPO_DIR / 'datasets' / 'site-68-2022' / 'Site-0068.csv', tmp_path / 'long.csv',
+                                  first_releve_id=30)
+    result = pd.read_csv(tmp_path / 'long.csv')
+    assert count == 124
+    assert sorted(result['RELEVE_ID'].unique()) == [30, 31, 32, 33, 34]
+    assert result['DOMIN'].isin([0.1, 0.5, 1, 2, 3, 4, 5]).all()
+    assert not result.duplicated(['RELEVE_ID', 'SPECIES_NAME']).any()
+
+def test_mismatched_releve_ids_are_rejected(tmp_path):
+    (tmp_path / 'wide.csv').write_text("Holcus lanatus,12,3\n")
+    with pytest.raises(ValueError, match='3 relevé ids given for 2 cover columns'):
+        translate_wide_survey(tmp_path / 'wide.csv', tmp_path / 'long.csv', releve_ids=[1, 2, 3])
@@ -1,49 +1,11 @@
 import xml.etree.ElementTree as ET
-import csv
 import argparse
 import sys
+from vegapp_ingest import DEFAULT_EXCLUDE, read_plots, write_plots
 
-def parse_xml_and_write_csv(input_file, output_file):
+def parse_xml_and_write_csv(input_file, output_file, exclude=DEFAULT_EXCLUDE):
     try:
-        tree = ET.parse(input_file)
-        root = tree.getroot()
-
-        with open(output_file, 'w', newline='') as csvfile:
-            fieldnames = ['RELEVE_ID', 'SPECIES_NAME', 'GRID_NO', 'DOMIN']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-
-            plots = root.find('.//Plots')
-            if plots is not None:
-                for plot in plots:
-                    plot_name = plot.get('name', '')
-                    
-                    if plot_name == "22":
-                        continue
-                        
-                    grid_no = plot.get('custom_a_plots', '')
-
-                    species_list = plot.find('.//Species')
-                    if species_list is not None:
-                        for species in species_list:
-                            genus = species.get('genus', '')
-                            spec = species.get('spec', '')
-                            quantity = species.get('quantity', '')
-
-                            if not quantity or quantity == '0':
-                                continue
-                            
-                            if quantity == '+':
-                                quantity = 0.1
-
-                            species_name = f"{genus} {spec}" if genus and spec else ''
-
-                            writer.writerow({
-                                'RELEVE_ID': plot_name,
-                                'SPECIES_NAME': species_name,
-                                'GRID_NO': grid_no,
-                                'DOMIN': quantity
-                            })
+        write_plots(read_plots(input_file, exclude), output_file)
         print(f"Successfully extracted data to {output_file}")
     except ET.ParseError as e:
         print(f"Error parsing XML file: {e}", file=sys.stderr)
@@ -56,10 +18,12 @@ def main():
     parser = argparse.ArgumentParser(description='Extract plot and species data from XML to CSV')
     parser.add_argument('input_file', help='Path to the input XML file')
     parser.add_argument('output_file', help='Path to the output CSV file')
+    parser.add_argument('-x', '--exclude', nargs='*', default=DEFAULT_EXCLUDE,
+                        help='Plot names to leave out (default: %(default)s)')
     
     args = parser.parse_args()
     
-    parse_xml_and_write_csv(args.input_file, args.output_file)
+    parse_xml_and_write_csv(args.input_file, args.output_file, args.exclude)
 
 if __name__ == '__main__':
     main()
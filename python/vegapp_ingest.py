@@ -0,0 +1,151 @@
+import argparse
+import csv
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+FIELDNAMES = ['RELEVE_ID', 'SPECIES_NAME', 'GRID_NO', 'DOMIN']
+DEFAULT_EXCLUDE = ['22']  # plots left out of the 2025 survey datasets
+
+def plot_records(plot):
+    """
+    Species rows of one VegApp <Plot> element as (species name, DOMIN) pairs.
+
+    Species without a cover value (or with 0) are left out and '+' is
+    recorded as 0.1, as vegapp-to-csv.py always has.
+    """
+    records = []
+    species_list = plot.find('.//Species')
+    if species_list is None:
+        return records
+    for species in species_list:
+        genus = species.get('genus', '')
+        spec = species.get('spec', '')
+        quantity = species.get('quantity', '')
+
+        if not quantity or quantity == '0':
+            continue
+        if quantity == '+':
+            quantity = 0.1
+
+        records.append((f"{genus} {spec}" if genus and spec else '', quantity))
+    return records
+
+def read_plots(xml_file, exclude=DEFAULT_EXCLUDE):
+    """
+    Plots of one VegApp export, in document order, skipping plot names in `exclude`.
+
+    Each plot is a dict with its name, date, grid number and species
+    records; parsing runs in a worker process when ingesting many files.
+    """
+    try:
+        root = ET.parse(xml_file).getroot()
+    except ET.ParseError as e:
+        raise ET.ParseError(f"{xml_file}: {e}") from None
+    excluded = set(exclude)
+    plots = []
+    container = root.find('.//Plots')
+    for plot in container if container is not None else []:
+        name = plot.get('name', '')
+        if name in excluded:
+            continue
+        plots.append({
+            'name': name,
+            'date': plot.get('date', ''),
+            'grid': plot.get('custom_a_plots', ''),
+            'records': plot_records(plot),
+            'source': str(xml_file)
+        })
+    return plots
+
+def merge_plots(exports):
+    """
+    Merge the plots of several exports, in export order, dropping repeated plots.
+
+    A plot is identified by its name and date, so the same relevé exported
+    again in a later file is kept once (from the first export holding it),
+    while a relevé resurveyed on another date is kept twice. Returns
+    (plots, duplicates) where duplicates lists (plot, kept from, dropped
+    from, identical) for every dropped copy.
+    """
+    merged, seen, duplicates = [], {}, []
+    for plots in exports:
+        for plot in plots:
+            key = (plot['name'], plot['date'])
+            if key in seen:
+                kept = seen[key]
+                duplicates.append((key, kept['source'], plot['source'], kept['records'] == plot['records']))
+                continue
+            seen[key] = plot
+            merged.append(plot)
+    return merged, duplicates
+
+def ingest(xml_files, exclude=DEFAULT_EXCLUDE, workers=None):
+    """
+    Parse many VegApp exports concurrently and merge them (see `merge_plots`).
+
+    Files are parsed in a process pool, but merged in the order given, so
+    the output does not depend on which file finishes first.
+    """
+    xml_files = [str(path) for path in xml_files]
+    if workers == 1 or len(xml_files) == 1:
+        exports = [read_plots(path, exclude) for path in xml_files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            exports = list(pool.map(read_plots, xml_files, [list(exclude)] * len(xml_files)))
+    return merge_plots(exports)
+
+def write_plots(plots, output_file):
+    """Write plots as long-format RELEVE_ID, SPECIES_NAME, GRID_NO, DOMIN rows; returns the row count."""
+    rows = 0
+    with open(output_file, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        for plot in plots:
+            for species_name, quantity in plot['records']:
+                writer.writerow({
+                    'RELEVE_ID': plot['name'],
+                    'SPECIES_NAME': species_name,
+                    'GRID_NO': plot['grid'],
+                    'DOMIN': quantity
+                })
+                rows += 1
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Ingest many VegApp XML exports into one long-format survey CSV',
+        epilog='Example: survey1.xml survey2.xml survey3.xml -o COMBINED_SURVEY.csv -x 22'
+    )
+    parser.add_argument('input_files', nargs='+', help='VegApp XML exports, in the order to merge them')
+    parser.add_argument('-o', '--output', required=True, help='Merged CSV file')
+    parser.add_argument('-x', '--exclude', nargs='*', default=DEFAULT_EXCLUDE,
+                        help='Plot names to leave out (default: %(default)s; give -x alone to keep every plot)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes')
+
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        for path in args.input_files:
+            if not Path(path).is_file():
+                raise FileNotFoundError(f"Input file '{path}' not found")
+        plots, duplicates = ingest(args.input_files, args.exclude, args.workers)
+        rows = write_plots(plots, args.output)
+    except ET.ParseError as e:
+        print(f"Error parsing XML file: {e}", file=sys.stderr)
+        sys.exit(1)
+    except OSError as e:
+        print(f"File error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for (name, date), kept, dropped, identical in duplicates:
+        note = "" if identical else " (species records differ)"
+        print(f"Plot {name} ({date or 'no date'}) in {dropped} already read from {kept}; skipped{note}")
+    print(f"Merged {len(plots)} plots ({rows} rows) from {len(args.input_files)} files into {args.output} "
+          f"in {time.perf_counter() - started:.2f}s")
+
+if __name__ == '__main__':
+    main()
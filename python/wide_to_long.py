@@ -0,0 +1,163 @@
+import argparse
+import csv
+import sys
+import numpy as np
+import pandas as pd
+from domin_scales import cover_to_braun_blanquet
+
+DUPLICATE_POLICIES = ['max', 'sum', 'first']
+SCALES = ['braun-blanquet', 'cover']
+
+class _CoverTable:
+    """
+    Dense species x relevé table of raw % cover that grows as new species
+    are streamed in. Cover is only binned into classes once every row has
+    been merged, so summed duplicates add percentages, not class codes.
+    """
+
+    def __init__(self, releve_count):
+        self.species = {}
+        self.values = np.full((64, releve_count), np.nan)
+
+    def species_codes(self, names):
+        """Intern species names, in first-seen order, and return their row codes."""
+        codes = np.fromiter((self.species.setdefault(name, len(self.species)) for name in names),
+                            dtype=np.int64, count=len(names))
+        if len(self.species) > len(self.values):
+            grown = np.full((max(len(self.species), 2 * len(self.values)), self.values.shape[1]), np.nan)
+            grown[:len(self.values)] = self.values
+            self.values = grown
+        return codes
+
+    def merge(self, rows, cols, values, policy):
+        """Fold one chunk of (species, relevé, value) triples into the table."""
+        if policy == 'max':
+            np.fmax.at(self.values, (rows, cols), values)
+        elif policy == 'sum':
+            current = self.values[rows, cols]
+            self.values[rows, cols] = np.where(np.isnan(current), 0, current)
+            np.add.at(self.values, (rows, cols), values)
+        elif policy == 'first':
+            keys = rows * self.values.shape[1] + cols
+            _, first = np.unique(keys, return_index=True)
+            rows, cols, values = rows[first], cols[first], values[first]
+            empty = np.isnan(self.values[rows, cols])
+            self.values[rows[empty], cols[empty]] = values[empty]
+        else:
+            raise ValueError(f"Unknown duplicate policy '{policy}'")
+
+def translate_wide_survey(input_file, output_file, releve_ids=None, first_releve_id=1, header=False,
+                          scale='braun-blanquet', duplicate_policy='max', chunk_size=50000):
+    """
+    Translate a wide field sheet (one row per species, one cover column per
+    relevé) into the long RELEVE_ID, SPECIES_NAME, DOMIN format.
+
+    Args:
+        input_file (str): Wide CSV, species name in the first column
+        output_file (str): Path to save the long-format CSV
+        releve_ids (list): RELEVE_ID for each cover column; overrides the header
+        first_releve_id (int): Numbering start when no ids or header are given
+        header (bool): Whether the first row labels the relevé columns
+        scale (str): 'braun-blanquet' to bin % cover, 'cover' to keep it as is
+        duplicate_policy (str): How repeated species rows combine: max, sum or first
+        chunk_size (int): Rows read per chunk
+
+    The input is read in chunks; memory depends on the number of distinct
+    species and relevés, not on the length of the file.
+    """
+    if duplicate_policy not in DUPLICATE_POLICIES:
+        raise ValueError(f"Duplicate policy must be one of {', '.join(DUPLICATE_POLICIES)}")
+    if scale not in SCALES:
+        raise ValueError(f"Scale must be one of {', '.join(SCALES)}")
+
+    with open(input_file, 'r', newline='') as f:
+        first_row = next(csv.reader(f), None)
+    if not first_row:
+        raise ValueError(f"No rows found in {input_file}")
+
+    column_count = len(first_row) - 1
+    if releve_ids is not None:
+        ids = list(releve_ids)
+    elif header:
+        ids = [label.strip() for label in first_row[1:]]
+    else:
+        ids = list(range(first_releve_id, first_releve_id + column_count))
+    if len(ids) != column_count:
+        raise ValueError(f"{len(ids)} relevé ids given for {column_count} cover columns")
+
+    # Cover columns are parsed as floats by the C parser; only a column
+    # holding something that is not a number falls back to object dtype
+    reader = pd.read_csv(input_file, header=None, skiprows=1 if header else 0, dtype={0: str},
+                         names=list(range(column_count + 1)), chunksize=chunk_size)
+    table = _CoverTable(column_count)
+    unparsed = 0
+
+    for chunk in reader:
+        names = chunk[0].fillna('').str.strip()
+        named = (names != '').to_numpy()
+        cover = np.empty((len(chunk), column_count))
+        for col in range(column_count):
+            values = chunk[col + 1]
+            if not pd.api.types.is_numeric_dtype(values):
+                numbers = pd.to_numeric(values, errors='coerce')
+                unparsed += int((values.notna() & numbers.isna()).sum())
+                values = numbers
+            cover[:, col] = values.to_numpy(dtype=float)
+
+        # Empty and zero cells are dropped; small covers are kept until they are merged
+        present = ~np.isnan(cover) & (cover > 0) & named[:, None]
+        rows, cols = np.nonzero(present)
+        if not len(rows):
+            continue
+
+        codes = table.species_codes(names.to_numpy()[named])
+        species_rows = np.full(len(names), -1, dtype=np.int64)
+        species_rows[named] = codes
+        table.merge(species_rows[rows], cols, cover[rows, cols], duplicate_policy)
+
+    if unparsed:
+        print(f"Warning: skipped {unparsed} cover values that are not numbers", file=sys.stderr)
+
+    names = np.array(list(table.species), dtype=object)
+    values = table.values[:len(names)]
+    if scale == 'braun-blanquet':
+        # Class 0 (below 0.1% cover, even after merging) is dropped
+        values = np.where(np.isnan(values), np.nan, cover_to_braun_blanquet(np.nan_to_num(values)))
+        values[values == 0] = np.nan
+    cols, rows = np.nonzero(~np.isnan(values.T))
+    cells = values[rows, cols]
+    integral = cells == np.floor(cells)
+    long_format = pd.DataFrame({
+        'RELEVE_ID': np.asarray(ids, dtype=object)[cols],
+        'SPECIES_NAME': names[rows],
+        'DOMIN': np.where(integral, cells.astype(np.int64).astype(object), cells.astype(object))
+    })
+    long_format.to_csv(output_file, index=False)
+    return len(long_format)
+
+def main():
+    parser = argparse.ArgumentParser(description='Translate a wide species x relevé field sheet into long format')
+    parser.add_argument('input_file', help='Wide CSV with the species name in the first column')
+    parser.add_argument('output_file', help='Path to the long-format CSV')
+    ids = parser.add_mutually_exclusive_group()
+    ids.add_argument('--releve-ids', nargs='+', type=int, help='RELEVE_ID of each cover column')
+    ids.add_argument('--first-releve-id', type=int, default=1, help='RELEVE_ID of the first cover column')
+    parser.add_argument('--header', action='store_true', help='First row names the relevé columns')
+    parser.add_argument('-s', '--scale', choices=SCALES, default='braun-blanquet',
+                        help='Output scale for the cover values')
+    parser.add_argument('-d', '--duplicates', choices=DUPLICATE_POLICIES, default='max',
+                        help='How to combine repeated species rows')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='Rows read per chunk')
+
+    args = parser.parse_args()
+
+    try:
+        written = translate_wide_survey(args.input_file, args.output_file, args.releve_ids, args.first_releve_id,
+                                        args.header, args.scale, args.duplicates, args.chunk_size)
+        print(f"Data has been translated and written to {args.output_file} ({written} rows)")
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()